@@ -1,7 +1,7 @@
 # accounts/admin.py
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, EmailOTP
+from .models import User, EmailOTP, OutboundEmail
 
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
@@ -16,3 +16,12 @@ class EmailOTPAdmin(admin.ModelAdmin):
     list_display = ("email", "code", "created_at", "expires_at", "used", "user")
     readonly_fields = ("created_at",)
 
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ("to_email", "kind", "status", "attempts", "created_at", "sent_at")
+    list_filter = ("status", "kind")
+    search_fields = ("to_email",)
+    exclude = ("body",)
+    readonly_fields = ("created_at", "sent_at", "last_error")
@@ -0,0 +1,73 @@
+"""
+Minimal local SMTP server for mail benchmarks.
+
+Speaks just enough SMTP (HELO/EHLO, MAIL, RCPT, DATA, RSET, NOOP, QUIT) for
+Django's SMTP backend, counts accepted messages and discards them. A greeting
+delay can be configured to stand in for the connection and TLS handshake
+cost of a real provider.
+"""
+import socketserver
+import threading
+import time
+
+
+class FakeSMTPHandler(socketserver.StreamRequestHandler):
+
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        if server.connect_delay:
+            time.sleep(server.connect_delay)
+        self.reply('220 fake-smtp ready')
+
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors='replace').strip().split(' ', 1)[0].upper()
+
+            if command in ('HELO', 'EHLO'):
+                self.reply('250 fake-smtp')
+            elif command in ('MAIL', 'RCPT', 'RSET', 'NOOP'):
+                self.reply('250 OK')
+            elif command == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                while self.rfile.readline() not in (b'.\r\n', b'.\n', b''):
+                    pass
+                with server.lock:
+                    server.messages += 1
+                self.reply('250 OK: queued')
+            elif command == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+class FakeSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host='127.0.0.1', port=0, connect_delay=0.0):
+        super().__init__((host, port), FakeSMTPHandler)
+        self.connect_delay = connect_delay
+        self.lock = threading.Lock()
+        self.messages = 0
+        self.connections = 0
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
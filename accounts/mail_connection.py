@@ -0,0 +1,125 @@
+"""
+Pooled mail connections for E-Voting System
+Keeps one long-lived connection to the configured EMAIL_BACKEND per worker
+thread, so SMTP (or Anymail HTTP session) setup and TLS handshakes are paid
+once per connection instead of once per message.
+"""
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+import smtplib
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PooledMailConnection:
+    """Per-thread, health-checked connection to the configured mail backend"""
+
+    MAX_AGE = 300  # seconds before a connection is recycled
+    CHECK_AFTER = 30  # idle seconds before a connection is health-checked
+
+    _local = threading.local()
+
+    @classmethod
+    def get(cls):
+        """
+        Return this thread's open connection, reconnecting if it is too old,
+        or has been idle and fails its health check.
+        """
+        state = cls._local
+        now = time.monotonic()
+        connection = getattr(state, 'connection', None)
+
+        if connection is not None:
+            max_age = getattr(settings, 'EMAIL_CONNECTION_MAX_AGE', cls.MAX_AGE)
+            check_after = getattr(settings, 'EMAIL_CONNECTION_CHECK_AFTER', cls.CHECK_AFTER)
+            if now - state.opened_at > max_age:
+                cls.reset()
+                connection = None
+            elif now - state.used_at > check_after and not cls.is_healthy(connection):
+                logger.info("Mail connection failed its health check, reconnecting")
+                cls.reset()
+                connection = None
+
+        if connection is None:
+            connection = get_connection(fail_silently=False)
+            connection.open()
+            state.connection = connection
+            state.opened_at = now
+
+        state.used_at = now
+        return connection
+
+    @classmethod
+    def is_healthy(cls, connection) -> bool:
+        # SMTP connections can be probed with NOOP; HTTP-based backends
+        # (Anymail) reconnect transparently, so they are assumed healthy.
+        smtp = getattr(connection, 'connection', None)
+        if not isinstance(smtp, smtplib.SMTP):
+            return True
+        try:
+            return smtp.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    @classmethod
+    def reset(cls):
+        """Close and forget this thread's connection."""
+        connection = getattr(cls._local, 'connection', None)
+        cls._local.connection = None
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+    @classmethod
+    def send(cls, message) -> None:
+        """
+        Send one EmailMessage over the pooled connection, reconnecting once
+        if the server dropped it.
+
+        Raises:
+            Exception: whatever the backend raised on the retry
+        """
+        try:
+            cls.get().send_messages([message])
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            cls.reset()
+            cls.get().send_messages([message])
+
+    @classmethod
+    def send_batch(cls, messages, throttle=None) -> list:
+        """
+        Send several messages over one connection. Messages are sent one by
+        one so a failure is attributed to the right message and never causes
+        the ones already sent to be repeated.
+
+        Args:
+            messages: Iterable of EmailMessage
+            throttle: Optional callable invoked before each send (rate limiting)
+
+        Returns:
+            list: An error string (or None on success) per message, in order
+        """
+        errors = []
+        for message in messages:
+            if throttle is not None:
+                throttle()
+            try:
+                cls.send(message)
+                errors.append(None)
+            except Exception as e:
+                cls.reset()
+                errors.append(str(e))
+        return errors
+
+
+@receiver(setting_changed)
+def reset_on_email_settings_change(setting, **kwargs):
+    if setting.startswith('EMAIL_'):
+        PooledMailConnection.reset()
@@ -0,0 +1,63 @@
+"""
+Mail throughput benchmark.
+
+Starts a local fake SMTP server and sends the same batch of messages twice:
+once with a new connection per message (plain send_mail) and once through
+the pooled connection layer. Reports messages per second and connections
+opened for each.
+
+    python manage.py benchmark_mail --messages 500 --threads 4 --handshake-ms 150
+"""
+from concurrent.futures import ThreadPoolExecutor
+from django.core.mail import EmailMessage, send_mail
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from accounts.fake_smtp import FakeSMTPServer
+from accounts.mail_connection import PooledMailConnection
+import time
+
+
+class Command(BaseCommand):
+    help = 'Compare per-message SMTP connections with pooled connections against a local fake SMTP server'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=200)
+        parser.add_argument('--threads', type=int, default=4, help='Concurrent senders (like outbox workers)')
+        parser.add_argument('--handshake-ms', type=float, default=100, help='Simulated connection/TLS setup cost')
+
+    def handle(self, *args, **options):
+        server = FakeSMTPServer(connect_delay=options['handshake_ms'] / 1000).start()
+        email_settings = {
+            'EMAIL_BACKEND': 'django.core.mail.backends.smtp.EmailBackend',
+            'EMAIL_HOST': '127.0.0.1',
+            'EMAIL_PORT': server.port,
+            'EMAIL_USE_TLS': False,
+            'EMAIL_USE_SSL': False,
+            'EMAIL_HOST_USER': '',
+            'EMAIL_HOST_PASSWORD': '',
+        }
+
+        def per_message(n):
+            send_mail(f'Benchmark {n}', 'Body', 'noreply@kuravote.com', [f'voter{n}@example.invalid'])
+
+        def pooled(n):
+            PooledMailConnection.send(
+                EmailMessage(f'Benchmark {n}', 'Body', 'noreply@kuravote.com', [f'voter{n}@example.invalid'])
+            )
+
+        try:
+            with override_settings(**email_settings):
+                for label, send in (('new connection per message', per_message), ('pooled connections', pooled)):
+                    server.messages = server.connections = 0
+                    started = time.perf_counter()
+                    with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+                        list(pool.map(send, range(options['messages'])))
+                        # Best effort: close the pooled connections the worker threads opened
+                        list(pool.map(lambda _: PooledMailConnection.reset(), range(options['threads'])))
+                    elapsed = time.perf_counter() - started
+                    self.stdout.write(
+                        f'{label:<28} {server.messages:>6} sent  {server.connections:>5} connections  '
+                        f'{server.messages / elapsed:>8.1f} msg/s'
+                    )
+        finally:
+            server.stop()
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from accounts.outbox import MailOutbox
+import time
+
+
+class Command(BaseCommand):
+    help = 'Deliver due messages from the mail outbox (pending, retrying, or abandoned by a worker)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep running instead of exiting after one pass')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds between passes with --loop')
+        parser.add_argument('--limit', type=int, default=500, help='Messages per pass')
+
+    def handle(self, *args, **options):
+        while True:
+            sent = MailOutbox.process_due(limit=options['limit'])
+            if sent or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(f'Sent {sent} queued message(s)'))
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from accounts.models import EmailOTP
+import time
+
+
+class Command(BaseCommand):
+    help = 'Delete expired EmailOTP rows in small chunks (safe to run while voting is open)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, help='Seconds past expiry to keep rows (default OTP_RETENTION_SECONDS)')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Rows deleted per transaction')
+        parser.add_argument('--pause', type=float, default=0.05, help='Seconds to sleep between chunks')
+        parser.add_argument('--loop', action='store_true', help='Keep running instead of exiting after one pass')
+        parser.add_argument('--interval', type=float, default=300, help='Seconds between passes with --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            deleted = EmailOTP.purge_expired(
+                older_than_seconds=options['older_than'],
+                chunk_size=options['chunk_size'],
+                pause=options['pause']
+            )
+            if deleted or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(f'Purged {deleted} expired OTP(s)'))
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
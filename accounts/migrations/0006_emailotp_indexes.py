@@ -0,0 +1,21 @@
+# Generated by Django 6.0 on 2026-10-17 01:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_outboundemail'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='emailotp',
+            index=models.Index(fields=['email', 'used', 'code'], name='emailotp_lookup_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='emailotp',
+            index=models.Index(fields=['expires_at'], name='emailotp_expires_idx'),
+        ),
+    ]
@@ -5,6 +5,8 @@ from django.utils import timezone
 from datetime import timedelta
 from django.conf import settings
 import random
+import time
+import uuid
 
 class User(AbstractUser):
     """
@@ -46,6 +48,13 @@ class EmailOTP(models.Model):
     used = models.BooleanField(default=False)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name="otps")
 
+    class Meta:
+        indexes = [
+            # Serves invalidation (email, used) and verification (email, used, code) lookups
+            models.Index(fields=["email", "used", "code"], name="emailotp_lookup_idx"),
+            models.Index(fields=["expires_at"], name="emailotp_expires_idx"),
+        ]
+
     @classmethod
     def create_otp(cls, email, user=None, length=6, expiry_seconds=None):
         if expiry_seconds is None:
@@ -54,9 +63,67 @@ class EmailOTP(models.Model):
         expires_at = timezone.now() + timedelta(seconds=expiry_seconds)
         return cls.objects.create(email=email, code=code, expires_at=expires_at, user=user)
 
+    @classmethod
+    def purge_expired(cls, older_than_seconds=None, chunk_size=1000, pause=0.0):
+        """
+        Delete OTPs that expired more than `older_than_seconds` ago, in small
+        chunks so each DELETE commits quickly and never holds long locks.
+        Returns the number of rows deleted.
+        """
+        if older_than_seconds is None:
+            older_than_seconds = getattr(settings, "OTP_RETENTION_SECONDS", 86400)
+        cutoff = timezone.now() - timedelta(seconds=older_than_seconds)
+        deleted = 0
+        while True:
+            ids = list(cls.objects.filter(expires_at__lt=cutoff).values_list("id", flat=True)[:chunk_size])
+            if not ids:
+                return deleted
+            deleted += cls.objects.filter(id__in=ids).delete()[0]
+            if pause:
+                time.sleep(pause)
+
     def is_valid(self):
         return (not self.used) and (timezone.now() <= self.expires_at)
 
     def mark_used(self):
         self.used = True
         self.save()
+
+
+class OutboundEmail(models.Model):
+    """
+    Persistent outbox for mail sent by the system (OTP codes, account notices).
+    Rows are delivered by a bounded pool of workers and retried with backoff.
+    """
+    STATUS_PENDING = "pending"
+    STATUS_SENDING = "sending"
+    STATUS_SENT = "sent"
+    STATUS_FAILED = "failed"
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_SENDING, "Sending"),
+        (STATUS_SENT, "Sent"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=32, default="notification")
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    sensitive = models.BooleanField(default=False)  # body is wiped once the message is settled
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"], name="outbox_status_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} to {self.to_email} ({self.status})"
@@ -0,0 +1,297 @@
+"""
+Mail outbox for E-Voting System
+Queues outbound mail in the OutboundEmail table and delivers it from a
+bounded pool of worker threads, retrying failures with exponential backoff.
+
+Requests only pay for one INSERT; SMTP latency is absorbed by the workers,
+which send over long-lived pooled connections (see mail_connection.py).
+Failed attempts are not held in memory: the row records next_attempt_at,
+and one scheduler thread per process hands due retries back to the pool.
+Rows that cannot be handed to the pool (pool saturated, process restarted)
+stay pending and are picked up by `manage.py process_outbox`.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from datetime import timedelta
+from .models import OutboundEmail
+from .mail_connection import PooledMailConnection
+import os
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class MailOutbox:
+    """Service class to enqueue and deliver outbound mail"""
+
+    DEFAULT_WORKERS = 4
+    DEFAULT_QUEUE_SIZE = 1000
+    MAX_ATTEMPTS = 5
+    BACKOFF_BASE = 2  # seconds, doubled after every failed attempt
+    LEASE = 60  # seconds a claimed row is reserved for its worker
+    RETRY_POLL = 1  # seconds between the retry scheduler's sweeps
+
+    _executor = None
+    _slots = None
+    _pid = None
+    _scheduler_pid = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def enqueue(cls, to_email: str, subject: str, body: str, kind: str = 'notification',
+                sensitive: bool = False) -> OutboundEmail:
+        """
+        Store a message in the outbox and schedule its delivery.
+
+        Args:
+            to_email: Recipient address
+            subject: Message subject
+            body: Plain-text body
+            kind: Short label for reporting, e.g. 'otp' or 'welcome'
+            sensitive: Wipe the body once the message is sent or given up on
+
+        Returns:
+            OutboundEmail: The queued message
+        """
+        message = OutboundEmail.objects.create(
+            kind=kind,
+            to_email=to_email,
+            subject=subject,
+            body=body,
+            sensitive=sensitive
+        )
+
+        if cls._worker_count() == 0:
+            # Inline delivery (development and tests)
+            cls.deliver(message.id)
+        else:
+            transaction.on_commit(lambda: cls.submit(message.id))
+        return message
+
+    @classmethod
+    def enqueue_failed(cls, messages: list, errors: list, kind: str = 'notification') -> int:
+        """
+        Store messages whose first send already failed, due for their first
+        retry, with one INSERT and no per-message scheduling.
+
+        Args:
+            messages: EmailMessage objects that could not be sent
+            errors: Error text for each message
+            kind: Short label for reporting
+
+        Returns:
+            int: Number of messages queued
+        """
+        retry_at = timezone.now() + timedelta(seconds=cls.BACKOFF_BASE)
+        OutboundEmail.objects.bulk_create([
+            OutboundEmail(
+                kind=kind,
+                to_email=message.to[0],
+                subject=message.subject,
+                body=message.body,
+                attempts=1,
+                next_attempt_at=retry_at,
+                last_error=error
+            )
+            for message, error in zip(messages, errors)
+        ], batch_size=500)
+        if messages:
+            cls.schedule_retries()
+        return len(messages)
+
+    @classmethod
+    def submit(cls, message_id) -> bool:
+        """
+        Hand a message to the worker pool.
+
+        Returns:
+            bool: False if the pool is saturated; the row stays pending for the sweeper
+        """
+        executor, slots = cls._get_pool()
+        if not slots.acquire(blocking=False):
+            logger.warning(f"Mail outbox saturated, leaving {message_id} for the sweeper")
+            return False
+
+        def run():
+            try:
+                cls.deliver(message_id)
+            finally:
+                slots.release()
+                close_old_connections()
+
+        executor.submit(run)
+        return True
+
+    @classmethod
+    def deliver(cls, message_id) -> bool:
+        """
+        Claim and send one message, recording the outcome.
+
+        Returns:
+            bool: True if the message was sent by this call
+        """
+        return cls._send_claimed(cls._claim([message_id])) == 1
+
+    @classmethod
+    def _claim(cls, message_ids) -> list:
+        """
+        Reserve due messages for this worker with one conditional UPDATE.
+        The lease timestamp doubles as the claim token.
+        """
+        now = timezone.now()
+        lease_until = now + timedelta(seconds=cls.LEASE)
+        OutboundEmail.objects.filter(
+            id__in=message_ids,
+            status__in=[OutboundEmail.STATUS_PENDING, OutboundEmail.STATUS_SENDING],
+            next_attempt_at__lte=now
+        ).update(
+            status=OutboundEmail.STATUS_SENDING,
+            attempts=F('attempts') + 1,
+            next_attempt_at=lease_until
+        )
+        return list(OutboundEmail.objects.filter(
+            id__in=message_ids,
+            status=OutboundEmail.STATUS_SENDING,
+            next_attempt_at=lease_until
+        ))
+
+    @classmethod
+    def _send_claimed(cls, messages: list) -> int:
+        """Send claimed messages over this thread's pooled connection."""
+        if not messages:
+            return 0
+
+        from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@kuravote.com')
+        errors = PooledMailConnection.send_batch([
+            EmailMessage(subject=m.subject, body=m.body, from_email=from_email, to=[m.to_email])
+            for m in messages
+        ])
+
+        sent_ids = [m.id for m, error in zip(messages, errors) if error is None]
+        if sent_ids:
+            OutboundEmail.objects.filter(id__in=sent_ids).update(
+                status=OutboundEmail.STATUS_SENT,
+                sent_at=timezone.now(),
+                last_error=''
+            )
+            OutboundEmail.objects.filter(id__in=sent_ids, sensitive=True).update(body='')
+            logger.info(f"Delivered {len(sent_ids)} queued message(s)")
+
+        for message, error in zip(messages, errors):
+            if error is not None:
+                cls._record_failure(message, error)
+
+        return len(sent_ids)
+
+    @classmethod
+    def _record_failure(cls, message: OutboundEmail, error: str):
+        max_attempts = getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', cls.MAX_ATTEMPTS)
+        message.last_error = error
+        update_fields = ['status', 'last_error', 'next_attempt_at']
+
+        if message.attempts >= max_attempts:
+            message.status = OutboundEmail.STATUS_FAILED
+            if message.sensitive:
+                message.body = ''
+                update_fields.append('body')
+            logger.error(f"Giving up on mail {message.id} to {message.to_email}: {error}")
+        else:
+            delay = cls.BACKOFF_BASE * 2 ** (message.attempts - 1)
+            message.status = OutboundEmail.STATUS_PENDING
+            message.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+            logger.warning(f"Mail {message.id} attempt {message.attempts} failed, retrying in {delay}s: {error}")
+
+        message.save(update_fields=update_fields)
+        if message.status == OutboundEmail.STATUS_PENDING:
+            cls.schedule_retries()
+
+    @classmethod
+    def schedule_retries(cls):
+        """
+        Make sure this process's retry scheduler is running. The scheduler
+        stops by itself once no retries are pending. Call after saving the
+        rows to retry. Without workers, retries are left to process_outbox.
+        """
+        if cls._worker_count() == 0:
+            return
+        with cls._lock:
+            if cls._scheduler_pid == os.getpid():
+                return
+            cls._scheduler_pid = os.getpid()
+        threading.Thread(target=cls._run_scheduler, name='mail-outbox-retry', daemon=True).start()
+
+    @classmethod
+    def _run_scheduler(cls):
+        retries = OutboundEmail.objects.filter(status=OutboundEmail.STATUS_PENDING, attempts__gt=0)
+        try:
+            while True:
+                time.sleep(cls.RETRY_POLL)
+                due = retries.filter(next_attempt_at__lte=timezone.now()).order_by('next_attempt_at')
+                for message_id in due.values_list('id', flat=True)[:cls.DEFAULT_QUEUE_SIZE]:
+                    if not cls.submit(message_id):
+                        break
+                with cls._lock:
+                    # Checked under the lock so a failure saved meanwhile restarts us
+                    if not retries.exists():
+                        cls._scheduler_pid = None
+                        return
+        except Exception:
+            with cls._lock:
+                cls._scheduler_pid = None
+            logger.exception("Mail outbox retry scheduler stopped")
+        finally:
+            close_old_connections()
+
+    @classmethod
+    def process_due(cls, limit: int = 500, batch_size: int = 50) -> int:
+        """
+        Deliver pending messages that are due, including ones whose worker
+        lease expired, in batches sharing one mail connection.
+        Used by the process_outbox command.
+
+        Returns:
+            int: Number of messages sent
+        """
+        due = list(OutboundEmail.objects.filter(
+            status__in=[OutboundEmail.STATUS_PENDING, OutboundEmail.STATUS_SENDING],
+            next_attempt_at__lte=timezone.now()
+        ).order_by('next_attempt_at').values_list('id', flat=True)[:limit])
+
+        sent = 0
+        for start in range(0, len(due), batch_size):
+            sent += cls._send_claimed(cls._claim(due[start:start + batch_size]))
+        return sent
+
+    @classmethod
+    def get_status(cls, message_id) -> dict:
+        """
+        Returns:
+            dict: {'status', 'attempts', 'sent_at'} or None if unknown
+        """
+        return OutboundEmail.objects.filter(id=message_id).values('status', 'attempts', 'sent_at').first()
+
+    @classmethod
+    def _worker_count(cls) -> int:
+        return getattr(settings, 'EMAIL_OUTBOX_WORKERS', cls.DEFAULT_WORKERS)
+
+    @classmethod
+    def _get_pool(cls):
+        # One pool per process; recreated after a fork
+        if cls._pid != os.getpid():
+            with cls._lock:
+                if cls._pid != os.getpid():
+                    cls._executor = ThreadPoolExecutor(
+                        max_workers=cls._worker_count(),
+                        thread_name_prefix='mail-outbox'
+                    )
+                    cls._slots = threading.BoundedSemaphore(
+                        getattr(settings, 'EMAIL_OUTBOX_QUEUE_SIZE', cls.DEFAULT_QUEUE_SIZE)
+                    )
+                    cls._pid = os.getpid()
+        return cls._executor, cls._slots
@@ -1,5 +1,9 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.contrib.auth.password_validation import validate_password
+from django.contrib.auth.tokens import default_token_generator
+from django.utils.encoding import force_str
+from django.utils.http import urlsafe_base64_decode
 
 User = get_user_model()
 
@@ -29,3 +33,22 @@ class RegisterSerializer(serializers.ModelSerializer):
 class LoginSerializer(serializers.Serializer):
     email = serializers.EmailField()
     password = serializers.CharField(write_only=True)
+
+
+class SetPasswordSerializer(serializers.Serializer):
+    """Checks a set-password link (uid + token) and the new password."""
+    uid = serializers.CharField()
+    token = serializers.CharField()
+    password = serializers.CharField(write_only=True)
+
+    def validate(self, attrs):
+        try:
+            user = User.objects.get(pk=force_str(urlsafe_base64_decode(attrs['uid'])))
+        except (User.DoesNotExist, ValueError, TypeError):
+            user = None
+        if user is None or not default_token_generator.check_token(user, attrs['token']):
+            raise serializers.ValidationError('This link is invalid or has expired')
+        validate_password(attrs['password'], user)
+        attrs['user'] = user
+        return attrs
+
@@ -2,7 +2,21 @@ from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 from django.contrib.auth import get_user_model
+from rest_framework.authtoken.models import Token
+from election.testing import QueryBudgetMixin
 from .models import EmailOTP
+from .fake_smtp import FakeSMTPServer
+from .mail_connection import PooledMailConnection
+from django.contrib.auth.tokens import default_token_generator
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from datetime import timedelta
+from urllib.parse import parse_qs, urlparse
+import re
 
 User = get_user_model()
 
@@ -65,3 +79,101 @@ class AccountsAPITests(APITestCase):
 		self.assertEqual(resp.status_code, status.HTTP_200_OK)
 		self.assertIn('token', resp.data)
 
+
+
+class AccountsQueryBudgetTests(QueryBudgetMixin, APITestCase):
+	"""Query budgets for the accounts/urls.py views."""
+
+	def setUp(self):
+		self.user = User.objects.create_user(username='budget', email='budget@example.com', password='pw12345')
+
+	def test_register_budget(self):
+		data = {'username': 'newuser', 'email': 'new@example.com', 'password': 'strongpassword', 'role': 'VOTER'}
+		self.assertQueryBudget(reverse('register'), 6, method='post', data=data, status_code=status.HTTP_201_CREATED)
+
+	def test_login_budget(self):
+		data = {'email': 'budget@example.com', 'password': 'pw12345'}
+		self.assertQueryBudget(reverse('login'), 5, method='post', data=data, status_code=status.HTTP_200_OK)
+
+	def test_user_detail_and_logout_budget(self):
+		token = Token.objects.create(user=self.user)
+		self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+		self.assertQueryBudget(reverse('user-detail'), 1, status_code=status.HTTP_200_OK)
+		self.assertQueryBudget(reverse('logout'), 2, method='post', status_code=status.HTTP_200_OK)
+
+	def test_set_password_budget(self):
+		data = {
+			'uid': urlsafe_base64_encode(force_bytes(self.user.pk)),
+			'token': default_token_generator.make_token(self.user),
+			'password': 'a-new-Passw0rd',
+		}
+		self.assertQueryBudget(reverse('set-password'), 2, method='post', data=data, status_code=status.HTTP_200_OK)
+
+
+class PooledMailConnectionTests(SimpleTestCase):
+	def setUp(self):
+		self.server = FakeSMTPServer().start()
+		self.settings_override = override_settings(
+			EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+			EMAIL_HOST='127.0.0.1', EMAIL_PORT=self.server.port,
+			EMAIL_USE_TLS=False, EMAIL_HOST_USER='', EMAIL_HOST_PASSWORD='',
+		)
+		self.settings_override.enable()
+
+	def tearDown(self):
+		PooledMailConnection.reset()
+		self.settings_override.disable()
+		self.server.stop()
+
+	def message(self, n):
+		return EmailMessage(f'Subject {n}', 'Body', 'noreply@kuravote.com', [f'to{n}@example.com'])
+
+	def test_messages_share_one_connection(self):
+		errors = PooledMailConnection.send_batch([self.message(n) for n in range(5)])
+		self.assertEqual(errors, [None] * 5)
+		self.assertEqual(self.server.messages, 5)
+		self.assertEqual(self.server.connections, 1)
+
+	@override_settings(EMAIL_CONNECTION_CHECK_AFTER=0)
+	def test_idle_connection_is_health_checked_and_replaced(self):
+		PooledMailConnection.send(self.message(1))
+		PooledMailConnection._local.connection.connection.close()  # server dropped us
+		PooledMailConnection.send(self.message(2))
+		self.assertEqual(self.server.messages, 2)
+		self.assertEqual(self.server.connections, 2)
+
+
+class EmailOTPPurgeTests(TestCase):
+	def test_purge_removes_only_rows_past_retention_in_chunks(self):
+		now = timezone.now()
+		EmailOTP.objects.bulk_create(
+			[EmailOTP(email=f'old{n}@example.com', code='1234', expires_at=now - timedelta(days=2)) for n in range(5)]
+			+ [EmailOTP(email='recent@example.com', code='1234', expires_at=now - timedelta(minutes=5))]
+		)
+		live = EmailOTP.create_otp(email='live@example.com', expiry_seconds=300)
+
+		with self.assertNumQueries(7):  # 3 chunks x (select ids + delete) + final empty select
+			deleted = EmailOTP.purge_expired(older_than_seconds=86400, chunk_size=2)
+		self.assertEqual(deleted, 5)
+		self.assertEqual(
+			set(EmailOTP.objects.values_list('email', flat=True)), {'recent@example.com', live.email}
+		)
+
+
+@override_settings(EMAIL_OUTBOX_WORKERS=0)
+class WelcomeEmailTests(APITestCase):
+	def test_officer_welcome_email_has_a_set_password_link_not_the_password(self):
+		data = {
+			'username': 'officer', 'email': 'officer@example.com', 'password': 'Initial-pass-123',
+			'role': 'PRESIDING_OFFICER',
+		}
+		self.assertEqual(self.client.post(reverse('register'), data, format='json').status_code, 201)
+		body = mail.outbox[-1].body
+		self.assertNotIn('Initial-pass-123', body)
+
+		query = parse_qs(urlparse(re.search(r'https?://\S+/set-password\S+', body).group()).query)
+		payload = {'uid': query['uid'][0], 'token': query['token'][0], 'password': 'Chosen-pass-456'}
+		self.assertEqual(self.client.post(reverse('set-password'), payload, format='json').status_code, 200)
+		self.assertTrue(User.objects.get(email='officer@example.com').check_password('Chosen-pass-456'))
+		# The link is spent once the password has changed
+		self.assertEqual(self.client.post(reverse('set-password'), payload, format='json').status_code, 400)
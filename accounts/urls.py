@@ -1,10 +1,11 @@
 # accounts/urls.py
 from django.urls import path
-from .views import RegisterView, LoginView, LogoutView, UserDetailView
+from .views import RegisterView, LoginView, LogoutView, UserDetailView, SetPasswordView
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('login/', LoginView.as_view(), name='login'),
     path('logout/', LogoutView.as_view(), name='logout'),
+    path('set-password/', SetPasswordView.as_view(), name='set-password'),
     path('user/', UserDetailView.as_view(), name='user-detail'),
 ]
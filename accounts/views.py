@@ -95,10 +95,13 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.authtoken.models import Token
-from django.core.mail import send_mail
-from django.conf import settings
 from django.contrib.auth import authenticate
-from .serializers import UserSerializer, LoginSerializer, RegisterSerializer
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from .serializers import UserSerializer, LoginSerializer, RegisterSerializer, SetPasswordSerializer
+from .outbox import MailOutbox
 
 class RegisterView(APIView):
     permission_classes = [AllowAny]
@@ -106,45 +109,39 @@ class RegisterView(APIView):
     def post(self, request):
         serializer = RegisterSerializer(data=request.data)
         if serializer.is_valid():
-            # Capture plain password before hashing
-            plain_password = request.data.get('password', '')
             user = serializer.save()
             
-            # Send welcome email to returning officers (async, non-blocking)
+            # Queue welcome email to returning officers (delivered by the outbox workers).
+            # It carries a one-time set-password link, never the password itself.
             if user.role == 'PRESIDING_OFFICER':
-                import threading
-                def send_email_async():
-                    try:
-                        email_body = f"""Hello {user.first_name or user.username},
+                uid = urlsafe_base64_encode(force_bytes(user.pk))
+                link = f"{settings.FRONTEND_URL}/set-password?uid={uid}&token={default_token_generator.make_token(user)}"
+                email_body = f"""Hello {user.first_name or user.username},
 
 Welcome to KuraVote!
 
 Your account as a Returning Officer has been successfully created.
 
-Login Credentials:
 Email: {user.email}
-Password: {plain_password}
-
 Role: Returning Officer
 
-You can now log in to the system at https://e-voting-frontend-tl80.onrender.com to manage elections and monitor voting activities.
+To choose your password, open this link (it works once):
+{link}
 
-Please change your password after your first login for security.
+You can then log in to the system at {settings.FRONTEND_URL} to manage elections and monitor voting activities.
 
 Thank you,
 KuraVote Team"""
-                    
-                        send_mail(
-                            subject='Welcome to KuraVote - Returning Officer Account Created',
-                            message=email_body,
-                            from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@kuravote.com'),
-                            recipient_list=[user.email],
-                            fail_silently=True
-                        )
-                    except Exception:
-                        pass  # Don't fail registration if email fails
-                # Send email in background thread to avoid blocking
-                threading.Thread(target=send_email_async, daemon=True).start()
+                try:
+                    MailOutbox.enqueue(
+                        to_email=user.email,
+                        subject='Welcome to KuraVote - Returning Officer Account Created',
+                        body=email_body,
+                        kind='welcome',
+                        sensitive=True
+                    )
+                except Exception:
+                    pass  # Don't fail registration if email fails
             
             token, created = Token.objects.get_or_create(user=user)
             return Response({
@@ -178,6 +175,18 @@ class LoginView(APIView):
             )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class SetPasswordView(APIView):
+    permission_classes = [AllowAny]
+    
+    def post(self, request):
+        serializer = SetPasswordSerializer(data=request.data)
+        if serializer.is_valid():
+            user = serializer.validated_data['user']
+            user.set_password(serializer.validated_data['password'])
+            user.save(update_fields=['password'])
+            return Response({'message': 'Password set successfully'})
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
 class LogoutView(APIView):
     permission_classes = [IsAuthenticated]
     
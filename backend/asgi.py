@@ -3,6 +3,10 @@ ASGI config for backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The live turnout/results stream (/api/elections/<id>/stream/) holds its
+connection open, so it is only served when the project runs under an ASGI
+server pointed at this module; WSGI workers answer it with 503.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 """
@@ -0,0 +1,149 @@
+"""
+Per-endpoint request metrics for the E-Voting backend.
+
+MetricsMiddleware records, for every request, its latency, the number of SQL
+queries it ran and the time spent in them, labelled by URL name (for example
+``voting-cast`` or ``election-list``), HTTP method and status code. The
+numbers are aggregated in-process (one registry per worker) and exposed in
+the Prometheus text format by ``metrics_view``.
+"""
+from bisect import bisect_left
+from django.conf import settings
+from django.db import connection
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+import threading
+import time
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name, labels):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f'{name}_sum{{{labels}}} {self.sum}')
+        lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return lines
+
+
+class MetricsRegistry:
+    """Thread-safe in-process store of request metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, view, method, status, duration, queries, sql_seconds):
+        key = (view, method, status)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {
+                    'latency': Histogram(LATENCY_BUCKETS),
+                    'queries': Histogram(QUERY_BUCKETS),
+                    'sql_seconds': 0.0,
+                }
+            series['latency'].observe(duration)
+            series['queries'].observe(queries)
+            series['sql_seconds'] += sql_seconds
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> str:
+        with self._lock:
+            items = sorted(self._series.items())
+            latency, queries, sql_time = [], [], []
+            for (view, method, status), series in items:
+                labels = f'view="{view}",method="{method}",status="{status}"'
+                latency += series['latency'].render('http_request_duration_seconds', labels)
+                queries += series['queries'].render('http_request_sql_queries', labels)
+                sql_time.append(f'http_request_sql_seconds_total{{{labels}}} {series["sql_seconds"]}')
+
+        return '\n'.join([
+            '# HELP http_request_duration_seconds Request latency by view, method and status.',
+            '# TYPE http_request_duration_seconds histogram',
+            *latency,
+            '# HELP http_request_sql_queries SQL queries per request by view, method and status.',
+            '# TYPE http_request_sql_queries histogram',
+            *queries,
+            '# HELP http_request_sql_seconds_total Time spent in SQL by view, method and status.',
+            '# TYPE http_request_sql_seconds_total counter',
+            *sql_time,
+        ]) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+class QueryTimer:
+    """connection.execute_wrapper hook counting and timing SQL statements."""
+
+    __slots__ = ('count', 'seconds')
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            return self.get_response(request)
+
+        timer = QueryTimer()
+        started = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unmatched'
+        registry.observe(view, request.method, response.status_code, duration, timer.count, timer.seconds)
+        return response
+
+
+def metrics_view(request):
+    """
+    Expose this worker's metrics in the Prometheus text format.
+    Fails closed: without METRICS_TOKEN the endpoint only exists with DEBUG on.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if not token:
+        if not settings.DEBUG:
+            raise Http404
+    elif request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponseForbidden('Forbidden')
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
 from pathlib import Path
+from corsheaders.defaults import default_headers
 from dotenv import load_dotenv
 import os
 import pymysql 
@@ -63,6 +64,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'backend.metrics.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -116,8 +118,15 @@ CORS_ALLOWED_ORIGINS = [
 ]
 
 
+# Public address of the frontend, used for links in emails (e.g. set-password)
+FRONTEND_URL = os.environ.get('FRONTEND_URL', 'https://e-voting-frontend-tl80.onrender.com').rstrip('/')
+
 CORS_ALLOW_CREDENTIALS = True
 
+# Let the frontend send retry keys and see when a response was replayed
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+CORS_EXPOSE_HEADERS = ['Idempotent-Replayed']
+
 
 
 # Password validation
@@ -164,6 +173,12 @@ EMAIL_PORT = int(os.environ.get('EMAIL_PORT', '587'))
 EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'True') == 'True'
 EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+EMAIL_TIMEOUT = int(os.environ.get('EMAIL_TIMEOUT', '10'))  # SMTP socket timeout, seconds
+
+# Pooled mail connections (accounts/mail_connection.py): recycle a connection after
+# EMAIL_CONNECTION_MAX_AGE seconds, NOOP-check it after EMAIL_CONNECTION_CHECK_AFTER idle seconds
+EMAIL_CONNECTION_MAX_AGE = int(os.environ.get('EMAIL_CONNECTION_MAX_AGE', '300'))
+EMAIL_CONNECTION_CHECK_AFTER = int(os.environ.get('EMAIL_CONNECTION_CHECK_AFTER', '30'))
 
 # For production with Gmail (uncomment and configure):
 # EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
@@ -176,6 +191,95 @@ EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = 'noreply@kuravote.com'
 OTP_EXPIRY_SECONDS = 600  # 10 minutes
 
+# Where voting OTPs live: 'cache' (no table writes, TTL expiry) or 'database' (EmailOTP rows).
+# The cache store needs a cache shared by all workers, so it is the default only when
+# CACHE_BACKEND points at one; OTP_CACHE_ALIAS picks the CACHES entry it uses.
+OTP_STORE = os.environ.get('OTP_STORE', 'cache' if os.environ.get('CACHE_BACKEND') else 'database')
+OTP_CACHE_ALIAS = os.environ.get('OTP_CACHE_ALIAS', 'default')
+# Per-election Bloom filter of registration numbers (election/membership.py), shared through
+# the cache, that turns away unknown registration numbers without a query. Its invalidations
+# must reach every worker, so like the cache OTP store it is on by default only when
+# CACHE_BACKEND points at a shared cache. VOTER_INDEX_TTL bounds how long a filter that
+# missed an invalidation can be served.
+VOTER_INDEX_ENABLED = os.environ.get('VOTER_INDEX_ENABLED', 'True' if os.environ.get('CACHE_BACKEND') else 'False') == 'True'
+VOTER_INDEX_TTL = int(os.environ.get('VOTER_INDEX_TTL', '300'))
+VOTER_INDEX_ERROR_RATE = float(os.environ.get('VOTER_INDEX_ERROR_RATE', '0.01'))
+
+# Seconds a ballot token issued by verify_otp stays valid for cast
+BALLOT_TOKEN_TTL = int(os.environ.get('BALLOT_TOKEN_TTL', '900'))
+# Expired EmailOTP rows are kept this many seconds for auditing, then removed by `purge_otps`
+OTP_RETENTION_SECONDS = int(os.environ.get('OTP_RETENTION_SECONDS', '86400'))
+
+# Mail outbox: delivery worker threads per process (0 = send inline), how many
+# messages may wait for a worker before the rest are left to `process_outbox`,
+# and how often a failing message is retried.
+EMAIL_OUTBOX_WORKERS = int(os.environ.get('EMAIL_OUTBOX_WORKERS', '4'))
+EMAIL_OUTBOX_QUEUE_SIZE = int(os.environ.get('EMAIL_OUTBOX_QUEUE_SIZE', '1000'))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.environ.get('EMAIL_OUTBOX_MAX_ATTEMPTS', '5'))
+
+# Voter roll imports (import_voters / voters/import_roll/): rows validated and inserted per transaction
+# by the bulk_create engine
+ROLL_IMPORT_CHUNK_SIZE = int(os.environ.get('ROLL_IMPORT_CHUNK_SIZE', '2000'))
+# 'auto' streams rolls with COPY on PostgreSQL and uses bulk_create elsewhere; 'copy'/'orm' force one
+ROLL_IMPORT_ENGINE = os.environ.get('ROLL_IMPORT_ENGINE', 'auto')
+ROLL_IMPORT_COPY_CHUNK_SIZE = int(os.environ.get('ROLL_IMPORT_COPY_CHUNK_SIZE', '50000'))
+
+# Voter roll export (voters/export/): rows fetched per round trip and written per streamed block
+ROLL_EXPORT_CHUNK_SIZE = int(os.environ.get('ROLL_EXPORT_CHUNK_SIZE', '5000'))
+
+# Voter mail campaigns (send_voter_mail / admin actions): roll chunk size per checkpoint,
+# parallel sender connections, and messages per second across all senders (0 = unlimited)
+MAIL_MERGE_CHUNK_SIZE = int(os.environ.get('MAIL_MERGE_CHUNK_SIZE', '1000'))
+MAIL_MERGE_SENDERS = int(os.environ.get('MAIL_MERGE_SENDERS', '4'))
+MAIL_MERGE_RATE = float(os.environ.get('MAIL_MERGE_RATE', '50'))
+
+# Cache used for results, rate limits and other shared hot data.
+# Point CACHE_BACKEND/CACHE_LOCATION at Redis or Memcached to share it between workers.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'kuravote'),
+    }
+}
+
+# Seconds election results are cached while polls are open (frozen once they close)
+RESULTS_LIVE_TTL = int(os.environ.get('RESULTS_LIVE_TTL', '5'))
+
+# Upper bound in seconds on how long a cached ballot (elections/<id>/ballot/) is kept. Model
+# signals invalidate it at once, but only in caches they can reach: with the per-process
+# default cache another worker's edit is seen only after this TTL, so it is kept to seconds
+# unless CACHE_BACKEND points at a cache shared by all workers.
+BALLOT_CACHE_TTL = int(os.environ.get('BALLOT_CACHE_TTL', '3600' if os.environ.get('CACHE_BACKEND') else '5'))
+
+# Live stream: seconds between turnout/tally polls, and between keep-alive comments
+LIVE_STREAM_INTERVAL = float(os.environ.get('LIVE_STREAM_INTERVAL', '2'))
+LIVE_STREAM_HEARTBEAT = float(os.environ.get('LIVE_STREAM_HEARTBEAT', '15'))
+
+# Vote ingestion: 'direct' commits every ballot on its own; 'group' batches ballots
+# into shared transactions of up to GROUP_COMMIT_MAX_BATCH ballots or every
+# GROUP_COMMIT_INTERVAL_MS milliseconds. Requests still wait for their commit.
+VOTE_INGESTION_MODE = os.environ.get('VOTE_INGESTION_MODE', 'direct')
+GROUP_COMMIT_MAX_BATCH = int(os.environ.get('GROUP_COMMIT_MAX_BATCH', '200'))
+GROUP_COMMIT_INTERVAL_MS = int(os.environ.get('GROUP_COMMIT_INTERVAL_MS', '20'))
+GROUP_COMMIT_ACK_TIMEOUT = float(os.environ.get('GROUP_COMMIT_ACK_TIMEOUT', '10'))
+
+# Seconds a response is kept for replay to retries carrying the same Idempotency-Key.
+# Responses live in the default cache, so retries only replay across workers when
+# CACHE_BACKEND points at a shared cache.
+IDEMPOTENCY_TTL = int(os.environ.get('IDEMPOTENCY_TTL', '3600'))
+
+# Per-endpoint latency/query metrics served at /metrics (Prometheus text format).
+# Scrapers must send "Authorization: Bearer <METRICS_TOKEN>"; with no token set the endpoint
+# answers 404 unless DEBUG is on.
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True') == 'True'
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Number of counter rows per candidate; more shards = less row-lock contention on cast
+TALLY_SHARDS = int(os.environ.get('TALLY_SHARDS', '8'))
+
+# Counter rows per election minute in the turnout rollup (election/turnout_service.py)
+TURNOUT_SHARDS = int(os.environ.get('TURNOUT_SHARDS', '8'))
+
 
 #authentication model 
 AUTH_USER_MODEL = 'accounts.User'
@@ -190,7 +294,27 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
     ),
+    # Keyset pagination for every list endpoint (election/pagination.py)
+    "DEFAULT_PAGINATION_CLASS": "election.pagination.IdCursorPagination",
+    "PAGE_SIZE": int(os.environ.get('API_PAGE_SIZE', '50')),
+    # Reverse proxies in front of the app whose X-Forwarded-For entries are trusted for client
+    # IPs (throttling). 0 = use REMOTE_ADDR only, so clients cannot pick their own IP
+    "NUM_PROXIES": int(os.environ.get('NUM_PROXIES', '0')),
+}
+
+# Largest ?page_size= a client may ask for on list endpoints
+API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', '500'))
+
+# Throttling of the voting endpoints (election/throttling.py), per action and per
+# client IP / registration number / election. Keep the IP limits generous: a whole
+# polling station or campus can share one address.
+VOTING_THROTTLE_ENABLED = os.environ.get('VOTING_THROTTLE_ENABLED', 'True') == 'True'
+VOTING_THROTTLE_RATES = {
+    'request_otp': {'ip': '300/min', 'reg_no': '5/min', 'election': '6000/min'},
+    'verify_otp': {'ip': '600/min', 'reg_no': '10/min', 'election': '12000/min'},
+    'cast': {'ip': '600/min', 'reg_no': '5/min', 'election': '12000/min'},
 }
+
 # Custom authentication backend
 AUTHENTICATION_BACKENDS = [
     'accounts.auth_backend.EmailBackend',
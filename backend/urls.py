@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.urls import path, include
 from django.http import JsonResponse
+from .metrics import metrics_view
 
 def api_root(request):
     return JsonResponse({
@@ -13,13 +14,15 @@ def api_root(request):
             "positions": "/api/positions/",
             "voters": "/api/voters/",
             "candidates": "/api/candidates/",
-            "voting": "/api/voting/"
+            "voting": "/api/voting/",
+            "metrics": "/metrics"
         }
     })
 
 urlpatterns = [
     path('', api_root, name='api-root'),
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
     path('api/auth/', include('accounts.urls')),
     path('api/', include('election.urls')),
 ]
@@ -1,10 +1,26 @@
 from django.contrib import admin
-from .models import Election, Position, Voter, Candidate, Vote, AuditLog
+from .models import Election, Position, Voter, Candidate, Vote, AuditLog, CandidateTally, MailCampaign, TurnoutBucket
+from .mail_merge import MailMergeService
 
 @admin.register(Election)
 class ElectionAdmin(admin.ModelAdmin):
     list_display = ['title', 'nomination_start_date', 'nomination_end_date', 'election_start_date', 'election_end_date']
     search_fields = ['title', 'description']
+    actions = ['send_invitations', 'send_reminders']
+
+    def _start_campaigns(self, request, queryset, kind):
+        for election in queryset:
+            campaign = MailMergeService.create_campaign(election, kind, user=request.user)
+            MailMergeService.start_in_background(campaign.id)
+        self.message_user(request, f"Started {queryset.count()} mail campaign(s); follow their progress under Mail campaigns.")
+
+    @admin.action(description='Email invitations to every voter')
+    def send_invitations(self, request, queryset):
+        self._start_campaigns(request, queryset, MailCampaign.KIND_INVITATION)
+
+    @admin.action(description='Email reminders to voters who have not voted')
+    def send_reminders(self, request, queryset):
+        self._start_campaigns(request, queryset, MailCampaign.KIND_REMINDER)
 
 @admin.register(Position)
 class PositionAdmin(admin.ModelAdmin):
@@ -36,3 +52,28 @@ class AuditLogAdmin(admin.ModelAdmin):
     list_filter = ['action', 'election', 'timestamp']
     search_fields = ['voter_reg_no', 'details', 'user__username']
     readonly_fields = ['timestamp']
+
+@admin.register(CandidateTally)
+class CandidateTallyAdmin(admin.ModelAdmin):
+    list_display = ['candidate', 'position', 'election', 'shard', 'votes']
+    list_filter = ['election']
+    readonly_fields = ['election', 'position', 'candidate', 'shard', 'votes']
+
+@admin.register(TurnoutBucket)
+class TurnoutBucketAdmin(admin.ModelAdmin):
+    list_display = ['election', 'bucket', 'shard', 'votes']
+    list_filter = ['election']
+    readonly_fields = ['election', 'bucket', 'shard', 'votes']
+
+@admin.register(MailCampaign)
+class MailCampaignAdmin(admin.ModelAdmin):
+    list_display = ['election', 'kind', 'status', 'sent', 'failed', 'last_voter_id', 'created_at', 'finished_at']
+    list_filter = ['status', 'kind', 'election']
+    readonly_fields = ['status', 'last_voter_id', 'sent', 'failed', 'last_error', 'heartbeat_at', 'finished_at']
+    actions = ['resume_campaigns']
+
+    @admin.action(description='Resume selected campaigns from their checkpoint')
+    def resume_campaigns(self, request, queryset):
+        for campaign in queryset.exclude(status=MailCampaign.STATUS_COMPLETED):
+            MailMergeService.start_in_background(campaign.id)
+        self.message_user(request, 'Resumed campaigns that were not completed.')
@@ -0,0 +1,98 @@
+"""
+Ballot paper for E-Voting System
+Builds an election's whole ballot (election, positions and approved
+candidates) in one prefetching pass and caches the serialized payload, so
+rendering a ballot on polling day is a cache read instead of N+2 requests.
+
+The cached payload carries the version it was built from. Saving or
+deleting an election, position or candidate bumps the version (see
+election/signals.py), and the next read rebuilds. A build that raced a
+write stores the old version, so it is never served as current.
+
+Invalidation only reaches workers that share the cache. Without a shared
+CACHE_BACKEND, BALLOT_CACHE_TTL defaults to a few seconds, which then bounds
+how long another worker's edit can go unseen.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Prefetch
+from .models import Candidate, Election, Position
+from .serializers import BallotSerializer
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BallotPaperService:
+    """Service class to build and cache election ballots"""
+
+    CACHE_TTL = 5  # upper bound on staleness when a change does not reach this cache
+
+    @classmethod
+    def _keys(cls, election_id):
+        prefix = f'election:{election_id}:ballot'
+        return f'{prefix}:version', prefix
+
+    @classmethod
+    def get_ballot(cls, election_id):
+        """
+        Return an election's ballot, from the cache when it is current.
+
+        Args:
+            election_id: Election ID
+
+        Returns:
+            dict or None: The ballot payload, or None if the election does not exist
+        """
+        version_key, ballot_key = cls._keys(election_id)
+        cached = cache.get_many([version_key, ballot_key])
+        version = cached.get(version_key)
+        stored = cached.get(ballot_key)
+        if version is not None and stored is not None and stored['version'] == version:
+            return stored['payload']
+
+        if version is None:
+            cache.add(version_key, uuid.uuid4().hex, timeout=None)
+            version = cache.get(version_key)
+
+        payload = cls.build(election_id)
+        if payload is not None:
+            ttl = getattr(settings, 'BALLOT_CACHE_TTL', cls.CACHE_TTL)
+            cache.set(ballot_key, {'version': version, 'payload': payload}, ttl)
+        return payload
+
+    @classmethod
+    def build(cls, election_id):
+        """
+        Serialize an election's ballot with three queries, whatever its size.
+
+        Returns:
+            dict or None: The ballot payload, or None if the election does not exist
+        """
+        approved = Candidate.objects.filter(status='approved').order_by('id')
+        positions = Position.objects.order_by('id').prefetch_related(
+            Prefetch('candidates', queryset=approved, to_attr='approved_candidates')
+        )
+        election = Election.objects.prefetch_related(
+            Prefetch('positions', queryset=positions)
+        ).filter(id=election_id).first()
+        if election is None:
+            return None
+
+        return BallotSerializer(election).data
+
+    @classmethod
+    def invalidate(cls, election_id):
+        """
+        Mark an election's cached ballot stale.
+        Called immediately and again once the transaction commits, so a
+        rebuild that raced the write cannot be served as current.
+        """
+        def bump():
+            version_key, _ = cls._keys(election_id)
+            cache.set(version_key, uuid.uuid4().hex, timeout=None)
+
+        bump()
+        transaction.on_commit(bump)
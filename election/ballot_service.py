@@ -0,0 +1,196 @@
+"""
+Ballot Service for E-Voting System
+Handles ballot validation and transactional vote recording
+"""
+from django.db import transaction
+from django.utils import timezone
+from .models import Voter, Vote, Candidate
+from collections import Counter
+from .tally_service import TallyService, MissingTallyRows
+from .turnout_service import TurnoutService
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BallotService:
+    """Service class to handle ballot validation and casting"""
+
+    @classmethod
+    def validate_ballot(cls, election_id, votes_data: dict) -> dict:
+        """
+        Validate a whole ballot with a single set-based candidate query.
+
+        Args:
+            election_id: The election the ballot belongs to
+            votes_data: Mapping of position_id -> candidate_id
+
+        Returns:
+            dict: {'valid': bool, 'error': str or None,
+                   'ballot': list of (position_id, candidate_id)}
+        """
+        ballot = []
+        for position_id, candidate_id in votes_data.items():
+            try:
+                ballot.append((int(position_id), int(candidate_id)))
+            except (TypeError, ValueError):
+                return {
+                    'valid': False,
+                    'error': f'Invalid candidate selection for position {position_id}',
+                    'ballot': []
+                }
+
+        # "1" and "01" name the same position; only one vote per position
+        counts = Counter(position_id for position_id, _ in ballot)
+        repeated = [position_id for position_id, n in counts.items() if n > 1]
+        if repeated:
+            return {
+                'valid': False,
+                'error': f'More than one selection for position {repeated[0]}',
+                'ballot': []
+            }
+
+        approved = set(
+            Candidate.objects.filter(
+                id__in=[candidate_id for _, candidate_id in ballot],
+                position__election_id=election_id,
+                status='approved'
+            ).values_list('position_id', 'id')
+        )
+
+        for position_id, candidate_id in ballot:
+            if (position_id, candidate_id) not in approved:
+                return {
+                    'valid': False,
+                    'error': f'Invalid candidate selection for position {position_id}',
+                    'ballot': []
+                }
+
+        return {'valid': True, 'error': None, 'ballot': ballot}
+
+    @classmethod
+    def cast_ballot(cls, voter_id: int, ballot: list, election_id: int = None) -> dict:
+        """
+        Record a validated ballot in one transaction.
+
+        The voter is flipped to has_voted with a conditional UPDATE, so a
+        concurrent second cast for the same voter matches no rows and is
+        rejected before any Vote row is written. Candidate tallies and the
+        turnout rollup are incremented in the same transaction.
+
+        Args:
+            voter_id: Primary key of the voter casting the ballot
+            ballot: Validated list of (position_id, candidate_id)
+            election_id: The voter's election (looked up if not given)
+
+        Returns:
+            dict: {'success': bool, 'error': str or None, 'votes_count': int}
+        """
+        if election_id is None:
+            election_id = Voter.objects.filter(id=voter_id).values_list('election_id', flat=True).first()
+
+        try:
+            return cls._record_ballot(voter_id, ballot, election_id)
+        except MissingTallyRows:
+            # First ballot for a candidate on this shard: create the rows and retry
+            TallyService.provision(candidate_id for _, candidate_id in ballot)
+            return cls._record_ballot(voter_id, ballot, election_id)
+
+    @classmethod
+    def _record_ballot(cls, voter_id: int, ballot: list, election_id: int) -> dict:
+        now = timezone.now()
+
+        with transaction.atomic():
+            updated = Voter.objects.filter(id=voter_id, has_voted=False).update(
+                has_voted=True,
+                voted_at=now
+            )
+            if not updated:
+                return {
+                    'success': False,
+                    'error': 'You have already voted in this election',
+                    'votes_count': 0
+                }
+
+            Vote.objects.bulk_create([
+                Vote(
+                    voter_id=voter_id,
+                    candidate_id=candidate_id,
+                    position_id=position_id,
+                    voted_at=now
+                )
+                for position_id, candidate_id in ballot
+            ])
+
+            TallyService.record_ballot(ballot)
+            TurnoutService.record({election_id: 1}, now)
+
+        return {'success': True, 'error': None, 'votes_count': len(ballot)}
+
+    @classmethod
+    def cast_batch(cls, items: list) -> list:
+        """
+        Record a group of validated ballots in one transaction (group commit).
+
+        Voters that have already voted, or that appear more than once in the
+        batch, are rejected exactly as cast_ballot() would reject them.
+
+        Args:
+            items: List of (voter_id, ballot)
+
+        Returns:
+            list: One cast_ballot()-style result dict per item, in order
+        """
+        try:
+            return cls._record_batch(items)
+        except MissingTallyRows:
+            TallyService.provision({
+                candidate_id for _, ballot in items for _, candidate_id in ballot
+            })
+            return cls._record_batch(items)
+
+    @classmethod
+    def _record_batch(cls, items: list) -> list:
+        now = timezone.now()
+
+        with transaction.atomic():
+            eligible = dict(
+                Voter.objects.select_for_update()
+                .filter(id__in={voter_id for voter_id, _ in items}, has_voted=False)
+                .values_list('id', 'election_id')
+            )
+
+            results = []
+            accepted = []
+            turnout = Counter()
+            for voter_id, ballot in items:
+                if voter_id in eligible:
+                    turnout[eligible.pop(voter_id)] += 1
+                    accepted.append((voter_id, ballot))
+                    results.append({'success': True, 'error': None, 'votes_count': len(ballot)})
+                else:
+                    results.append({
+                        'success': False,
+                        'error': 'You have already voted in this election',
+                        'votes_count': 0
+                    })
+
+            if accepted:
+                Voter.objects.filter(id__in=[voter_id for voter_id, _ in accepted]).update(
+                    has_voted=True,
+                    voted_at=now
+                )
+                Vote.objects.bulk_create([
+                    Vote(
+                        voter_id=voter_id,
+                        candidate_id=candidate_id,
+                        position_id=position_id,
+                        voted_at=now
+                    )
+                    for voter_id, ballot in accepted
+                    for position_id, candidate_id in ballot
+                ])
+                TallyService.record_ballots([ballot for _, ballot in accepted])
+                TurnoutService.record(turnout, now)
+
+        return results
@@ -0,0 +1,61 @@
+"""
+Ballot tokens for E-Voting System
+verify_otp hands the voter a short-lived token, HMAC-signed with SECRET_KEY,
+naming the voter and election. cast trusts the signature instead of looking
+the voter up again, and refuses ballots that come without one.
+"""
+from django.conf import settings
+from django.core import signing
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BallotTokenService:
+    """Service class to issue and check ballot tokens"""
+
+    SALT = 'election.ballot-token'
+    TOKEN_TTL = 900  # 15 minutes to fill in the ballot
+
+    @classmethod
+    def get_ttl(cls) -> int:
+        return getattr(settings, 'BALLOT_TOKEN_TTL', cls.TOKEN_TTL)
+
+    @classmethod
+    def issue(cls, voter_id: int, election_id: int) -> str:
+        """
+        Sign a token for a voter whose OTP was just verified.
+        The signing timestamp is embedded and checked against BALLOT_TOKEN_TTL.
+
+        Returns:
+            str: URL-safe signed token
+        """
+        return signing.dumps({'v': voter_id, 'e': int(election_id)}, salt=cls.SALT)
+
+    @classmethod
+    def validate(cls, token: str) -> dict:
+        """
+        Check a token's signature and age without touching the database.
+
+        Returns:
+            dict: {'valid': bool, 'error': str or None, 'voter_id': int or None, 'election_id': int or None}
+        """
+        try:
+            payload = signing.loads(token, salt=cls.SALT, max_age=cls.get_ttl())
+        except signing.SignatureExpired:
+            return {
+                'valid': False,
+                'error': 'Your voting session has expired. Please verify your OTP again.',
+                'voter_id': None,
+                'election_id': None
+            }
+        except signing.BadSignature:
+            logger.warning("Rejected a ballot token with a bad signature")
+            return {
+                'valid': False,
+                'error': 'Invalid voting session. Please verify your OTP again.',
+                'voter_id': None,
+                'election_id': None
+            }
+
+        return {'valid': True, 'error': None, 'voter_id': payload['v'], 'election_id': payload['e']}
@@ -0,0 +1,70 @@
+"""
+Conditional GET for the public read endpoints of E-Voting System
+List and retrieve compute their validators with one aggregate query over
+the rows the response is built from: row count, highest id and latest
+updated_at (of the rows and of any related rows they show). Any insert,
+delete or save changes one of those, in whichever worker or process it
+happened, so an unchanged poll costs that query and returns 304 without
+serialization.
+
+If-None-Match is the validator that is honoured. Last-Modified is sent for
+information only: it has one-second granularity and cannot see deletes, so
+If-Modified-Since alone never produces a 304.
+"""
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.http import Http404
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+import hashlib
+
+
+class ConditionalGetMixin:
+    """
+    ViewSet mixin adding ETag / Last-Modified headers to list and retrieve.
+
+    Set conditional_fields to the auto_now fields the response depends on,
+    e.g. ('updated_at', 'position__updated_at').
+    """
+
+    conditional_fields = ('updated_at',)
+
+    def list(self, request, *args, **kwargs):
+        rows = self.filter_queryset(self.get_queryset())
+        return self.conditional_response(request, rows, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        try:
+            rows = self.get_queryset().filter(**{self.lookup_field: kwargs[lookup]})
+        except (TypeError, ValueError, ValidationError):
+            # Same as get_object_or_404 for a malformed pk such as /elections/abc/
+            raise Http404
+        return self.conditional_response(request, rows, super().retrieve, *args, **kwargs)
+
+    def get_validators(self, rows) -> dict:
+        """
+        Returns:
+            dict: {'rows', 'last_id', <field>: latest value, ...} for the queryset
+        """
+        aggregates = {'rows': Count('pk'), 'last_id': Max('pk')}
+        aggregates.update({field: Max(field) for field in self.conditional_fields})
+        return rows.order_by().aggregate(**aggregates)
+
+    def conditional_response(self, request, rows, handler, *args, **kwargs):
+        validators = self.get_validators(rows)
+        variant = f"{sorted(validators.items())}|{request.get_full_path()}|{request.META.get('HTTP_ACCEPT', '')}"
+        etag = f'"{hashlib.md5(variant.encode()).hexdigest()}"'
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+
+        response['ETag'] = etag
+        changed = [validators[field] for field in self.conditional_fields if validators[field] is not None]
+        if changed:
+            response['Last-Modified'] = http_date(max(changed).timestamp())
+        patch_vary_headers(response, ['Accept'])
+        return response
@@ -0,0 +1,96 @@
+"""
+Idempotency-Key support for E-Voting System
+Lets clients safely retry POSTs: the first response for a key is stored in the
+cache and replayed for retries without running the view again.
+
+Replays only span workers when the default cache is shared (CACHE_BACKEND set,
+as for OTP_STORE and the voter index). With the per-process LocMemCache a
+retry that reaches another worker runs the view again: request_otp issues a
+fresh code, and cast is refused by the has_voted check rather than replayed.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+from functools import wraps
+import hashlib
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+DEFAULT_TTL = 3600  # seconds
+LOCK_TTL = 30  # seconds
+
+
+def _fingerprint(data) -> str:
+    try:
+        payload = json.dumps(data, sort_keys=True, default=str)
+    except TypeError:
+        payload = repr(data)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def idempotent(view_method):
+    """
+    Decorator for ViewSet actions honouring an Idempotency-Key header.
+
+    - First request with a key runs normally; final responses (below 500, other
+      than 202 Accepted for a ballot still being committed) are stored.
+    - Retries with the same key and body replay the stored response before any
+      database access, with an 'Idempotent-Replayed: true' header.
+    - A retry while the first request is still running gets 409.
+    - Reusing a key with a different body gets 422.
+    Requests without the header are unaffected.
+    """
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+
+        if len(key) > 255:
+            return Response(
+                {'error': f'{IDEMPOTENCY_HEADER} must be at most 255 characters'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        digest = hashlib.sha256(f'{self.basename}:{self.action}:{key}'.encode()).hexdigest()
+        cache_key = f'idempotency:{digest}'
+        lock_key = f'{cache_key}:lock'
+        fingerprint = _fingerprint(request.data)
+
+        stored = cache.get(cache_key)
+        if stored is not None:
+            return _replay(stored, fingerprint)
+
+        if not cache.add(lock_key, 1, LOCK_TTL):
+            return Response(
+                {'error': 'A request with this Idempotency-Key is already being processed'},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code < 500 and response.status_code != status.HTTP_202_ACCEPTED:
+                ttl = getattr(settings, 'IDEMPOTENCY_TTL', DEFAULT_TTL)
+                cache.set(cache_key, (fingerprint, response.status_code, response.data), ttl)
+            return response
+        finally:
+            cache.delete(lock_key)
+
+    return wrapper
+
+
+def _replay(stored, fingerprint) -> Response:
+    stored_fingerprint, status_code, data = stored
+    if stored_fingerprint != fingerprint:
+        return Response(
+            {'error': f'{IDEMPOTENCY_HEADER} was already used with a different request body'},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+
+    response = Response(data, status=status_code)
+    response['Idempotent-Replayed'] = 'true'
+    return response
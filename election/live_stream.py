@@ -0,0 +1,208 @@
+"""
+Live turnout and results stream for E-Voting System
+Server-Sent Events served by the ASGI application (backend/asgi.py)
+
+Each election with at least one subscriber is polled once per interval by a
+single producer task. Changes are diffed against the previous state, encoded
+once, and the same frame is fanned out to every connected client.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count, Max, Q
+from django.http import JsonResponse, StreamingHttpResponse
+from .models import Election, Voter
+from .tally_service import TallyService
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def format_event(event: str, data: dict) -> str:
+    """Encode one Server-Sent Event frame."""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+def compute_state(election_id) -> dict:
+    """
+    Read the current turnout and tallies of an election.
+
+    Returns:
+        dict: {'turnout': {...}, 'tallies': {candidate_id: votes}}
+    """
+    turnout = Voter.objects.filter(election_id=election_id).aggregate(
+        registered=Count('id'),
+        voted=Count('id', filter=Q(has_voted=True)),
+        last_vote_at=Max('voted_at')
+    )
+    if turnout['last_vote_at'] is not None:
+        turnout['last_vote_at'] = turnout['last_vote_at'].isoformat()
+
+    return {
+        'turnout': turnout,
+        'tallies': {str(k): v for k, v in TallyService.get_totals(election_id).items()}
+    }
+
+
+def diff_states(old: dict, new: dict) -> list:
+    """
+    Compute the events needed to move a subscriber from old to new state.
+
+    Returns:
+        list: [(event, data), ...]
+    """
+    events = []
+
+    if new['turnout'] != old['turnout']:
+        events.append(('turnout', {
+            **new['turnout'],
+            'delta': new['turnout']['voted'] - old['turnout']['voted']
+        }))
+
+    changes = [
+        {'candidate': int(candidate_id), 'votes': votes, 'delta': votes - old['tallies'].get(candidate_id, 0)}
+        for candidate_id, votes in new['tallies'].items()
+        if old['tallies'].get(candidate_id) != votes
+    ]
+    if changes:
+        events.append(('tally', {'changes': changes}))
+
+    return events
+
+
+class Broadcaster:
+    """
+    In-process publish/subscribe hub. Each subscriber owns a bounded queue;
+    a subscriber that falls behind loses its oldest frames rather than
+    slowing down the others.
+    """
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers = {}
+
+    def subscribe(self, channel) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(channel, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, channel, queue) -> bool:
+        """Remove a subscriber. Returns True when the channel has no subscribers left."""
+        queues = self._subscribers.get(channel)
+        if queues is None:
+            return True
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[channel]
+            return True
+        return False
+
+    def subscriber_count(self, channel) -> int:
+        return len(self._subscribers.get(channel, ()))
+
+    def publish(self, channel, frame: str) -> int:
+        """Deliver an already encoded frame to every subscriber of a channel."""
+        queues = self._subscribers.get(channel, ())
+        for queue in queues:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(frame)
+        return len(queues)
+
+
+class ElectionFeed:
+    """Runs one polling producer per watched election and fans its changes out."""
+
+    def __init__(self, broadcaster: Broadcaster = None, interval: float = None):
+        self.broadcaster = broadcaster or Broadcaster()
+        self.interval = interval or getattr(settings, 'LIVE_STREAM_INTERVAL', 2)
+        self._states = {}
+        self._tasks = {}
+        self._lock = asyncio.Lock()
+
+    async def subscribe(self, election_id) -> asyncio.Queue:
+        async with self._lock:
+            queue = self.broadcaster.subscribe(election_id)
+            if election_id not in self._states:
+                self._states[election_id] = await sync_to_async(compute_state)(election_id)
+            queue.put_nowait(format_event('snapshot', self._states[election_id]))
+            if election_id not in self._tasks:
+                self._tasks[election_id] = asyncio.create_task(self._run(election_id))
+            return queue
+
+    async def unsubscribe(self, election_id, queue):
+        async with self._lock:
+            if self.broadcaster.unsubscribe(election_id, queue):
+                task = self._tasks.pop(election_id, None)
+                if task is not None:
+                    task.cancel()
+                self._states.pop(election_id, None)
+
+    async def poll(self, election_id) -> int:
+        """
+        Recompute the state of an election once and publish any changes.
+
+        Returns:
+            int: Number of events published
+        """
+        new_state = await sync_to_async(compute_state)(election_id)
+        old_state = self._states.get(election_id, new_state)
+        self._states[election_id] = new_state
+
+        events = diff_states(old_state, new_state)
+        for event, data in events:
+            self.broadcaster.publish(election_id, format_event(event, data))
+        return len(events)
+
+    async def _run(self, election_id):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.poll(election_id)
+            except Exception as e:
+                logger.error(f"Live stream poll failed for election {election_id}: {str(e)}")
+
+
+feed = ElectionFeed()
+
+
+async def election_stream(request, pk):
+    """
+    Stream live turnout and tally changes of an election as Server-Sent Events.
+
+    GET /api/elections/{id}/stream/
+
+    Events:
+        snapshot  full state, sent once on connect
+        turnout   {"registered", "voted", "last_vote_at", "delta"}
+        tally     {"changes": [{"candidate", "votes", "delta"}, ...]}
+    """
+    if not isinstance(request, ASGIRequest):
+        # A WSGI worker would be held for the lifetime of the connection
+        return JsonResponse(
+            {'error': 'Live stream is only available when served through backend.asgi'},
+            status=503
+        )
+
+    if not await Election.objects.filter(pk=pk).aexists():
+        return JsonResponse({'error': 'Election not found'}, status=404)
+
+    heartbeat = getattr(settings, 'LIVE_STREAM_HEARTBEAT', 15)
+
+    async def events():
+        queue = await feed.subscribe(pk)
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield ': keep-alive\n\n'
+        finally:
+            await feed.unsubscribe(pk, queue)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,214 @@
+"""
+Mass mail-merge for E-Voting System
+Sends invitations (every voter) and turnout reminders (voters who have not
+voted yet) to an election's roll.
+
+The roll is streamed with a server-side cursor and processed in chunks, so
+memory stays flat however many voters there are. Each chunk is rendered,
+sent by a few parallel sender threads over pooled connections under a
+shared rate limit, and checkpointed on its MailCampaign row; an interrupted
+run resumes after the last checkpointed voter.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from itertools import islice
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db import close_old_connections
+from django.db.models import F, Q
+from django.utils import timezone
+from accounts.mail_connection import PooledMailConnection
+from accounts.outbox import MailOutbox
+from .models import MailCampaign, Voter
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Spaces calls evenly so every thread sharing it stays under `rate` per second"""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate else 0
+        self.next_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_at)
+            self.next_at = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class MailMergeService:
+    """Service class to run invitation and reminder campaigns"""
+
+    CHUNK_SIZE = 1000
+    SENDERS = 4
+    RATE = 50  # messages per second across all senders, 0 = unlimited
+    STALE_AFTER = 300  # seconds without a checkpoint before a running campaign may be taken over
+
+    @classmethod
+    def create_campaign(cls, election, kind: str, user=None) -> MailCampaign:
+        return MailCampaign.objects.create(election=election, kind=kind, created_by=user)
+
+    @classmethod
+    def recipients(cls, campaign: MailCampaign):
+        """Voters still to be mailed by this campaign, in checkpoint order."""
+        voters = Voter.objects.filter(
+            election_id=campaign.election_id,
+            id__gt=campaign.last_voter_id
+        ).exclude(email='')
+        if campaign.kind == MailCampaign.KIND_REMINDER:
+            voters = voters.filter(has_voted=False)
+        return voters.order_by('id').values_list('id', 'registration_number', 'email')
+
+    @classmethod
+    def render(cls, campaign: MailCampaign, reg_no: str, email: str) -> EmailMessage:
+        election = campaign.election
+        opens = timezone.localtime(election.election_start_date).strftime('%d %b %Y %H:%M')
+        closes = timezone.localtime(election.election_end_date).strftime('%d %b %Y %H:%M')
+
+        if campaign.kind == MailCampaign.KIND_REMINDER:
+            subject = f'Reminder: you have not voted yet - {election.title}'
+            intro = f"Our records show you have not voted yet in {election.title}. Polls close on {closes}."
+        else:
+            subject = f'You are invited to vote - {election.title}'
+            intro = f"You are registered to vote in {election.title}. Polls open on {opens} and close on {closes}."
+
+        body = f"""Hello,
+
+{intro}
+
+• Registration Number: {reg_no}
+• When you sign in to vote, a one-time password will be sent to this address
+
+Thank you for participating in the election!
+KuraVote Team"""
+
+        return EmailMessage(
+            subject=subject,
+            body=body,
+            from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@kuravote.com'),
+            to=[email]
+        )
+
+    @classmethod
+    def claim(cls, campaign_id) -> bool:
+        """
+        Mark a campaign as running for this process. A campaign left running
+        by a process that died can be claimed again once its checkpoint is stale.
+        """
+        now = timezone.now()
+        stale = now - timedelta(seconds=cls.STALE_AFTER)
+        return MailCampaign.objects.filter(
+            Q(status__in=[MailCampaign.STATUS_PENDING, MailCampaign.STATUS_FAILED])
+            | Q(status=MailCampaign.STATUS_RUNNING, heartbeat_at__lt=stale),
+            id=campaign_id
+        ).update(status=MailCampaign.STATUS_RUNNING, heartbeat_at=now, last_error='') == 1
+
+    @classmethod
+    def run(cls, campaign_id, chunk_size: int = None, senders: int = None, rate: float = None,
+            progress=None) -> dict:
+        """
+        Send a campaign from its last checkpoint to the end of the roll.
+
+        Args:
+            campaign_id: MailCampaign to run
+            chunk_size: Voters rendered, sent and checkpointed together
+            senders: Parallel sender threads, each with its own pooled connection
+            rate: Messages per second across all senders (0 = unlimited)
+            progress: Optional callable(campaign) invoked after every checkpoint
+
+        Returns:
+            dict: {'success': bool, 'error': str or None, 'sent': int, 'failed': int}
+        """
+        chunk_size = chunk_size or getattr(settings, 'MAIL_MERGE_CHUNK_SIZE', cls.CHUNK_SIZE)
+        senders = senders or getattr(settings, 'MAIL_MERGE_SENDERS', cls.SENDERS)
+        rate = getattr(settings, 'MAIL_MERGE_RATE', cls.RATE) if rate is None else rate
+
+        if not cls.claim(campaign_id):
+            return {'success': False, 'error': 'Campaign is already running or completed', 'sent': 0, 'failed': 0}
+
+        campaign = MailCampaign.objects.select_related('election').get(id=campaign_id)
+        limiter = RateLimiter(rate)
+        logger.info(f"Starting {campaign.kind} campaign {campaign.id} after voter {campaign.last_voter_id}")
+
+        try:
+            with ThreadPoolExecutor(max_workers=senders, thread_name_prefix='mail-merge') as pool:
+                rows = cls.recipients(campaign).iterator(chunk_size=chunk_size)
+                while True:
+                    chunk = list(islice(rows, chunk_size))
+                    if not chunk:
+                        break
+                    cls._send_chunk(campaign, chunk, pool, senders, limiter)
+                    if progress is not None:
+                        progress(campaign)
+        except Exception as e:
+            logger.error(f"Campaign {campaign.id} stopped after voter {campaign.last_voter_id}: {e}")
+            MailCampaign.objects.filter(id=campaign.id).update(status=MailCampaign.STATUS_FAILED, last_error=str(e))
+            return {'success': False, 'error': str(e), 'sent': campaign.sent, 'failed': campaign.failed}
+
+        MailCampaign.objects.filter(id=campaign.id).update(
+            status=MailCampaign.STATUS_COMPLETED,
+            finished_at=timezone.now()
+        )
+        logger.info(f"Campaign {campaign.id} completed: {campaign.sent} sent, {campaign.failed} failed")
+        return {'success': True, 'error': None, 'sent': campaign.sent, 'failed': campaign.failed}
+
+    @classmethod
+    def _send_chunk(cls, campaign: MailCampaign, chunk: list, pool, senders: int, limiter: RateLimiter):
+        messages = [cls.render(campaign, reg_no, email) for _, reg_no, email in chunk]
+
+        # Round-robin slices, one per sender thread
+        slices = [list(range(i, len(messages), senders)) for i in range(senders)]
+        errors = [None] * len(messages)
+
+        def send_slice(indexes):
+            try:
+                results = PooledMailConnection.send_batch([messages[i] for i in indexes], throttle=limiter.wait)
+            finally:
+                close_old_connections()
+            for i, error in zip(indexes, results):
+                errors[i] = error
+
+        list(pool.map(send_slice, [s for s in slices if s]))
+
+        # Failed sends are handed to the outbox in one INSERT; its retry
+        # scheduler picks them up by next_attempt_at
+        failures = [(message, error) for message, error in zip(messages, errors) if error is not None]
+        failed = MailOutbox.enqueue_failed(
+            [message for message, _ in failures],
+            [error for _, error in failures],
+            kind=campaign.kind
+        )
+
+        sent = len(messages) - failed
+        campaign.last_voter_id = chunk[-1][0]
+        campaign.sent += sent
+        campaign.failed += failed
+        MailCampaign.objects.filter(id=campaign.id).update(
+            last_voter_id=campaign.last_voter_id,
+            sent=F('sent') + sent,
+            failed=F('failed') + failed,
+            heartbeat_at=timezone.now()
+        )
+
+    @classmethod
+    def start_in_background(cls, campaign_id) -> threading.Thread:
+        """Run a campaign on a background thread (used by the admin actions)."""
+        def target():
+            try:
+                cls.run(campaign_id)
+            finally:
+                close_old_connections()
+
+        thread = threading.Thread(target=target, name=f'mail-campaign-{campaign_id}', daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,55 @@
+"""
+Voter-roll import benchmark.
+
+Imports the same synthetic roll into throwaway elections with every import
+engine available on the configured database (COPY on PostgreSQL, chunked
+bulk_create everywhere) and reports rows per second.
+
+    python manage.py benchmark_roll_import --rows 500000
+"""
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+from election.models import Election
+from election.roll_import import RollImportService
+import time
+
+
+class Command(BaseCommand):
+    help = 'Compare voter-roll import engines (PostgreSQL COPY vs bulk_create) in rows per second'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000)
+        parser.add_argument('--chunk-size', type=int, help='Rows per chunk (default: per-engine setting)')
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded elections afterwards')
+
+    def handle(self, *args, **options):
+        engines = ['copy', 'orm'] if connection.vendor == 'postgresql' else ['orm']
+        self.stdout.write(f"{options['rows']} rows on {connection.vendor}")
+
+        for engine in engines:
+            now = timezone.now()
+            election = Election.objects.create(
+                title=f'Roll import benchmark ({engine}) {now:%Y-%m-%d %H:%M:%S}',
+                description='Load test election',
+                nomination_start_date=now, nomination_end_date=now,
+                election_start_date=now, election_end_date=now,
+            )
+            records = (
+                (n, {'registration_number': f'BENCH{n:08d}', 'email': f'voter{n}@example.invalid'})
+                for n in range(options['rows'])
+            )
+            try:
+                with override_settings(ROLL_IMPORT_ENGINE=engine):
+                    started = time.perf_counter()
+                    result = RollImportService.import_records(election.id, records, options['chunk_size'])
+                    elapsed = time.perf_counter() - started
+            finally:
+                if not options['keep']:
+                    election.delete()
+
+            self.stdout.write(
+                f"{engine:<5} {result['inserted']:>9} inserted in {result['chunks']:>4} chunks  "
+                f"{elapsed:>7.2f}s  {result['inserted'] / elapsed if elapsed else 0:>10.0f} rows/s"
+            )
@@ -0,0 +1,244 @@
+"""
+Election-day benchmark for the voting flow.
+
+Seeds a throwaway election, serves the project from an in-process threaded
+HTTP server with the console email backend, and drives
+request_otp -> verify_otp -> cast for every voter concurrently. Reports
+latency percentiles, throughput and SQL queries per request for each endpoint.
+
+    python manage.py benchmark_voting --voters 500 --positions 10 --candidates 4 --concurrency 50
+
+Pass --otp-store both to run the flow once per OTP store and compare them.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler, get_internal_wsgi_application
+from django.db import connection, connections
+from django.utils import timezone
+from datetime import timedelta
+from election.models import Election, Position, Candidate, Voter
+from election.tally_service import TallyService
+from election.otp_store import get_otp_store
+from election.membership import VoterMembershipIndex
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+
+User = get_user_model()
+
+ENDPOINTS = {
+    '/api/voting/request_otp/': 'request_otp',
+    '/api/voting/verify_otp/': 'verify_otp',
+    '/api/voting/cast/': 'cast',
+}
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class QueryCountingApp:
+    """WSGI wrapper recording the SQL queries each benchmarked request runs."""
+
+    def __init__(self, app):
+        self.app = app
+        self.lock = threading.Lock()
+        self.queries = {name: [] for name in ENDPOINTS.values()}
+
+    def __call__(self, environ, start_response):
+        name = ENDPOINTS.get(environ.get('PATH_INFO'))
+        if name is None:
+            return self.app(environ, start_response)
+
+        count = [0]
+
+        def counter(execute, sql, params, many, context):
+            count[0] += 1
+            return execute(sql, params, many, context)
+
+        with connections['default'].execute_wrapper(counter):
+            response = list(self.app(environ, start_response))
+        with self.lock:
+            self.queries[name].append(count[0])
+        return response
+
+
+class Command(BaseCommand):
+    help = 'Benchmark request_otp -> verify_otp -> cast against an in-process server'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--voters', type=int, default=200)
+        parser.add_argument('--positions', type=int, default=5)
+        parser.add_argument('--candidates', type=int, default=3, help='Candidates per position')
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded election afterwards')
+        parser.add_argument('--otp-store', choices=['cache', 'database', 'both'],
+                            help='OTP store to benchmark (default: the OTP_STORE setting)')
+
+    def handle(self, *args, **options):
+        settings.EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+        # Every simulated voter comes from 127.0.0.1; measure the flow, not the IP limit
+        settings.VOTING_THROTTLE_ENABLED = False
+
+        store = options['otp_store']
+        for name in (['database', 'cache'] if store == 'both' else [store or settings.OTP_STORE]):
+            settings.OTP_STORE = name
+            self.stdout.write(self.style.MIGRATE_HEADING(f'OTP store: {name}'))
+            self.run_flow(options)
+
+    def run_flow(self, options):
+        election, ballot_choices = self.seed(options)
+        app = QueryCountingApp(get_internal_wsgi_application())
+        server = ThreadedWSGIServer(('127.0.0.1', 0), QuietRequestHandler, allow_reuse_address=True)
+        server.set_app(app)
+        server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+        server_thread.start()
+        base_url = f'http://127.0.0.1:{server.server_port}'
+
+        latencies = {name: [] for name in ENDPOINTS.values()}
+        errors = {name: 0 for name in ENDPOINTS.values()}
+        lock = threading.Lock()
+
+        def call(name, path, payload):
+            request = urllib.request.Request(
+                base_url + path,
+                data=json.dumps(payload).encode(),
+                headers={'Content-Type': 'application/json'},
+                method='POST'
+            )
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=60) as response:
+                    body = json.loads(response.read() or b'{}')
+                    ok = True
+            except urllib.error.HTTPError as e:
+                body = json.loads(e.read() or b'{}')
+                ok = False
+            except Exception as e:
+                body = {'error': str(e)}
+                ok = False
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies[name].append(elapsed)
+                if not ok:
+                    errors[name] += 1
+            return ok, body
+
+        def vote(reg_no, email):
+            try:
+                base = {'regNo': reg_no, 'election': election.id}
+                ok, _ = call('request_otp', '/api/voting/request_otp/', base)
+                if not ok:
+                    return
+                code = self.read_otp(email)
+                ok, verified = call('verify_otp', '/api/voting/verify_otp/', {**base, 'otp': code})
+                if not ok:
+                    return
+                votes = {str(p): str(random.choice(c)) for p, c in ballot_choices.items()}
+                call('cast', '/api/voting/cast/', {
+                    'ballotToken': verified['ballot_token'], 'election': election.id, 'votes': votes
+                })
+            finally:
+                connection.close()
+
+        voters = list(Voter.objects.filter(election=election).values_list('registration_number', 'email'))
+        started = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+                list(pool.map(lambda v: vote(*v), voters))
+            wall = time.perf_counter() - started
+        finally:
+            server.shutdown()
+            server.server_close()
+            if not options['keep']:
+                election.delete()
+
+        self.report(options, wall, latencies, errors, app.queries)
+
+    def seed(self, options):
+        now = timezone.now()
+        owner, _ = User.objects.get_or_create(
+            username='benchmark',
+            defaults={'email': 'benchmark@example.invalid', 'role': User.ROLE_PRESIDING}
+        )
+        election = Election.objects.create(
+            title=f'Benchmark {now:%Y-%m-%d %H:%M:%S}',
+            description='Load test election',
+            nomination_start_date=now - timedelta(days=2),
+            nomination_end_date=now - timedelta(days=1),
+            election_start_date=now - timedelta(minutes=1),
+            election_end_date=now + timedelta(hours=1),
+            created_by=owner,
+        )
+
+        ballot_choices = {}
+        for p in range(options['positions']):
+            position = Position.objects.create(
+                election=election, title=f'Position {p + 1}', description='', duration='1 year'
+            )
+            Candidate.objects.bulk_create([
+                Candidate(
+                    position=position, user=owner, name=f'Candidate {p + 1}.{c + 1}',
+                    email=f'candidate{p}-{c}@example.invalid', program='', message='',
+                    status='approved'
+                )
+                for c in range(options['candidates'])
+            ])
+            ballot_choices[position.id] = list(
+                Candidate.objects.filter(position=position).values_list('id', flat=True)
+            )
+
+        TallyService.provision(c for ids in ballot_choices.values() for c in ids)
+        Voter.objects.bulk_create([
+            Voter(
+                election=election,
+                registration_number=f'BENCH{n:07d}',
+                email=f'bench{election.id}-{n}@example.invalid'
+            )
+            for n in range(options['voters'])
+        ], batch_size=1000)
+        VoterMembershipIndex.invalidate(election.id)
+
+        self.stdout.write(
+            f"Seeded election {election.id}: {options['voters']} voters, "
+            f"{options['positions']} positions x {options['candidates']} candidates"
+        )
+        return election, ballot_choices
+
+    def read_otp(self, email):
+        return get_otp_store().peek(email)
+
+    def report(self, options, wall, latencies, errors, queries):
+        self.stdout.write('')
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"{options['voters']} voters, concurrency {options['concurrency']}, {wall:.2f}s wall time"
+        ))
+        self.stdout.write(
+            f"{'endpoint':<12}{'requests':>9}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+            f"{'req/s':>9}{'q/req':>7}{'q max':>7}"
+        )
+        for name in ENDPOINTS.values():
+            values = sorted(latencies[name])
+            counts = queries[name]
+            self.stdout.write(
+                f"{name:<12}{len(values):>9}{errors[name]:>8}"
+                f"{percentile(values, 50) * 1000:>9.1f}{percentile(values, 95) * 1000:>9.1f}"
+                f"{percentile(values, 99) * 1000:>9.1f}{len(values) / wall if wall else 0:>9.1f}"
+                f"{(sum(counts) / len(counts)) if counts else 0:>7.1f}{max(counts, default=0):>7}"
+            )
+        ballots = len(latencies['cast']) - errors['cast']
+        self.stdout.write(self.style.SUCCESS(f"{ballots} ballots cast, {ballots / wall if wall else 0:.1f} ballots/s"))
@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand, CommandError
+from election.models import Election
+from election.roll_import import RollImportService
+
+
+class Command(BaseCommand):
+    help = 'Stream a voter roll from a CSV or NDJSON file into an election, in chunks (append or --sync)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('election_id', type=int)
+        parser.add_argument('path', help='Roll file (.csv, or .ndjson/.jsonl)')
+        parser.add_argument('--format', choices=['csv', 'ndjson'], help='Override detection from the extension')
+        parser.add_argument('--chunk-size', type=int, help='Rows per transaction (default ROLL_IMPORT_CHUNK_SIZE)')
+        parser.add_argument('--sync', action='store_true',
+                            help='Treat the file as the complete roll: insert new voters and update changed emails')
+        parser.add_argument('--delete-missing', action='store_true',
+                            help='With --sync, also delete voters missing from the file (never ones who voted)')
+        parser.add_argument('--dry-run', action='store_true', help='With --sync, report changes without writing')
+
+    def handle(self, *args, **options):
+        election_id = options['election_id']
+        if not Election.objects.filter(id=election_id).exists():
+            raise CommandError(f'Election {election_id} does not exist')
+
+        def progress(chunk, totals):
+            updated = f"{totals['updated']} updated, " if options['sync'] else ''
+            self.stdout.write(
+                f"  {totals['rows']} rows read: {totals['inserted']} inserted, {updated}"
+                f"{totals['duplicates']} duplicates, {totals['invalid']} invalid"
+            )
+
+        fmt = RollImportService.detect_format(options['path'], options['format'])
+        try:
+            with open(options['path'], 'rb') as stream:
+                if options['sync']:
+                    result = RollImportService.sync_file(
+                        election_id, stream, fmt,
+                        delete_missing=options['delete_missing'],
+                        dry_run=options['dry_run'],
+                        chunk_size=options['chunk_size'],
+                        progress=progress
+                    )
+                else:
+                    result = RollImportService.import_file(election_id, stream, fmt, options['chunk_size'], progress)
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        for error in result['errors']:
+            self.stderr.write(f"  line {error['line']}: {error['error']}")
+
+        if options['sync']:
+            for change in result['changes']:
+                self.stdout.write(
+                    f"  {change['action']:<6} {change['registration_number']}: "
+                    f"{change['old_email'] or ''} -> {change['new_email'] or ''}"
+                )
+            self.stdout.write(self.style.SUCCESS(
+                f"{'Would sync' if options['dry_run'] else 'Synced'} election {election_id}: "
+                f"{result['inserted']} inserted, {result['updated']} updated, {result['deleted']} deleted, "
+                f"{result['unchanged']} unchanged, {result['kept_voted']} kept (already voted)"
+            ))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result['rows']} rows into election {election_id}: {result['inserted']} inserted, "
+            f"{result['duplicates']} duplicates, {result['invalid']} invalid"
+        ))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+from election.models import Election
+from election.tally_service import TallyService
+
+
+class Command(BaseCommand):
+    help = 'Rebuild candidate tallies of an election from the Vote table (run while voting is closed)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('election_id', type=int)
+
+    def handle(self, *args, **options):
+        election_id = options['election_id']
+        if not Election.objects.filter(id=election_id).exists():
+            raise CommandError(f'Election {election_id} does not exist')
+
+        total = TallyService.rebuild(election_id)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt tallies for election {election_id}: {total} votes'))
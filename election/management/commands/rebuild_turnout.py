@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+from election.models import Election
+from election.turnout_service import TurnoutService
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the turnout time series of an election from Voter.voted_at (run while voting is closed)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('election_id', type=int)
+        parser.add_argument('--chunk-size', type=int, default=TurnoutService.REBUILD_CHUNK_SIZE,
+                            help='Voters read per round trip')
+
+    def handle(self, *args, **options):
+        election_id = options['election_id']
+        if not Election.objects.filter(id=election_id).exists():
+            raise CommandError(f'Election {election_id} does not exist')
+
+        total = TurnoutService.rebuild(election_id, chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt turnout for election {election_id}: {total} voters'))
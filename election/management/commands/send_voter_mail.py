@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from election.models import Election, MailCampaign
+from election.mail_merge import MailMergeService
+
+
+class Command(BaseCommand):
+    help = 'Email an election roll: invitations to every voter, or reminders to voters who have not voted'
+
+    def add_arguments(self, parser):
+        parser.add_argument('election_id', type=int, nargs='?')
+        parser.add_argument('--kind', choices=[MailCampaign.KIND_INVITATION, MailCampaign.KIND_REMINDER],
+                            default=MailCampaign.KIND_INVITATION)
+        parser.add_argument('--resume', type=int, metavar='CAMPAIGN_ID',
+                            help='Continue an interrupted campaign from its checkpoint')
+        parser.add_argument('--chunk-size', type=int, help='Voters rendered, sent and checkpointed together')
+        parser.add_argument('--senders', type=int, help='Parallel sender connections')
+        parser.add_argument('--rate', type=float, help='Messages per second across all senders (0 = unlimited)')
+
+    def handle(self, *args, **options):
+        if options['resume']:
+            campaign = MailCampaign.objects.filter(id=options['resume']).first()
+            if campaign is None:
+                raise CommandError(f"Campaign {options['resume']} does not exist")
+        else:
+            election = Election.objects.filter(id=options['election_id']).first()
+            if election is None:
+                raise CommandError('Give an existing election_id, or --resume CAMPAIGN_ID')
+            campaign = MailMergeService.create_campaign(election, options['kind'])
+
+        self.stdout.write(f'Campaign {campaign.id}: {campaign.get_kind_display()} for "{campaign.election.title}"')
+
+        def progress(c):
+            self.stdout.write(f'  voter {c.last_voter_id}: {c.sent} sent, {c.failed} queued for retry')
+
+        result = MailMergeService.run(
+            campaign.id,
+            chunk_size=options['chunk_size'],
+            senders=options['senders'],
+            rate=options['rate'],
+            progress=progress
+        )
+        if not result['success']:
+            raise CommandError(f"Campaign {campaign.id}: {result['error']} (resume with --resume {campaign.id})")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Campaign {campaign.id} completed: {result['sent']} sent, {result['failed']} queued for retry"
+        ))
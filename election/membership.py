@@ -0,0 +1,154 @@
+"""
+Voter membership index for E-Voting System
+A per-election Bloom filter of registration numbers, so lookups for numbers
+that are not on the roll (typos, probing) are answered without a query.
+
+The filter is built lazily from the roll, stored in the shared cache for all
+workers, and kept as a local copy in each process. A small version key in
+the cache says whether the local copy is current; code that adds voters
+calls invalidate(), and the next lookup rebuilds. A Bloom filter never
+misses a member, so a "maybe" always goes on to the real query, and while
+no filter is available every lookup is a "maybe".
+
+A "no" is trusted, so the cache must be shared by every worker and by
+management commands (VOTER_INDEX_ENABLED defaults to on only with
+CACHE_BACKEND set), and the version expires after VOTER_INDEX_TTL seconds,
+so even a missed invalidation is served for a bounded time only.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from .models import Voter
+import hashlib
+import math
+import threading
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings"""
+
+    def __init__(self, size: int, hashes: int, bits: bytes = None):
+        self.size = size
+        self.hashes = hashes
+        self.bits = bytearray(bits) if bits is not None else bytearray((size + 7) // 8)
+
+    @classmethod
+    def for_capacity(cls, capacity: int, error_rate: float) -> 'BloomFilter':
+        capacity = max(capacity, 1)
+        size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        hashes = max(1, round(size / capacity * math.log(2)))
+        return cls(size, hashes)
+
+    def _positions(self, value: str):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, value: str):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class VoterMembershipIndex:
+    """Service class answering 'could this registration number be on the roll?'"""
+
+    ERROR_RATE = 0.01
+    TTL = 300
+    HEADROOM = 1.25  # room for voters added before the next rebuild
+    BUILD_LOCK_TTL = 60
+
+    _local = {}  # election_id -> (version, BloomFilter)
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_ttl(cls) -> int:
+        return getattr(settings, 'VOTER_INDEX_TTL', cls.TTL)
+
+    @classmethod
+    def _keys(cls, election_id):
+        prefix = f'voter-index:{election_id}'
+        return f'{prefix}:version', f'{prefix}:filter', f'{prefix}:lock'
+
+    @classmethod
+    def might_contain(cls, election_id, reg_no) -> bool:
+        """
+        Returns:
+            bool: False only if reg_no is certainly not on the election's roll
+        """
+        if not getattr(settings, 'VOTER_INDEX_ENABLED', False):
+            return True
+        try:
+            bloom = cls._get_filter(int(election_id))
+        except (TypeError, ValueError):
+            return True
+        if bloom is None:
+            return True
+        return str(reg_no) in bloom
+
+    @classmethod
+    def invalidate(cls, election_id):
+        """
+        Mark the election's filter stale after voters were added or renamed.
+        Called immediately and again once the transaction commits, so a
+        rebuild that raced the write cannot keep a filter missing the new rows.
+        """
+        def bump():
+            version_key, filter_key, _ = cls._keys(election_id)
+            cache.set(version_key, uuid.uuid4().hex, timeout=cls.get_ttl())
+            cache.delete(filter_key)
+
+        bump()
+        transaction.on_commit(bump)
+
+    @classmethod
+    def _get_filter(cls, election_id):
+        version_key, filter_key, lock_key = cls._keys(election_id)
+
+        version = cache.get(version_key)
+        if version is None:
+            cache.add(version_key, uuid.uuid4().hex, timeout=cls.get_ttl())
+            version = cache.get(version_key)
+
+        local = cls._local.get(election_id)
+        if local is not None and local[0] == version:
+            return local[1]
+
+        stored = cache.get(filter_key)
+        if stored is not None and stored['version'] == version:
+            bloom = BloomFilter(stored['size'], stored['hashes'], stored['bits'])
+        elif cache.add(lock_key, 1, timeout=cls.BUILD_LOCK_TTL):
+            # This process builds; others keep using the database meanwhile
+            try:
+                bloom = cls._build(election_id)
+                cache.set(filter_key, {
+                    'version': version, 'size': bloom.size, 'hashes': bloom.hashes, 'bits': bytes(bloom.bits)
+                }, timeout=cls.get_ttl())
+            finally:
+                cache.delete(lock_key)
+        else:
+            return None
+
+        with cls._lock:
+            cls._local[election_id] = (version, bloom)
+        return bloom
+
+    @classmethod
+    def _build(cls, election_id) -> BloomFilter:
+        reg_nos = Voter.objects.filter(election_id=election_id).values_list('registration_number', flat=True)
+        count = reg_nos.count()
+        bloom = BloomFilter.for_capacity(
+            int(count * cls.HEADROOM) + 1000,
+            getattr(settings, 'VOTER_INDEX_ERROR_RATE', cls.ERROR_RATE)
+        )
+        for reg_no in reg_nos.iterator(chunk_size=5000):
+            bloom.add(reg_no)
+        logger.info(f"Built voter index for election {election_id}: {count} voters, {len(bloom.bits)} bytes")
+        return bloom
@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-17 01:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('election', '0003_auditlog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CandidateTally',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField(default=0)),
+                ('votes', models.PositiveIntegerField(default=0)),
+                ('candidate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tallies', to='election.candidate')),
+                ('election', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tallies', to='election.election')),
+                ('position', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tallies', to='election.position')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['election', 'position'], name='election_tally_elec_pos_idx')],
+                'unique_together': {('candidate', 'shard')},
+            },
+        ),
+    ]
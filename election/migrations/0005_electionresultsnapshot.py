@@ -0,0 +1,25 @@
+# Generated by Django 6.0 on 2026-10-17 02:10
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('election', '0004_candidatetally'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ElectionResultSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('election_end_date', models.DateTimeField()),
+                ('payload', models.JSONField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('election', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='result_snapshot', to='election.election')),
+            ],
+        ),
+    ]
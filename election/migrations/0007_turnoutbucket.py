@@ -0,0 +1,27 @@
+# Generated by Django 6.0 on 2026-10-17 02:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('election', '0006_mailcampaign'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TurnoutBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField()),
+                ('shard', models.PositiveSmallIntegerField(default=0)),
+                ('votes', models.PositiveIntegerField(default=0)),
+                ('election', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='turnout_buckets', to='election.election')),
+            ],
+            options={
+                'unique_together': {('election', 'bucket', 'shard')},
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.0 on 2026-10-17 02:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('election', '0007_turnoutbucket'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['timestamp', 'id'], name='election_audit_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['election', 'timestamp', 'id'], name='election_audit_elec_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='voter',
+            index=models.Index(fields=['election', 'id'], name='election_voter_elec_id_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-17 02:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('election', '0008_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='candidate',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='election',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='position',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
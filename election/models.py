@@ -13,6 +13,7 @@ class Election(models.Model):
     election_end_date = models.DateTimeField()
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='elections_created', null=True, blank=True)
     created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.title
@@ -26,6 +27,7 @@ class Position(models.Model):
     duration = models.CharField(max_length=100)
     caution = models.TextField(blank=True)
     created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.title} - {self.election.title}"
@@ -41,6 +43,9 @@ class Voter(models.Model):
 
     class Meta:
         unique_together = ['election', 'registration_number']
+        indexes = [
+            models.Index(fields=['election', 'id'], name='election_voter_elec_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.registration_number} - {self.election.title}"
@@ -67,6 +72,7 @@ class Candidate(models.Model):
     applied_at = models.DateTimeField(default=timezone.now)
     reviewed_at = models.DateTimeField(null=True, blank=True)
     reviewed_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='reviewed_candidates')
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.name} - {self.position.title}"
@@ -106,6 +112,103 @@ class AuditLog(models.Model):
     
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            # Keyset pagination of the audit log, overall and per election
+            models.Index(fields=['timestamp', 'id'], name='election_audit_ts_idx'),
+            models.Index(fields=['election', 'timestamp', 'id'], name='election_audit_elec_ts_idx'),
+        ]
     
     def __str__(self):
         return f"{self.action} at {self.timestamp}"
+
+
+class CandidateTally(models.Model):
+    """
+    Running vote counter for a candidate, split across shards so concurrent
+    ballots for the same candidate update different rows.
+    """
+    election = models.ForeignKey(Election, on_delete=models.CASCADE, related_name='tallies')
+    position = models.ForeignKey(Position, on_delete=models.CASCADE, related_name='tallies')
+    candidate = models.ForeignKey(Candidate, on_delete=models.CASCADE, related_name='tallies')
+    shard = models.PositiveSmallIntegerField(default=0)
+    votes = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['candidate', 'shard']
+        indexes = [
+            models.Index(fields=['election', 'position'], name='election_tally_elec_pos_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.candidate.name} [shard {self.shard}]: {self.votes}"
+
+
+class TurnoutBucket(models.Model):
+    """
+    Number of voters who cast their ballot in one minute of an election,
+    split across shards like CandidateTally so concurrent casts in the same
+    minute update different rows.
+    """
+    election = models.ForeignKey(Election, on_delete=models.CASCADE, related_name='turnout_buckets')
+    bucket = models.DateTimeField()  # start of the minute
+    shard = models.PositiveSmallIntegerField(default=0)
+    votes = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['election', 'bucket', 'shard']
+
+    def __str__(self):
+        return f"{self.election.title} {self.bucket:%Y-%m-%d %H:%M} [shard {self.shard}]: {self.votes}"
+
+
+class ElectionResultSnapshot(models.Model):
+    """
+    Immutable copy of an election's results, frozen once polls have closed.
+    """
+    election = models.OneToOneField(Election, on_delete=models.CASCADE, related_name='result_snapshot')
+    election_end_date = models.DateTimeField()
+    payload = models.JSONField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Results snapshot - {self.election.title}"
+
+
+class MailCampaign(models.Model):
+    """
+    A mass mailing to an election's voter roll (invitations or turnout
+    reminders). Progress is checkpointed by voter id so an interrupted run
+    resumes where it stopped.
+    """
+    KIND_INVITATION = 'invitation'
+    KIND_REMINDER = 'reminder'
+    KIND_CHOICES = [
+        (KIND_INVITATION, 'Invitation'),
+        (KIND_REMINDER, 'Turnout reminder'),
+    ]
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    election = models.ForeignKey(Election, on_delete=models.CASCADE, related_name='mail_campaigns')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    last_voter_id = models.BigIntegerField(default=0)  # checkpoint: every voter up to this id is done
+    sent = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)  # first attempt failed, handed to the mail outbox for retry
+    last_error = models.TextField(blank=True)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.get_kind_display()} - {self.election.title} ({self.status})"
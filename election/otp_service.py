@@ -1,12 +1,11 @@
 """
 Clean OTP Service for E-Voting System
-Handles OTP generation, email sending with timeout, and verification
+Handles OTP generation, queuing of the OTP email, and verification.
+Codes are kept in the store selected by OTP_STORE (see otp_store.py).
 """
-from django.core.mail import send_mail
-from django.conf import settings
-from django.utils import timezone
-from accounts.models import EmailOTP
-import threading
+from accounts.outbox import MailOutbox
+from .otp_store import get_otp_store, CONSUMED, EXPIRED
+import secrets
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,39 +14,32 @@ logger = logging.getLogger(__name__)
 class OTPService:
     """Service class to handle all OTP-related operations"""
     
-    EMAIL_TIMEOUT = 5  # seconds
     OTP_LENGTH = 6
     OTP_EXPIRY = 600  # 10 minutes
     
     @classmethod
-    def generate_otp(cls, email: str) -> EmailOTP:
+    def generate_otp(cls, email: str) -> str:
         """
         Generate a new OTP for the given email.
-        Marks all previous unused OTPs for this email as used.
+        Replaces any previous unused OTP for this email.
         
         Args:
             email: The email address to generate OTP for
             
         Returns:
-            EmailOTP: The newly created OTP object
+            str: The newly issued OTP code
         """
-        # Invalidate all previous unused OTPs for this email
-        EmailOTP.objects.filter(email=email, used=False).update(used=True)
+        code = "".join(str(secrets.randbelow(10)) for _ in range(cls.OTP_LENGTH))
+        get_otp_store().issue(email, code, cls.OTP_EXPIRY)
         
-        # Create new OTP
-        otp_obj = EmailOTP.create_otp(
-            email=email,
-            length=cls.OTP_LENGTH,
-            expiry_seconds=cls.OTP_EXPIRY
-        )
-        
-        logger.info(f"Generated OTP for {email}: {otp_obj.code}")
-        return otp_obj
+        logger.info(f"Generated OTP for {email}")
+        return code
     
     @classmethod
     def send_otp_email(cls, email: str, otp_code: str, election_title: str, reg_no: str) -> dict:
         """
-        Send OTP via email with timeout protection.
+        Queue the OTP email in the mail outbox. Delivery happens in the
+        background; poll MailOutbox.get_status(delivery_id) for its state.
         
         Args:
             email: Recipient email address
@@ -56,13 +48,9 @@ class OTPService:
             reg_no: Voter registration number
             
         Returns:
-            dict: {'success': bool, 'error': str or None}
+            dict: {'success': bool, 'error': str or None, 'delivery_id': str or None}
         """
-        result = {'success': False, 'error': None}
-        
-        def send_email():
-            try:
-                email_body = f"""Hello,
+        email_body = f"""Hello,
 
 Your One-Time Password (OTP) for voting is: {otp_code}
 
@@ -77,71 +65,45 @@ Please do not share this OTP with anyone.
 Thank you for participating in the election!
 KuraVote Team"""
 
-                send_mail(
-                    subject=f'Your Voting OTP - {election_title}',
-                    message=email_body,
-                    from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@kuravote.com'),
-                    recipient_list=[email],
-                    fail_silently=False,
-                )
-                result['success'] = True
-                logger.info(f"OTP email sent successfully to {email}")
-            except Exception as e:
-                result['error'] = str(e)
-                logger.error(f"Failed to send OTP email to {email}: {str(e)}")
-        
-        # Start email sending in daemon thread with timeout
-        email_thread = threading.Thread(target=send_email, daemon=True)
-        email_thread.start()
-        email_thread.join(timeout=cls.EMAIL_TIMEOUT)
-        
-        if email_thread.is_alive():
-            # Timeout occurred
-            result['error'] = 'Email service timeout'
-            logger.warning(f"Email sending timed out for {email}")
-        
-        return result
+        try:
+            message = MailOutbox.enqueue(
+                to_email=email,
+                subject=f'Your Voting OTP - {election_title}',
+                body=email_body,
+                kind='otp',
+                sensitive=True
+            )
+        except Exception as e:
+            logger.error(f"Failed to queue OTP email to {email}: {str(e)}")
+            return {'success': False, 'error': str(e), 'delivery_id': None}
+
+        logger.info(f"OTP email queued for {email}")
+        return {'success': True, 'error': None, 'delivery_id': str(message.id)}
     
     @classmethod
     def verify_otp(cls, email: str, otp_code: str) -> dict:
         """
-        Verify an OTP code for the given email.
+        Verify an OTP code for the given email, using it up.
         
         Args:
             email: The email address
             otp_code: The OTP code to verify
             
         Returns:
-            dict: {'valid': bool, 'message': str, 'otp_obj': EmailOTP or None}
+            dict: {'valid': bool, 'message': str}
         """
-        try:
-            otp_obj = EmailOTP.objects.get(email=email, code=otp_code, used=False)
-            
-            if not otp_obj.is_valid():
-                logger.warning(f"Expired OTP attempted for {email}")
-                return {
-                    'valid': False,
-                    'message': 'OTP has expired. Please request a new one.',
-                    'otp_obj': None
-                }
-            
-            # Mark OTP as used
-            otp_obj.mark_used()
+        outcome = get_otp_store().consume(email, otp_code)
+        
+        if outcome == CONSUMED:
             logger.info(f"OTP verified successfully for {email}")
-            
-            return {
-                'valid': True,
-                'message': 'OTP verified successfully',
-                'otp_obj': otp_obj
-            }
-            
-        except EmailOTP.DoesNotExist:
-            logger.warning(f"Invalid OTP attempted for {email}")
-            return {
-                'valid': False,
-                'message': 'Invalid OTP code. Please check and try again.',
-                'otp_obj': None
-            }
+            return {'valid': True, 'message': 'OTP verified successfully'}
+        
+        if outcome == EXPIRED:
+            logger.warning(f"Expired OTP attempted for {email}")
+            return {'valid': False, 'message': 'OTP has expired. Please request a new one.'}
+        
+        logger.warning(f"Invalid OTP attempted for {email}")
+        return {'valid': False, 'message': 'Invalid OTP code. Please check and try again.'}
     
     @classmethod
     def get_masked_email(cls, email: str) -> str:
@@ -0,0 +1,125 @@
+"""
+OTP storage backends for E-Voting System
+
+OTPService keeps issued codes in one of these stores, picked by the OTP_STORE
+setting:
+
+- 'cache': Django's cache framework. One cache write per issued code, native
+  TTL expiry, and consume-once enforced with an atomic cache.add() marker.
+  Needs a cache shared by every worker (Redis, Memcached, database cache).
+- 'database': the EmailOTP table. Durable and auditable, at the cost of table
+  writes on every request.
+
+A dotted path to another OTPStore subclass is accepted as well.
+"""
+from abc import ABC, abstractmethod
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from django.utils.module_loading import import_string
+from datetime import timedelta
+from accounts.models import EmailOTP
+import hashlib
+import uuid
+import time
+
+CONSUMED = 'consumed'
+INVALID = 'invalid'
+EXPIRED = 'expired'
+
+
+class OTPStore(ABC):
+    """Interface for OTP stores; a subclass missing a method cannot be created"""
+
+    @abstractmethod
+    def issue(self, email: str, code: str, ttl: int) -> None:
+        """Store a code for email, replacing any code issued before."""
+
+    @abstractmethod
+    def consume(self, email: str, code: str) -> str:
+        """
+        Atomically use up a code; at most one caller can ever get CONSUMED.
+
+        Returns:
+            str: CONSUMED, INVALID or EXPIRED
+        """
+
+    @abstractmethod
+    def peek(self, email: str):
+        """Current unused code for email, or None (tests and benchmarks only)."""
+
+
+class DatabaseOTPStore(OTPStore):
+    """Durable store on the EmailOTP table"""
+
+    def issue(self, email, code, ttl):
+        # Invalidate all previous unused OTPs for this email
+        EmailOTP.objects.filter(email=email, used=False).update(used=True)
+        EmailOTP.objects.create(email=email, code=code, expires_at=timezone.now() + timedelta(seconds=ttl))
+
+    def consume(self, email, code):
+        # Conditional UPDATE: only one concurrent request can flip used
+        if EmailOTP.objects.filter(
+            email=email, code=code, used=False, expires_at__gte=timezone.now()
+        ).update(used=True):
+            return CONSUMED
+        if EmailOTP.objects.filter(email=email, code=code, used=False).exists():
+            return EXPIRED
+        return INVALID
+
+    def peek(self, email):
+        return EmailOTP.objects.filter(email=email, used=False).order_by('-created_at').values_list(
+            'code', flat=True
+        ).first()
+
+
+class CacheOTPStore(OTPStore):
+    """Store on a Django cache; expired codes simply disappear"""
+
+    KEY_PREFIX = 'otp'
+
+    def __init__(self, alias: str = None):
+        self.cache = caches[alias or getattr(settings, 'OTP_CACHE_ALIAS', 'default')]
+
+    def _key(self, email: str) -> str:
+        return f'{self.KEY_PREFIX}:{hashlib.sha256(email.lower().encode()).hexdigest()}'
+
+    def issue(self, email, code, ttl):
+        # Overwriting the entry invalidates any previous code; the nonce
+        # names this issue's consume-once marker
+        entry = {'code': code, 'nonce': uuid.uuid4().hex, 'expires_at': time.time() + ttl}
+        self.cache.set(self._key(email), entry, timeout=ttl)
+
+    def consume(self, email, code):
+        key = self._key(email)
+        entry = self.cache.get(key)
+        if entry is None or not constant_time_compare(entry['code'], code):
+            return INVALID
+
+        remaining = entry['expires_at'] - time.time()
+        if remaining <= 0:
+            return EXPIRED
+
+        # cache.add is atomic on every backend: only the first request wins
+        if not self.cache.add(f"{key}:used:{entry['nonce']}", 1, timeout=int(remaining) + 1):
+            return INVALID
+        self.cache.delete(key)
+        return CONSUMED
+
+    def peek(self, email):
+        entry = self.cache.get(self._key(email))
+        return entry['code'] if entry else None
+
+
+STORES = {
+    'cache': CacheOTPStore,
+    'database': DatabaseOTPStore,
+}
+
+
+def get_otp_store() -> OTPStore:
+    """Instantiate the store named by the OTP_STORE setting."""
+    name = getattr(settings, 'OTP_STORE', 'database')
+    store_class = STORES.get(name) or import_string(name)
+    return store_class()
@@ -0,0 +1,116 @@
+"""
+Keyset pagination for the election API
+List endpoints page with opaque cursors over a unique, indexed ordering:
+each page is a "WHERE key > last_key ORDER BY key LIMIT n" range scan, so
+page 1000 costs the same as page 1 and rows inserted meanwhile never shift
+or repeat results. No COUNT query is run.
+
+Clients pass ?page_size= (up to API_MAX_PAGE_SIZE) and follow the next and
+previous links; the default size is REST_FRAMEWORK['PAGE_SIZE'].
+"""
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+
+
+class IdCursorPagination(CursorPagination):
+    """Cursor pagination in primary-key order"""
+
+    ordering = 'id'
+    page_size_query_param = 'page_size'
+    max_page_size = getattr(settings, 'API_MAX_PAGE_SIZE', 500)
+
+
+class AuditLogCursorPagination(IdCursorPagination):
+    """
+    Newest entries first, keyed on the (timestamp, id) pair.
+
+    DRF's cursor only records ordering[0], and steps over rows sharing that
+    value with OFFSET. Audit entries written together share a timestamp, so
+    here the cursor position is "timestamp|id" and every page is a range
+    scan on the (timestamp, id) index.
+    """
+
+    ordering = ('-timestamp', '-id')
+
+    def _get_position_from_instance(self, instance, ordering):
+        return f"{instance.timestamp.isoformat()}|{instance.pk}"
+
+    def parse_position(self, position):
+        timestamp, _, pk = position.rpartition('|')
+        timestamp = parse_datetime(timestamp)
+        if timestamp is None or not pk.isdigit():
+            raise NotFound(self.invalid_cursor_message)
+        return timestamp, int(pk)
+
+    def keyset_filter(self, position, older: bool) -> Q:
+        """
+        Rows strictly after `position` in the requested direction.
+
+        Args:
+            position: Cursor position, "timestamp|id"
+            older: True to walk towards older entries (the list order)
+
+        Returns:
+            Q: (timestamp, id) < position, or > position when not older
+        """
+        timestamp, pk = self.parse_position(position)
+        if older:
+            return Q(timestamp__lte=timestamp) & (Q(timestamp__lt=timestamp) | Q(id__lt=pk))
+        return Q(timestamp__gte=timestamp) & (Q(timestamp__gt=timestamp) | Q(id__gt=pk))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # Same flow as CursorPagination.paginate_queryset, filtering on the pair
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (offset, reverse, current_position) = (0, False, None)
+        else:
+            (offset, reverse, current_position) = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by('timestamp', 'id')
+        else:
+            queryset = queryset.order_by('-timestamp', '-id')
+
+        if current_position is not None:
+            queryset = queryset.filter(self.keyset_filter(current_position, older=not reverse))
+
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = results[:self.page_size]
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = (current_position is not None) or (offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (current_position is not None) or (offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
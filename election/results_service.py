@@ -0,0 +1,178 @@
+"""
+Results Service for E-Voting System
+Builds election results from the tally table and caches them by election phase
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError
+from django.db.models import Count, Q
+from django.utils import timezone
+from .models import Candidate, ElectionResultSnapshot, Position, Voter
+from .tally_service import TallyService
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ResultsService:
+    """Service class to compute and serve election results"""
+
+    LIVE_TTL = 5  # seconds
+    PHASE_UPCOMING = 'upcoming'
+    PHASE_LIVE = 'live'
+    PHASE_FINAL = 'final'
+
+    @classmethod
+    def get_phase(cls, election, now=None) -> str:
+        now = now or timezone.now()
+        if now < election.election_start_date:
+            return cls.PHASE_UPCOMING
+        if now < election.election_end_date:
+            return cls.PHASE_LIVE
+        return cls.PHASE_FINAL
+
+    @classmethod
+    def get_results(cls, election) -> dict:
+        """
+        Return the results of an election.
+
+        Before and during polling the payload is cached for RESULTS_LIVE_TTL
+        seconds. Once polls have closed it is frozen into an
+        ElectionResultSnapshot and cached without expiry, so repeated reads
+        never recompute it.
+
+        Args:
+            election: The Election instance
+
+        Returns:
+            dict: The results payload
+        """
+        phase = cls.get_phase(election)
+        if phase == cls.PHASE_FINAL:
+            return cls._get_final_results(election)
+
+        key = cls._cache_key(election, phase)
+        payload = cache.get(key)
+        if payload is None:
+            payload = cls.compute_results(election, phase)
+            ttl = getattr(settings, 'RESULTS_LIVE_TTL', cls.LIVE_TTL)
+            cache.set(key, payload, ttl)
+        return payload
+
+    @classmethod
+    def _get_final_results(cls, election) -> dict:
+        key = cls._cache_key(election, cls.PHASE_FINAL)
+        payload = cache.get(key)
+        if payload is not None:
+            return payload
+
+        snapshot = ElectionResultSnapshot.objects.filter(election=election).first()
+        if snapshot is not None and snapshot.election_end_date != election.election_end_date:
+            # Polls were reopened or extended after the snapshot was taken
+            snapshot.delete()
+            snapshot = None
+
+        if snapshot is None:
+            payload = cls.compute_results(election, cls.PHASE_FINAL)
+            try:
+                snapshot = ElectionResultSnapshot.objects.create(
+                    election=election,
+                    election_end_date=election.election_end_date,
+                    payload=payload
+                )
+                logger.info(f"Froze results snapshot for election {election.id}")
+            except IntegrityError:
+                # Another worker froze it first; serve theirs
+                snapshot = ElectionResultSnapshot.objects.get(election=election)
+
+        cache.set(key, snapshot.payload, None)
+        return snapshot.payload
+
+    @classmethod
+    def _cache_key(cls, election, phase: str) -> str:
+        return f"election:{election.id}:results:{phase}:{election.election_end_date.timestamp()}"
+
+    @classmethod
+    def compute_results(cls, election, phase: str) -> dict:
+        """
+        Build the results payload from the tally table.
+
+        Each position lists its approved candidates by votes, and the top
+        Position.number_of_people candidates as winners. Candidates tied on
+        the last seat are reported in 'tied' instead of 'winners'.
+
+        Args:
+            election: The Election instance
+            phase: One of the PHASE_* constants
+
+        Returns:
+            dict: The results payload
+        """
+        totals = TallyService.get_totals(election.id)
+        turnout = Voter.objects.filter(election=election).aggregate(
+            registered=Count('id'),
+            voted=Count('id', filter=Q(has_voted=True))
+        )
+
+        candidates_by_position = {}
+        for candidate_id, position_id, name in Candidate.objects.filter(
+            position__election=election,
+            status='approved'
+        ).values_list('id', 'position_id', 'name'):
+            candidates_by_position.setdefault(position_id, []).append({
+                'id': candidate_id,
+                'name': name,
+                'votes': totals.get(candidate_id, 0)
+            })
+
+        positions = []
+        for position_id, title, seats in Position.objects.filter(
+            election=election
+        ).order_by('id').values_list('id', 'title', 'number_of_people'):
+            candidates = sorted(
+                candidates_by_position.get(position_id, []),
+                key=lambda c: (-c['votes'], c['id'])
+            )
+            winners, tied = cls._pick_winners(candidates, seats)
+            positions.append({
+                'id': position_id,
+                'title': title,
+                'seats': seats,
+                'total_votes': sum(c['votes'] for c in candidates),
+                'candidates': candidates,
+                'winners': winners,
+                'tied': tied
+            })
+
+        return {
+            'election': election.id,
+            'title': election.title,
+            'phase': phase,
+            'generated_at': timezone.now().isoformat(),
+            'turnout': turnout,
+            'positions': positions
+        }
+
+    @classmethod
+    def _pick_winners(cls, candidates: list, seats: int):
+        """
+        Args:
+            candidates: Candidates sorted by votes, highest first
+            seats: Number of people to be elected
+
+        Returns:
+            tuple: (winner ids, ids of candidates tied for the last seat)
+        """
+        ranked = [c for c in candidates if c['votes'] > 0]
+        if seats <= 0 or not ranked:
+            return [], []
+        if len(ranked) <= seats:
+            return [c['id'] for c in ranked], []
+
+        cutoff = ranked[seats - 1]['votes']
+        if ranked[seats]['votes'] < cutoff:
+            return [c['id'] for c in ranked[:seats]], []
+
+        winners = [c['id'] for c in ranked if c['votes'] > cutoff]
+        tied = [c['id'] for c in ranked if c['votes'] == cutoff]
+        return winners, tied
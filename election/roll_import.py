@@ -0,0 +1,402 @@
+"""
+Voter roll import for E-Voting System
+Streams a roll from a CSV or NDJSON file (or any iterable of records) and
+inserts it in fixed-size chunks, so memory use does not depend on the size
+of the roll.
+
+CSV files need a header row with a registration_number (or regNo) column
+and an optional email column. NDJSON files hold one object per line with
+the same keys, or a bare JSON string per line for a registration number.
+
+sync_records() instead diffs a complete roll against the election's
+voters and writes only the inserts, email updates and optional deletes.
+
+On PostgreSQL each chunk of an append import is streamed with COPY FROM
+STDIN into a session staging table and merged with INSERT ... ON CONFLICT
+DO NOTHING; other databases use bulk_create. ROLL_IMPORT_ENGINE ('auto',
+'copy' or 'orm') forces one or the other.
+"""
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import connection, transaction
+from django.utils import timezone
+from itertools import islice
+from .models import Voter
+from .membership import VoterMembershipIndex
+import codecs
+import csv
+import io
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+REG_NO_FIELDS = ('registration_number', 'regNo', 'reg_no')
+MAX_REG_NO_LENGTH = Voter._meta.get_field('registration_number').max_length
+
+
+class RollImportService:
+    """Service class to stream voter rolls into the Voter table"""
+
+    CHUNK_SIZE = 2000
+    COPY_CHUNK_SIZE = 50000
+    MAX_REPORTED_ERRORS = 100
+    STAGING_TABLE = 'election_voter_import_stage'
+
+    @classmethod
+    def get_engine(cls) -> str:
+        """
+        Returns:
+            str: 'copy' when the default database is PostgreSQL (psycopg2 or psycopg 3), else 'orm'
+        """
+        engine = getattr(settings, 'ROLL_IMPORT_ENGINE', 'auto')
+        if engine != 'auto':
+            return engine
+        return 'copy' if connection.vendor == 'postgresql' else 'orm'
+
+    @classmethod
+    def detect_format(cls, filename: str, requested: str = None) -> str:
+        if requested:
+            return requested.lower()
+        return 'ndjson' if filename.lower().endswith(('.ndjson', '.jsonl')) else 'csv'
+
+    @classmethod
+    def read_records(cls, stream, fmt: str):
+        """
+        Lazily parse a binary stream into (line_number, record) pairs.
+        A record is a dict, or a plain registration number string.
+        Seekable streams (uploads, files) are checked to be UTF-8 first, so an
+        encoding error fails the import before any chunk is committed.
+        """
+        if getattr(stream, 'seekable', lambda: False)():
+            cls.check_encoding(stream)
+        lines = codecs.iterdecode(stream, 'utf-8-sig')
+        if fmt == 'csv':
+            reader = csv.DictReader(lines)
+            for record in reader:
+                yield reader.line_num, record
+        elif fmt == 'ndjson':
+            for line_number, line in enumerate(lines, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_number, json.loads(line)
+                except ValueError:
+                    yield line_number, None
+        else:
+            raise ValueError(f'Unsupported roll format: {fmt}')
+
+    @classmethod
+    def check_encoding(cls, stream, block_size: int = 1 << 20):
+        """
+        Decode a whole binary stream block by block, then rewind it.
+
+        Raises:
+            ValueError: at the first byte that is not valid UTF-8
+        """
+        decoder = codecs.getincrementaldecoder('utf-8-sig')()
+        offset = 0
+        try:
+            for block in iter(lambda: stream.read(block_size), b''):
+                decoder.decode(block)
+                offset += len(block)
+            decoder.decode(b'', final=True)
+        except UnicodeDecodeError as e:
+            raise ValueError(f'file is not valid UTF-8 (byte {offset + e.start})') from None
+        stream.seek(0)
+
+    @classmethod
+    def clean_record(cls, record):
+        """
+        Returns:
+            tuple: (registration_number, email, error or None)
+        """
+        if isinstance(record, dict):
+            reg_no = next((record[f] for f in REG_NO_FIELDS if record.get(f)), '')
+            email = record.get('email') or ''
+        elif isinstance(record, (str, int)):
+            reg_no, email = record, ''
+        else:
+            return None, None, 'Unreadable record'
+
+        reg_no = str(reg_no).strip()
+        email = str(email).strip()
+        if not reg_no:
+            return None, None, 'Missing registration number'
+        if len(reg_no) > MAX_REG_NO_LENGTH:
+            return None, None, f'Registration number longer than {MAX_REG_NO_LENGTH} characters'
+        if email:
+            try:
+                validate_email(email)
+            except ValidationError:
+                return None, None, f'Invalid email address: {email}'
+        return reg_no, email, None
+
+    @classmethod
+    def import_records(cls, election_id, records, chunk_size: int = None, progress=None) -> dict:
+        """
+        Validate and insert (line_number, record) pairs chunk by chunk.
+
+        Each chunk is validated in Python, then inserted in its own
+        transaction by the COPY or ORM engine; both report exactly how many
+        rows were new.
+
+        Args:
+            election_id: Election the voters belong to
+            records: Iterable of (line_number, record)
+            chunk_size: Records per chunk (default ROLL_IMPORT_CHUNK_SIZE)
+            progress: Optional callable(chunk_summary, totals) after every chunk
+
+        Returns:
+            dict: {'rows', 'inserted', 'duplicates', 'invalid', 'chunks', 'errors'}
+        """
+        engine = cls.get_engine()
+        if engine == 'copy':
+            chunk_size = chunk_size or getattr(settings, 'ROLL_IMPORT_COPY_CHUNK_SIZE', cls.COPY_CHUNK_SIZE)
+        else:
+            chunk_size = chunk_size or getattr(settings, 'ROLL_IMPORT_CHUNK_SIZE', cls.CHUNK_SIZE)
+        insert = cls._insert_copy if engine == 'copy' else cls._insert_orm
+        totals = {'rows': 0, 'inserted': 0, 'duplicates': 0, 'invalid': 0, 'chunks': 0, 'errors': []}
+
+        records = iter(records)
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                break
+            summary = cls._import_chunk(election_id, chunk, totals['errors'], insert)
+            totals['chunks'] += 1
+            for field in ('rows', 'inserted', 'duplicates', 'invalid'):
+                totals[field] += summary[field]
+            if progress is not None:
+                progress(summary, totals)
+
+        logger.info(
+            f"Imported roll for election {election_id}: {totals['inserted']} inserted, "
+            f"{totals['duplicates']} duplicates, {totals['invalid']} invalid"
+        )
+        return totals
+
+    @classmethod
+    def import_file(cls, election_id, stream, fmt: str, chunk_size: int = None, progress=None) -> dict:
+        """Stream a CSV/NDJSON binary file into the roll. See import_records."""
+        return cls.import_records(election_id, cls.read_records(stream, fmt), chunk_size, progress)
+
+    @classmethod
+    def sync_records(cls, election_id, records, delete_missing: bool = False, dry_run: bool = False,
+                     chunk_size: int = None, progress=None) -> dict:
+        """
+        Make the election's roll match a full incoming roll, writing only
+        what changed: new voters are inserted, voters whose email changed
+        are updated, and with delete_missing voters absent from the roll
+        are removed. Voters who have already voted are never deleted.
+
+        Each chunk costs one SELECT of the matching existing rows plus
+        writes for its changes only, so resending an unchanged roll writes
+        nothing.
+
+        Args:
+            election_id: Election the voters belong to
+            records: Iterable of (line_number, record), the complete roll
+            delete_missing: Remove voters that are not in the incoming roll
+            dry_run: Report the changes without writing them
+            chunk_size: Records per chunk (default ROLL_IMPORT_CHUNK_SIZE)
+            progress: Optional callable(chunk_summary, totals) after every chunk
+
+        Returns:
+            dict: {'rows', 'inserted', 'updated', 'unchanged', 'deleted', 'kept_voted',
+                   'duplicates', 'invalid', 'chunks', 'changes', 'errors'}
+        """
+        chunk_size = chunk_size or getattr(settings, 'ROLL_IMPORT_CHUNK_SIZE', cls.CHUNK_SIZE)
+        totals = {
+            'rows': 0, 'inserted': 0, 'updated': 0, 'unchanged': 0, 'deleted': 0, 'kept_voted': 0,
+            'duplicates': 0, 'invalid': 0, 'chunks': 0, 'changes': [], 'errors': [],
+        }
+        # Only needed to find voters missing from the roll
+        seen = set() if delete_missing else None
+
+        records = iter(records)
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                break
+            summary = cls._sync_chunk(election_id, chunk, totals, seen, dry_run)
+            totals['chunks'] += 1
+            for field in ('rows', 'inserted', 'updated', 'unchanged', 'duplicates', 'invalid'):
+                totals[field] += summary[field]
+            if progress is not None:
+                progress(summary, totals)
+
+        if delete_missing:
+            cls._delete_missing(election_id, seen, totals, chunk_size, dry_run)
+
+        logger.info(
+            f"Synced roll for election {election_id}{' (dry run)' if dry_run else ''}: "
+            f"{totals['inserted']} inserted, {totals['updated']} updated, {totals['deleted']} deleted, "
+            f"{totals['unchanged']} unchanged"
+        )
+        return totals
+
+    @classmethod
+    def sync_file(cls, election_id, stream, fmt: str, **options) -> dict:
+        """Sync the roll from a CSV/NDJSON binary file. See sync_records."""
+        return cls.sync_records(election_id, cls.read_records(stream, fmt), **options)
+
+    @classmethod
+    def _note_change(cls, totals: dict, action: str, reg_no: str, old_email=None, new_email=None):
+        if len(totals['changes']) < cls.MAX_REPORTED_ERRORS:
+            totals['changes'].append({
+                'action': action, 'registration_number': reg_no, 'old_email': old_email, 'new_email': new_email
+            })
+
+    @classmethod
+    def _sync_chunk(cls, election_id, chunk: list, totals: dict, seen, dry_run: bool) -> dict:
+        summary = {
+            'first_line': chunk[0][0], 'rows': len(chunk), 'inserted': 0, 'updated': 0, 'unchanged': 0,
+            'duplicates': 0, 'invalid': 0,
+        }
+        voters = cls._clean_chunk(chunk, summary, totals['errors'])
+        if seen is not None:
+            summary['duplicates'] += sum(1 for reg_no in voters if reg_no in seen)
+            voters = {reg_no: email for reg_no, email in voters.items() if reg_no not in seen}
+            seen.update(voters)
+        if not voters:
+            return summary
+
+        with transaction.atomic():
+            existing = {
+                voter.registration_number: voter
+                for voter in Voter.objects.filter(
+                    election_id=election_id,
+                    registration_number__in=list(voters)
+                ).only('id', 'registration_number', 'email')
+            }
+
+            new_voters, changed = [], []
+            for reg_no, email in voters.items():
+                voter = existing.get(reg_no)
+                if voter is None:
+                    new_voters.append(Voter(election_id=election_id, registration_number=reg_no, email=email))
+                    cls._note_change(totals, 'insert', reg_no, new_email=email)
+                elif voter.email != email:
+                    cls._note_change(totals, 'update', reg_no, old_email=voter.email, new_email=email)
+                    voter.email = email
+                    changed.append(voter)
+
+            if not dry_run:
+                Voter.objects.bulk_create(new_voters, ignore_conflicts=True)
+                Voter.objects.bulk_update(changed, ['email'])
+                if new_voters:
+                    VoterMembershipIndex.invalidate(election_id)
+
+        summary['inserted'] = len(new_voters)
+        summary['updated'] = len(changed)
+        summary['unchanged'] = len(existing) - len(changed)
+        return summary
+
+    @classmethod
+    def _delete_missing(cls, election_id, seen: set, totals: dict, chunk_size: int, dry_run: bool):
+        missing = []
+        rows = Voter.objects.filter(election_id=election_id).values_list(
+            'id', 'registration_number', 'email', 'has_voted'
+        ).iterator(chunk_size=chunk_size)
+        for voter_id, reg_no, email, has_voted in rows:
+            if reg_no in seen:
+                continue
+            if has_voted:
+                # Deleting would cascade to the ballot already cast
+                totals['kept_voted'] += 1
+                continue
+            missing.append(voter_id)
+            cls._note_change(totals, 'delete', reg_no, old_email=email)
+
+        totals['deleted'] = len(missing)
+        if not dry_run:
+            for start in range(0, len(missing), chunk_size):
+                Voter.objects.filter(id__in=missing[start:start + chunk_size], has_voted=False).delete()
+
+    @classmethod
+    def _clean_chunk(cls, chunk: list, summary: dict, errors: list) -> dict:
+        """Validate a chunk, counting invalid and repeated rows into summary. Returns {reg_no: email}."""
+        voters = {}
+        for line_number, record in chunk:
+            reg_no, email, error = cls.clean_record(record)
+            if error:
+                summary['invalid'] += 1
+                if len(errors) < cls.MAX_REPORTED_ERRORS:
+                    errors.append({'line': line_number, 'error': error})
+            elif reg_no in voters:
+                summary['duplicates'] += 1
+            else:
+                voters[reg_no] = email
+        return voters
+
+    @classmethod
+    def _import_chunk(cls, election_id, chunk: list, errors: list, insert) -> dict:
+        summary = {'first_line': chunk[0][0], 'rows': len(chunk), 'inserted': 0, 'duplicates': 0, 'invalid': 0}
+
+        voters = cls._clean_chunk(chunk, summary, errors)
+        if voters:
+            with transaction.atomic():
+                inserted = insert(election_id, voters)
+                if inserted:
+                    VoterMembershipIndex.invalidate(election_id)
+            summary['inserted'] = inserted
+            summary['duplicates'] += len(voters) - inserted
+        return summary
+
+    @classmethod
+    def _insert_orm(cls, election_id, voters: dict) -> int:
+        """One query for registration numbers already on the roll, one bulk INSERT of the rest."""
+        existing = set(Voter.objects.filter(
+            election_id=election_id,
+            registration_number__in=list(voters)
+        ).values_list('registration_number', flat=True))
+
+        new_voters = [
+            Voter(election_id=election_id, registration_number=reg_no, email=email)
+            for reg_no, email in voters.items()
+            if reg_no not in existing
+        ]
+        # ignore_conflicts only matters if another import races this chunk
+        Voter.objects.bulk_create(new_voters, ignore_conflicts=True)
+        return len(new_voters)
+
+    @classmethod
+    def _insert_copy(cls, election_id, voters: dict) -> int:
+        """COPY the chunk into a staging table, then merge it with ON CONFLICT DO NOTHING."""
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(voters.items())
+        buffer.seek(0)
+
+        stage = connection.ops.quote_name(cls.STAGING_TABLE)
+        voter_table = connection.ops.quote_name(Voter._meta.db_table)
+        with connection.cursor() as cursor:
+            # Lives for the session; emptied before every chunk, which also
+            # covers imports running inside an outer transaction
+            cursor.execute(
+                f'CREATE TEMP TABLE IF NOT EXISTS {stage} (registration_number varchar(100), email varchar(254))'
+            )
+            cursor.execute(f'TRUNCATE {stage}')
+            # FORCE_NOT_NULL: an empty email is '', not NULL
+            copy_sql = (
+                f'COPY {stage} (registration_number, email) FROM STDIN '
+                f'WITH (FORMAT csv, FORCE_NOT_NULL (registration_number, email))'
+            )
+            raw = cursor.cursor
+            if hasattr(raw, 'copy_expert'):  # psycopg2
+                raw.copy_expert(copy_sql, buffer)
+            else:  # psycopg 3
+                with raw.copy(copy_sql) as copy:
+                    copy.write(buffer.getvalue())
+
+            cursor.execute(
+                f'WITH inserted AS ('
+                f'  INSERT INTO {voter_table} (election_id, registration_number, email, has_voted, created_at)'
+                f'  SELECT %s, registration_number, email, false, %s FROM {stage}'
+                f'  ON CONFLICT (election_id, registration_number) DO NOTHING'
+                f'  RETURNING 1'
+                f') SELECT count(*) FROM inserted',
+                [int(election_id), timezone.now()]
+            )
+            return cursor.fetchone()[0]
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Election, Position, Voter, Candidate, Vote
+from .models import Election, Position, Voter, Candidate, Vote, AuditLog
 
 class ElectionSerializer(serializers.ModelSerializer):
     class Meta:
@@ -35,3 +35,32 @@ class VoteSerializer(serializers.ModelSerializer):
         model = Vote
         fields = '__all__'
         read_only_fields = ['voted_at']
+
+
+class AuditLogSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AuditLog
+        fields = '__all__'
+
+
+class BallotCandidateSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Candidate
+        fields = ['id', 'name', 'program', 'message', 'profile_photo', 'manifesto']
+
+
+class BallotPositionSerializer(serializers.ModelSerializer):
+    # Filled by BallotPaperService's prefetch with approved candidates only
+    candidates = BallotCandidateSerializer(source='approved_candidates', many=True, read_only=True)
+
+    class Meta:
+        model = Position
+        fields = ['id', 'title', 'description', 'number_of_people', 'caution', 'candidates']
+
+
+class BallotSerializer(serializers.ModelSerializer):
+    positions = BallotPositionSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Election
+        fields = ['id', 'title', 'description', 'election_start_date', 'election_end_date', 'positions']
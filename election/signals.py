@@ -0,0 +1,32 @@
+"""
+Signal handlers for the election app, connected in ElectionConfig.ready().
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .ballot_paper import BallotPaperService
+from .membership import VoterMembershipIndex
+from .models import Candidate, Election, Position, Voter
+
+
+@receiver(post_save, sender=Voter)
+def refresh_voter_index(sender, instance, **kwargs):
+    # A saved voter may be new or renamed; bulk paths invalidate the index themselves
+    VoterMembershipIndex.invalidate(instance.election_id)
+
+
+@receiver(post_save, sender=Election)
+def refresh_ballot_for_election(sender, instance, **kwargs):
+    BallotPaperService.invalidate(instance.id)
+
+
+@receiver([post_save, post_delete], sender=Position)
+def refresh_ballot_for_position(sender, instance, **kwargs):
+    BallotPaperService.invalidate(instance.election_id)
+
+
+@receiver([post_save, post_delete], sender=Candidate)
+def refresh_ballot_for_candidate(sender, instance, **kwargs):
+    election_id = Position.objects.filter(id=instance.position_id).values_list('election_id', flat=True).first()
+    if election_id is not None:
+        BallotPaperService.invalidate(election_id)
+
@@ -0,0 +1,152 @@
+"""
+Tally Service for E-Voting System
+Maintains sharded per-candidate vote counters alongside every cast ballot
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Sum, Value, When
+from .models import Candidate, CandidateTally, Vote
+from collections import Counter
+import random
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class MissingTallyRows(Exception):
+    """Raised when a ballot hits a candidate whose tally shard row does not exist yet."""
+
+
+class TallyService:
+    """Service class to maintain and read candidate vote tallies"""
+
+    DEFAULT_SHARDS = 8
+
+    @classmethod
+    def shard_count(cls) -> int:
+        return max(1, getattr(settings, 'TALLY_SHARDS', cls.DEFAULT_SHARDS))
+
+    @classmethod
+    def record_ballot(cls, ballot: list):
+        """
+        Increment the tally of every candidate on a ballot with one UPDATE.
+
+        A single random shard is used for the whole ballot, so concurrent
+        ballots for a popular candidate are spread over shard_count() rows.
+        Must be called inside the transaction that records the votes.
+
+        Args:
+            ballot: Validated list of (position_id, candidate_id)
+
+        Raises:
+            MissingTallyRows: if a shard row is missing; the caller should roll
+                back, call provision() and retry.
+        """
+        cls.record_ballots([ballot])
+
+    @classmethod
+    def record_ballots(cls, ballots: list):
+        """
+        Increment tallies for a group of ballots with one UPDATE.
+
+        Args:
+            ballots: List of validated ballots
+
+        Raises:
+            MissingTallyRows: see record_ballot()
+        """
+        counts = Counter(candidate_id for ballot in ballots for _, candidate_id in ballot)
+        if not counts:
+            return
+
+        if set(counts.values()) == {1}:
+            increment = Value(1)
+        else:
+            increment = Case(
+                *[When(candidate_id=candidate_id, then=Value(n)) for candidate_id, n in counts.items()],
+                output_field=IntegerField()
+            )
+
+        shard = random.randrange(cls.shard_count())
+        updated = CandidateTally.objects.filter(
+            candidate_id__in=list(counts),
+            shard=shard
+        ).update(votes=F('votes') + increment)
+
+        if updated != len(counts):
+            raise MissingTallyRows(list(counts))
+
+    @classmethod
+    def provision(cls, candidate_ids):
+        """
+        Create zeroed tally rows for every shard of the given candidates.
+        Existing rows are left untouched.
+
+        Args:
+            candidate_ids: Iterable of candidate primary keys
+        """
+        candidates = Candidate.objects.filter(id__in=list(candidate_ids)).values_list(
+            'id', 'position_id', 'position__election_id'
+        )
+        CandidateTally.objects.bulk_create(
+            [
+                CandidateTally(
+                    election_id=election_id,
+                    position_id=position_id,
+                    candidate_id=candidate_id,
+                    shard=shard
+                )
+                for candidate_id, position_id, election_id in candidates
+                for shard in range(cls.shard_count())
+            ],
+            ignore_conflicts=True
+        )
+
+    @classmethod
+    def get_totals(cls, election_id) -> dict:
+        """
+        Read the vote totals of an election from the tally table.
+
+        Args:
+            election_id: The election to read
+
+        Returns:
+            dict: {candidate_id: votes}
+        """
+        rows = (
+            CandidateTally.objects.filter(election_id=election_id)
+            .values('candidate_id')
+            .annotate(total=Sum('votes'))
+        )
+        return {row['candidate_id']: row['total'] for row in rows}
+
+    @classmethod
+    def rebuild(cls, election_id) -> int:
+        """
+        Recompute the tallies of an election from the Vote table.
+        Only safe while no ballots are being cast for the election.
+
+        Args:
+            election_id: The election to rebuild
+
+        Returns:
+            int: Number of votes counted
+        """
+        rows = (
+            Vote.objects.filter(position__election_id=election_id)
+            .values('candidate_id')
+            .annotate(total=Count('id'))
+        )
+        counts = {row['candidate_id']: row['total'] for row in rows}
+
+        with transaction.atomic():
+            CandidateTally.objects.filter(election_id=election_id).delete()
+            candidate_ids = Candidate.objects.filter(
+                position__election_id=election_id
+            ).values_list('id', flat=True)
+            cls.provision(candidate_ids)
+            for candidate_id, total in counts.items():
+                CandidateTally.objects.filter(candidate_id=candidate_id, shard=0).update(votes=total)
+
+        logger.info(f"Rebuilt tallies for election {election_id}: {sum(counts.values())} votes")
+        return sum(counts.values())
@@ -0,0 +1,60 @@
+"""
+Test helpers for query-budget assertions.
+
+Mix QueryBudgetMixin into an APITestCase to declare how many SQL queries an
+endpoint may run, and to check that list endpoints run the same number of
+queries however many rows they return (no N+1).
+"""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+
+    def count_queries(self, url, method='get', data=None):
+        """
+        Call an endpoint and count the SQL queries it ran.
+
+        Returns:
+            tuple: (response, list of executed SQL strings)
+        """
+        with CaptureQueriesContext(connection) as ctx:
+            response = getattr(self.client, method)(url, data, format='json')
+        return response, [q['sql'] for q in ctx.captured_queries]
+
+    def assertQueryBudget(self, url, budget, method='get', data=None, status_code=None):
+        """Fail if the endpoint runs more than `budget` queries."""
+        response, queries = self.count_queries(url, method, data)
+        if status_code is not None:
+            self.assertEqual(response.status_code, status_code, getattr(response, 'data', None))
+        self.assertLessEqual(
+            len(queries), budget,
+            f'{method.upper()} {url} ran {len(queries)} queries, budget is {budget}:\n' + '\n'.join(queries)
+        )
+        return response
+
+    def assertConstantQueries(self, url, seed, sizes=(1, 10), budget=None, method='get', data=None):
+        """
+        Fail if the query count of an endpoint grows with the dataset.
+
+        Args:
+            url: Endpoint to call
+            seed: Callable seed(n) that makes sure n rows exist
+            sizes: Dataset sizes to compare, smallest first
+            budget: Optional upper bound for every size
+        """
+        counts = {}
+        for size in sizes:
+            seed(size)
+            response, queries = self.count_queries(url, method, data)
+            self.assertLess(response.status_code, 400, getattr(response, 'data', None))
+            counts[size] = queries
+
+        lengths = {size: len(queries) for size, queries in counts.items()}
+        self.assertEqual(
+            len(set(lengths.values())), 1,
+            f'{method.upper()} {url} query count grows with row count {lengths}:\n'
+            + '\n'.join(counts[sizes[-1]])
+        )
+        if budget is not None:
+            self.assertLessEqual(lengths[sizes[0]], budget, f'{url} ran {lengths[sizes[0]]} queries, budget is {budget}')
@@ -1,3 +1,1178 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock, skipUnless
+import json
+import threading
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+
+from django.core import mail
+from django.core.cache import cache
+from django.db import connection
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from django.contrib.auth import get_user_model
+from backend.metrics import registry
+from django.core.mail.backends.base import BaseEmailBackend
+from accounts.models import EmailOTP, OutboundEmail
+from accounts.outbox import MailOutbox
+from .models import (
+    Election, Position, Voter, Candidate, Vote, CandidateTally, ElectionResultSnapshot, MailCampaign, TurnoutBucket,
+    AuditLog,
+)
+from .tally_service import TallyService
+from .turnout_service import TurnoutService
+from .live_stream import Broadcaster, ElectionFeed, format_event
+from .ballot_service import BallotService
+from .vote_ingest import GroupCommitBuffer
+from .mail_merge import MailMergeService
+from .ballot_token import BallotTokenService
+from .roll_import import RollImportService
+from .roll_export import RollExportService
+from .throttling import local_buckets
+from .membership import BloomFilter, VoterMembershipIndex
+from .otp_store import CacheOTPStore, DatabaseOTPStore, OTPStore, get_otp_store, CONSUMED, INVALID, EXPIRED
+from .testing import QueryBudgetMixin
+
+User = get_user_model()
+
+class FailingEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise ConnectionError('SMTP server unavailable')
+
+
+class ElectionFixtureMixin:
+    """Builds a small election with two positions and approved candidates."""
+
+    def provision_turnout(self):
+        # Rows for this minute and the next, so a cast finds its turnout bucket
+        now = timezone.now()
+        for moment in (now, now + timedelta(minutes=1)):
+            TurnoutService.provision(self.election.id, moment)
+
+    def create_election(self, positions=2, candidates_per_position=2):
+        # Every test reuses election ids and registration numbers, so start
+        # each one with empty throttle buckets and shared counters
+        local_buckets.clear()
+        cache.clear()
+        now = timezone.now()
+        self.officer = User.objects.create_user(username='officer', email='officer@example.com', password='pw12345')
+        self.election = Election.objects.create(
+            title='Guild Elections',
+            description='Annual guild elections',
+            nomination_start_date=now - timedelta(days=10),
+            nomination_end_date=now - timedelta(days=5),
+            election_start_date=now - timedelta(hours=1),
+            election_end_date=now + timedelta(hours=8),
+            created_by=self.officer,
+        )
+        self.positions = []
+        self.candidates = {}
+        for p in range(positions):
+            position = Position.objects.create(
+                election=self.election, title=f'Position {p}', description='', duration='1 year'
+            )
+            self.positions.append(position)
+            self.candidates[position.id] = [
+                Candidate.objects.create(
+                    position=position, user=self.officer, name=f'Candidate {p}-{c}',
+                    email=f'c{p}{c}@example.com', program='BSc', message='Vote for me',
+                    status='approved',
+                )
+                for c in range(candidates_per_position)
+            ]
+        self.voter = Voter.objects.create(
+            election=self.election, registration_number='REG001', email='voter@example.com'
+        )
+
+    def full_ballot(self, choice=0):
+        return {str(p.id): str(self.candidates[p.id][choice].id) for p in self.positions}
+
+    def ballot_token(self, reg_no='REG001'):
+        """Token verify_otp would have issued to this voter."""
+        voter = Voter.objects.get(election=self.election, registration_number=reg_no)
+        return BallotTokenService.issue(voter.id, self.election.id)
+
+
+class VotingCastTests(ElectionFixtureMixin, APITestCase):
+    def setUp(self):
+        self.create_election()
+        self.cast_url = reverse('voting-cast')
+
+    def cast(self, votes, reg_no='REG001', token=None):
+        return self.client.post(
+            self.cast_url,
+            {'ballotToken': token or self.ballot_token(reg_no), 'election': self.election.id, 'votes': votes},
+            format='json',
+        )
+
+    def test_cast_records_every_vote_and_marks_voter(self):
+        resp = self.cast(self.full_ballot())
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(resp.data['votes_count'], 2)
+        self.assertEqual(Vote.objects.filter(voter=self.voter).count(), 2)
+        self.voter.refresh_from_db()
+        self.assertTrue(self.voter.has_voted)
+        self.assertIsNotNone(self.voter.voted_at)
+
+    def test_second_cast_is_rejected(self):
+        self.cast(self.full_ballot())
+        resp = self.cast(self.full_ballot(choice=1))
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Vote.objects.filter(voter=self.voter).count(), 2)
+
+    def test_invalid_candidate_writes_nothing(self):
+        ballot = self.full_ballot()
+        other_position = self.positions[1]
+        ballot[str(self.positions[0].id)] = str(self.candidates[other_position.id][0].id)
+        resp = self.cast(ballot)
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Vote.objects.exists())
+        self.voter.refresh_from_db()
+        self.assertFalse(self.voter.has_voted)
+
+    def test_padded_position_key_cannot_vote_twice(self):
+        ballot = self.full_ballot()
+        position_id = str(self.positions[0].id)
+        ballot['0' + position_id] = ballot[position_id]
+        resp = self.cast(ballot)
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('More than one selection', resp.data['error'])
+        self.assertFalse(Vote.objects.exists())
+
+    def test_cast_requires_a_valid_ballot_token(self):
+        resp = self.client.post(self.cast_url, {'regNo': 'REG001', 'votes': self.full_ballot()}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        forged = self.ballot_token()[:-2] + 'xx'
+        resp = self.client.post(self.cast_url, {'ballotToken': forged, 'votes': self.full_ballot()}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        token = self.ballot_token()
+        with override_settings(BALLOT_TOKEN_TTL=-1):
+            resp = self.client.post(self.cast_url, {'ballotToken': token, 'votes': self.full_ballot()}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertFalse(Vote.objects.exists())
+
+    def test_cast_query_count_is_independent_of_ballot_size(self):
+        TallyService.provision(c.id for cs in self.candidates.values() for c in cs)
+        self.provision_turnout()
+        # candidate check, savepoint, has_voted update, bulk insert, tally update,
+        # turnout update, release; the ballot token replaces the voter lookup
+        token = self.ballot_token()
+        with self.assertNumQueries(7):
+            resp = self.cast(self.full_ballot(), token=token)
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+
+
+class TallyTests(ElectionFixtureMixin, APITestCase):
+    def setUp(self):
+        self.create_election()
+        Voter.objects.create(election=self.election, registration_number='REG002', email='v2@example.com')
+        Voter.objects.create(election=self.election, registration_number='REG003', email='v3@example.com')
+        self.cast_url = reverse('voting-cast')
+
+    def cast(self, reg_no, choice):
+        return self.client.post(
+            self.cast_url,
+            {'ballotToken': self.ballot_token(reg_no), 'election': self.election.id, 'votes': self.full_ballot(choice)},
+            format='json',
+        )
+
+    def expected_totals(self):
+        return {
+            c.id: Vote.objects.filter(candidate=c).count()
+            for cs in self.candidates.values() for c in cs
+        }
+
+    def test_cast_updates_tallies_without_provisioning(self):
+        self.cast('REG001', 0)
+        self.cast('REG002', 0)
+        self.cast('REG003', 1)
+        totals = TallyService.get_totals(self.election.id)
+        for candidate_id, count in self.expected_totals().items():
+            self.assertEqual(totals.get(candidate_id, 0), count)
+        self.assertEqual(sum(totals.values()), 6)
+
+    def test_rejected_ballot_does_not_touch_tallies(self):
+        self.cast('REG001', 0)
+        self.cast('REG001', 1)
+        self.assertEqual(sum(TallyService.get_totals(self.election.id).values()), 2)
+
+    def test_rebuild_matches_vote_table(self):
+        self.cast('REG001', 0)
+        self.cast('REG002', 1)
+        CandidateTally.objects.filter(election=self.election).update(votes=0)
+        self.assertEqual(TallyService.rebuild(self.election.id), 4)
+        totals = TallyService.get_totals(self.election.id)
+        for candidate_id, count in self.expected_totals().items():
+            self.assertEqual(totals[candidate_id], count)
+
+
+class ElectionResultsTests(ElectionFixtureMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.create_election(positions=1, candidates_per_position=3)
+        self.position = self.positions[0]
+        for n in range(2, 5):
+            Voter.objects.create(election=self.election, registration_number=f'REG00{n}', email=f'v{n}@example.com')
+        self.results_url = reverse('election-results', args=[self.election.id])
+
+    def vote(self, reg_no, choice):
+        self.client.post(
+            reverse('voting-cast'),
+            {'ballotToken': self.ballot_token(reg_no), 'election': self.election.id, 'votes': self.full_ballot(choice)},
+            format='json',
+        )
+
+    def test_live_results_report_totals_and_winner(self):
+        self.vote('REG001', 0)
+        self.vote('REG002', 0)
+        self.vote('REG003', 1)
+        resp = self.client.get(self.results_url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['phase'], 'live')
+        self.assertEqual(resp.data['turnout'], {'registered': 4, 'voted': 3})
+        position = resp.data['positions'][0]
+        self.assertEqual(position['total_votes'], 3)
+        self.assertEqual(position['winners'], [self.candidates[self.position.id][0].id])
+
+    def test_multi_seat_position_reports_ties(self):
+        self.position.number_of_people = 2
+        self.position.save()
+        self.vote('REG001', 0)
+        self.vote('REG002', 0)
+        self.vote('REG003', 1)
+        self.vote('REG004', 2)
+        position = self.client.get(self.results_url).data['positions'][0]
+        first, second, third = self.candidates[self.position.id]
+        self.assertEqual(position['winners'], [first.id])
+        self.assertEqual(position['tied'], [second.id, third.id])
+
+    def test_results_are_frozen_after_polls_close(self):
+        self.vote('REG001', 0)
+        self.election.election_end_date = timezone.now() - timedelta(minutes=1)
+        self.election.save()
+
+        resp = self.client.get(self.results_url)
+        self.assertEqual(resp.data['phase'], 'final')
+        self.assertTrue(ElectionResultSnapshot.objects.filter(election=self.election).exists())
+
+        # Late writes to the tallies must not change the frozen results
+        CandidateTally.objects.filter(election=self.election).update(votes=100)
+        cache.clear()
+        resp = self.client.get(self.results_url)
+        self.assertEqual(resp.data['positions'][0]['total_votes'], 1)
+
+
+class LiveStreamTests(ElectionFixtureMixin, APITestCase):
+    def setUp(self):
+        self.create_election(positions=1)
+
+    def test_broadcaster_fans_out_one_frame(self):
+        async def scenario():
+            broadcaster = Broadcaster(queue_size=2)
+            queues = [broadcaster.subscribe(1) for _ in range(3)]
+            frame = format_event('turnout', {'voted': 1})
+            self.assertEqual(broadcaster.publish(1, frame), 3)
+            for queue in queues:
+                self.assertIs(await queue.get(), frame)
+            # A slow subscriber drops its oldest frames instead of blocking
+            for n in range(3):
+                broadcaster.publish(1, str(n))
+            self.assertEqual([queues[0].get_nowait() for _ in range(2)], ['1', '2'])
+            for queue in queues:
+                broadcaster.unsubscribe(1, queue)
+            self.assertEqual(broadcaster.subscriber_count(1), 0)
+
+        async_to_sync(scenario)()
+
+    def test_feed_publishes_turnout_and_tally_deltas(self):
+        def cast():
+            self.client.post(
+                reverse('voting-cast'),
+                {'ballotToken': self.ballot_token(), 'election': self.election.id, 'votes': self.full_ballot()},
+                format='json',
+            )
+
+        async def scenario():
+            feed = ElectionFeed(broadcaster=Broadcaster(), interval=3600)
+            queues = [await feed.subscribe(self.election.id) for _ in range(2)]
+            for queue in queues:
+                self.assertTrue(queue.get_nowait().startswith('event: snapshot'))
+
+            self.assertEqual(await feed.poll(self.election.id), 0)
+            await sync_to_async(cast)()
+            self.assertEqual(await feed.poll(self.election.id), 2)
+            for queue in queues:
+                turnout, tally = queue.get_nowait(), queue.get_nowait()
+                self.assertIn('"voted":1', turnout)
+                self.assertIn('"delta":1', tally)
+
+            for queue in queues:
+                await feed.unsubscribe(self.election.id, queue)
+
+        async_to_sync(scenario)()
+
+    def test_stream_refuses_wsgi_requests(self):
+        resp = self.client.get(reverse('election-stream', args=[self.election.id]))
+        self.assertEqual(resp.status_code, 503)
+
+
+class GroupCommitTests(ElectionFixtureMixin, APITestCase):
+    def setUp(self):
+        self.create_election()
+        self.voter2 = Voter.objects.create(election=self.election, registration_number='REG002', email='v2@example.com')
+
+    def ballot(self, choice):
+        return [(p.id, self.candidates[p.id][choice].id) for p in self.positions]
+
+    def test_cast_batch_rejects_double_votes_in_and_across_batches(self):
+        results = BallotService.cast_batch([
+            (self.voter.id, self.ballot(0)),
+            (self.voter2.id, self.ballot(0)),
+            (self.voter.id, self.ballot(1)),
+        ])
+        self.assertEqual([r['success'] for r in results], [True, True, False])
+        self.assertEqual(Vote.objects.count(), 4)
+        totals = TallyService.get_totals(self.election.id)
+        self.assertEqual(totals[self.candidates[self.positions[0].id][0].id], 2)
+
+        results = BallotService.cast_batch([(self.voter2.id, self.ballot(1))])
+        self.assertFalse(results[0]['success'])
+        self.assertEqual(Vote.objects.count(), 4)
+
+    def test_buffer_acknowledges_each_ballot_after_its_group_commits(self):
+        batches = []
+
+        def flush(items):
+            batches.append(items)
+            return [{'success': True, 'error': None, 'votes_count': len(b)} for _, b in items]
+
+        buffer = GroupCommitBuffer(max_batch=10, interval_ms=50, flush=flush)
+        results = [None] * 5
+
+        def submit(n):
+            results[n] = buffer.submit(n, [(1, n)], timeout=5)
+
+        threads = [threading.Thread(target=submit, args=(n,)) for n in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertTrue(all(r['success'] for r in results))
+        self.assertEqual(sum(len(b) for b in batches), 5)
+        self.assertLess(len(batches), 5)
+
+    @override_settings(VOTE_INGESTION_MODE='group')
+    def test_unacknowledged_cast_is_pending_not_failed(self):
+        token = self.ballot_token()
+        with mock.patch.object(GroupCommitBuffer, 'submit', side_effect=TimeoutError('no ack')):
+            resp = self.client.post(
+                reverse('voting-cast'), {'ballotToken': token, 'votes': self.full_ballot()}, format='json'
+            )
+        self.assertEqual(resp.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(resp.data['status'], 'pending')
+
+        resp = self.client.post(reverse('voting-cast-status'), {'ballotToken': token}, format='json')
+        self.assertEqual(resp.data['status'], 'not_recorded')
+        BallotService.cast_ballot(self.voter.id, self.ballot(0), self.election.id)
+        resp = self.client.post(reverse('voting-cast-status'), {'ballotToken': token}, format='json')
+        self.assertEqual(resp.data['status'], 'recorded')
+
+
+class IdempotencyTests(ElectionFixtureMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.create_election()
+
+    def post(self, name, data, key):
+        return self.client.post(reverse(name), data, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retried_cast_replays_without_queries(self):
+        data = {'ballotToken': self.ballot_token(), 'election': self.election.id, 'votes': self.full_ballot()}
+        first = self.post('voting-cast', data, 'cast-key-1')
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+
+        with self.assertNumQueries(0):
+            retry = self.post('voting-cast', data, 'cast-key-1')
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Vote.objects.count(), 2)
+
+    def test_retried_request_otp_sends_one_email(self):
+        data = {'regNo': 'REG001', 'election': self.election.id}
+        self.post('voting-request-otp', data, 'otp-key-1')
+        self.post('voting-request-otp', data, 'otp-key-1')
+        self.assertEqual(EmailOTP.objects.filter(email='voter@example.com').count(), 1)
+        self.assertEqual(OutboundEmail.objects.filter(to_email='voter@example.com').count(), 1)
+
+    def test_key_reused_with_different_body_is_rejected(self):
+        self.post('voting-request-otp', {'regNo': 'REG001', 'election': self.election.id}, 'otp-key-2')
+        resp = self.post('voting-request-otp', {'regNo': 'REG999', 'election': self.election.id}, 'otp-key-2')
+        self.assertEqual(resp.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+
+class MetricsTests(ElectionFixtureMixin, APITestCase):
+    def setUp(self):
+        registry.reset()
+        self.create_election()
+
+    @override_settings(METRICS_TOKEN='s3cret')
+    def test_metrics_report_latency_and_queries_per_view(self):
+        self.client.get(reverse('election-list'))
+        self.client.get(reverse('election-list'))
+        resp = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer s3cret')
+        self.assertEqual(resp.status_code, 200)
+        body = resp.content.decode()
+        labels = 'view="election-list",method="GET",status="200"'
+        self.assertIn(f'http_request_duration_seconds_count{{{labels}}} 2', body)
+        self.assertIn(f'http_request_sql_queries_bucket{{{labels},le="2"}} 2', body)
+        self.assertIn(f'http_request_sql_seconds_total{{{labels}}}', body)
+
+    @override_settings(METRICS_TOKEN='', DEBUG=False)
+    def test_metrics_are_hidden_without_a_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 404)
+
+    @override_settings(METRICS_TOKEN='s3cret')
+    def test_metrics_token_is_enforced(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        resp = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer s3cret')
+        self.assertEqual(resp.status_code, 200)
+
+
+class QueryBudgetTests(QueryBudgetMixin, ElectionFixtureMixin, APITestCase):
+    """Query budgets for every router-registered viewset in election/urls.py."""
+
+    def setUp(self):
+        cache.clear()
+        self.create_election()
+        # Budgets are for the steady state, once the voter index is built
+        VoterMembershipIndex.might_contain(self.election.id, 'REG001')
+        self.client.force_authenticate(self.officer)
+
+    def seed_elections(self, n):
+        now = timezone.now()
+        while Election.objects.count() < n:
+            Election.objects.create(
+                title='Extra', description='', nomination_start_date=now, nomination_end_date=now,
+                election_start_date=now, election_end_date=now + timedelta(hours=1), created_by=self.officer,
+            )
+
+    def seed_positions(self, n):
+        while Position.objects.filter(election=self.election).count() < n:
+            Position.objects.create(election=self.election, title='Extra', description='', duration='1 year')
+
+    def seed_voters(self, n):
+        existing = Voter.objects.filter(election=self.election).count()
+        Voter.objects.bulk_create([
+            Voter(election=self.election, registration_number=f'SEED{i}', email=f'seed{i}@example.com')
+            for i in range(existing, n)
+        ])
+
+    def seed_candidates(self, n):
+        position = self.positions[0]
+        for i in range(Candidate.objects.count(), n):
+            Candidate.objects.create(
+                position=position, user=self.officer, name=f'Seed {i}', email=f'seed{i}@example.com',
+                program='', message='', status='approved',
+            )
+
+    def test_election_endpoints(self):
+        self.assertConstantQueries(reverse('election-list'), self.seed_elections, budget=2)
+        self.assertQueryBudget(reverse('election-detail', args=[self.election.id]), 2, status_code=200)
+        self.assertQueryBudget(reverse('election-results', args=[self.election.id]), 5, status_code=200)
+
+    def test_position_endpoints(self):
+        url = f"{reverse('position-list')}?election={self.election.id}"
+        self.assertConstantQueries(url, self.seed_positions, sizes=(2, 12), budget=1)
+        self.assertQueryBudget(reverse('position-detail', args=[self.positions[0].id]), 1, status_code=200)
+
+    def test_voter_endpoints(self):
+        self.assertConstantQueries(reverse('voter-list'), self.seed_voters, budget=1)
+        self.assertQueryBudget(
+            reverse('voter-verify'), 1, method='post',
+            data={'regNo': 'REG001', 'election': self.election.id}, status_code=200,
+        )
+
+    def test_candidate_endpoints(self):
+        self.client.force_authenticate(None)
+        self.assertConstantQueries(reverse('candidate-list'), self.seed_candidates, sizes=(4, 14), budget=2)
+        candidate = self.candidates[self.positions[0].id][0]
+        self.assertQueryBudget(reverse('candidate-detail', args=[candidate.id]), 2, status_code=200)
+
+    def seed_audit_logs(self, n):
+        existing = AuditLog.objects.count()
+        AuditLog.objects.bulk_create([
+            AuditLog(election=self.election, action='VOTE_CAST', voter_reg_no=f'SEED{i}') for i in range(existing, n)
+        ])
+
+    def test_audit_log_endpoints(self):
+        self.officer.is_staff = True
+        self.officer.save()
+        self.assertConstantQueries(reverse('auditlog-list'), self.seed_audit_logs, budget=1)
+        entry = AuditLog.objects.first()
+        self.assertQueryBudget(reverse('auditlog-detail', args=[entry.id]), 1, status_code=200)
+
+    def test_voting_endpoints(self):
+        self.client.force_authenticate(None)
+        base = {'regNo': 'REG001', 'election': self.election.id}
+        self.assertQueryBudget(reverse('voting-request-otp'), 4, method='post', data=base, status_code=200)
+        code = EmailOTP.objects.get(email='voter@example.com', used=False).code
+        verified = self.assertQueryBudget(
+            reverse('voting-verify-otp'), 3, method='post', data={**base, 'otp': code}, status_code=200,
+        )
+        TallyService.provision(c.id for cs in self.candidates.values() for c in cs)
+        self.provision_turnout()
+        self.assertQueryBudget(
+            reverse('voting-cast'), 7, method='post', status_code=201,
+            data={'ballotToken': verified.data['ballot_token'], 'votes': self.full_ballot()},
+        )
+
+
+@override_settings(EMAIL_OUTBOX_WORKERS=0)
+class MailOutboxTests(ElectionFixtureMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.create_election()
+
+    def test_request_otp_queues_mail_and_reports_delivery(self):
+        resp = self.client.post(
+            reverse('voting-request-otp'), {'regNo': 'REG001', 'election': self.election.id}, format='json'
+        )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn(EmailOTP.objects.get(email='voter@example.com').code, mail.outbox[0].body)
+
+        status_resp = self.client.get(reverse('voting-delivery-status'), {'id': resp.data['delivery_id']})
+        self.assertEqual(status_resp.data['status'], 'sent')
+        self.assertEqual(OutboundEmail.objects.get().body, '')
+
+    def test_unknown_delivery_id(self):
+        resp = self.client.get(reverse('voting-delivery-status'), {'id': 'not-a-uuid'})
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(EMAIL_BACKEND='election.tests.FailingEmailBackend', EMAIL_OUTBOX_MAX_ATTEMPTS=2)
+    def test_failed_delivery_is_retried_with_backoff_then_abandoned(self):
+        message = MailOutbox.enqueue('x@example.com', 'Subject', 'secret', kind='otp', sensitive=True)
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), ('pending', 1))
+        self.assertGreater(message.next_attempt_at, timezone.now())
+        self.assertEqual(MailOutbox.process_due(), 0)
+
+        OutboundEmail.objects.filter(id=message.id).update(next_attempt_at=timezone.now())
+        MailOutbox.process_due()
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts, message.body), ('failed', 2, ''))
+        self.assertIn('SMTP server unavailable', message.last_error)
+
+
+    @override_settings(EMAIL_BACKEND='election.tests.FailingEmailBackend', EMAIL_OUTBOX_WORKERS=2)
+    def test_failed_deliveries_share_one_retry_scheduler(self):
+        OutboundEmail.objects.bulk_create([
+            OutboundEmail(to_email=f'r{n}@example.com', subject='Subject', body='Body') for n in range(5)
+        ])
+        release = threading.Event()
+        self.addCleanup(setattr, MailOutbox, '_scheduler_pid', None)
+        self.addCleanup(release.set)
+        with mock.patch.object(MailOutbox, '_run_scheduler', side_effect=lambda: release.wait(5)):
+            MailOutbox.process_due()
+            schedulers = [t for t in threading.enumerate() if t.name == 'mail-outbox-retry']
+        self.assertEqual(len(schedulers), 1)
+        self.assertEqual(OutboundEmail.objects.filter(status='pending', attempts=1).count(), 5)
+
+
+@override_settings(EMAIL_OUTBOX_WORKERS=0)
+class MailCampaignTests(ElectionFixtureMixin, APITestCase):
+    def setUp(self):
+        self.create_election()
+        Voter.objects.bulk_create([
+            Voter(election=self.election, registration_number=f'REG1{n:02d}', email=f'v{n}@example.com',
+                  has_voted=n % 2 == 0)
+            for n in range(6)
+        ])
+        Voter.objects.create(election=self.election, registration_number='NOMAIL', email='')
+
+    def run_campaign(self, kind, **kwargs):
+        campaign = MailMergeService.create_campaign(self.election, kind)
+        result = MailMergeService.run(campaign.id, chunk_size=2, senders=2, rate=0, **kwargs)
+        campaign.refresh_from_db()
+        return campaign, result
+
+    def test_invitations_reach_every_voter_with_an_email(self):
+        campaign, result = self.run_campaign(MailCampaign.KIND_INVITATION)
+        self.assertTrue(result['success'])
+        self.assertEqual((campaign.status, campaign.sent), ('completed', 7))
+        self.assertEqual(
+            sorted(m.to[0] for m in mail.outbox),
+            sorted(Voter.objects.exclude(email='').values_list('email', flat=True))
+        )
+
+    def test_reminders_skip_voters_who_voted(self):
+        campaign, _ = self.run_campaign(MailCampaign.KIND_REMINDER)
+        self.assertEqual(campaign.sent, 4)
+        self.assertNotIn('v0@example.com', [m.to[0] for m in mail.outbox])
+
+    def test_interrupted_campaign_resumes_from_checkpoint(self):
+        def interrupt(campaign):
+            if campaign.sent >= 4:
+                raise RuntimeError('worker stopped')
+
+        campaign, result = self.run_campaign(MailCampaign.KIND_INVITATION, progress=interrupt)
+        self.assertFalse(result['success'])
+        self.assertEqual((campaign.status, campaign.sent), ('failed', 4))
+
+        MailMergeService.run(campaign.id, chunk_size=2, senders=2, rate=0)
+        campaign.refresh_from_db()
+        self.assertEqual((campaign.status, campaign.sent), ('completed', 7))
+        self.assertEqual(len(mail.outbox), 7)
+        self.assertFalse(MailMergeService.run(campaign.id)['success'])
+
+    @override_settings(EMAIL_BACKEND='election.tests.FailingEmailBackend')
+    def test_failed_sends_are_handed_to_the_outbox(self):
+        campaign, _ = self.run_campaign(MailCampaign.KIND_REMINDER)
+        self.assertEqual((campaign.sent, campaign.failed), (0, 4))
+        self.assertEqual(OutboundEmail.objects.filter(kind='reminder').count(), 4)
+
+    @override_settings(EMAIL_BACKEND='election.tests.FailingEmailBackend', EMAIL_OUTBOX_WORKERS=2)
+    def test_failed_chunk_does_not_start_a_thread_per_message(self):
+        release = threading.Event()
+        self.addCleanup(setattr, MailOutbox, '_scheduler_pid', None)
+        self.addCleanup(release.set)
+        with mock.patch.object(MailOutbox, '_run_scheduler', side_effect=lambda: release.wait(5)):
+            before = threading.active_count()
+            with self.captureOnCommitCallbacks(execute=True):
+                campaign, _ = self.run_campaign(MailCampaign.KIND_INVITATION)
+            self.assertEqual(campaign.failed, 7)
+            self.assertLessEqual(threading.active_count() - before, 1)
+        self.assertEqual(OutboundEmail.objects.filter(kind='invitation', status='pending', attempts=1).count(), 7)
+
+
+class OTPStoreTests(QueryBudgetMixin, ElectionFixtureMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.create_election()
+
+    def test_partial_store_fails_when_created(self):
+        class IssueOnlyStore(OTPStore):
+            def issue(self, email, code, ttl):
+                pass
+
+        with self.assertRaises(TypeError):
+            IssueOnlyStore()
+
+    def test_cache_store_consumes_each_code_once(self):
+        store = CacheOTPStore()
+        store.issue('a@example.com', '111111', 60)
+        store.issue('a@example.com', '222222', 60)
+        self.assertEqual(store.consume('a@example.com', '111111'), INVALID)
+        self.assertEqual(store.consume('a@example.com', '222222'), CONSUMED)
+        self.assertEqual(store.consume('a@example.com', '222222'), INVALID)
+        self.assertIsNone(store.peek('a@example.com'))
+
+    def test_database_store_reports_expired_codes(self):
+        store = DatabaseOTPStore()
+        store.issue('a@example.com', '111111', 60)
+        EmailOTP.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(store.consume('a@example.com', '111111'), EXPIRED)
+
+    @override_settings(OTP_STORE='cache')
+    def test_voting_flow_with_cache_store_writes_no_otp_rows(self):
+        base = {'regNo': 'REG001', 'election': self.election.id}
+        VoterMembershipIndex.might_contain(self.election.id, 'REG001')
+        self.assertQueryBudget(reverse('voting-request-otp'), 2, method='post', data=base, status_code=200)
+        code = get_otp_store().peek('voter@example.com')
+        self.assertIn(code, OutboundEmail.objects.get().body)
+        self.assertFalse(EmailOTP.objects.exists())
+
+        self.assertQueryBudget(
+            reverse('voting-verify-otp'), 1, method='post', data={**base, 'otp': code}, status_code=200
+        )
+        resp = self.client.post(reverse('voting-verify-otp'), {**base, 'otp': code}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(
+    VOTING_THROTTLE_ENABLED=True,
+    VOTING_THROTTLE_RATES={'request_otp': {'ip': '100/min', 'reg_no': '2/min'}},
+)
+class ThrottleTests(ElectionFixtureMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        local_buckets.clear()
+        self.create_election()
+
+    def request_otp(self, reg_no='REG001'):
+        return self.client.post(
+            reverse('voting-request-otp'), {'regNo': reg_no, 'election': self.election.id}, format='json'
+        )
+
+    def test_rejected_requests_run_no_queries(self):
+        for _ in range(2):
+            self.assertEqual(self.request_otp().status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            resp = self.request_otp()
+        self.assertEqual(resp.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', resp)
+        self.assertEqual(self.request_otp('REG999').status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(VOTING_THROTTLE_RATES={'cast': {'reg_no': '2/min'}})
+    def test_cast_is_limited_per_voter_by_ballot_token(self):
+        token = self.ballot_token()
+        codes = [
+            self.client.post(reverse('voting-cast'), {'ballotToken': token, 'votes': {'0': '0'}}, format='json').status_code
+            for _ in range(3)
+        ]
+        self.assertEqual(codes, [400, 400, 429])
+
+    @override_settings(VOTING_THROTTLE_RATES={'request_otp': {'ip': '2/min'}})
+    def test_forwarded_for_header_does_not_reset_the_ip_limit(self):
+        codes = [
+            self.client.post(
+                reverse('voting-request-otp'), {'regNo': f'NOPE{n}', 'election': self.election.id},
+                format='json', HTTP_X_FORWARDED_FOR=f'10.0.0.{n}',
+            ).status_code
+            for n in range(4)
+        ]
+        self.assertEqual(codes, [404, 404, 429, 429])
+
+    @override_settings(VOTING_THROTTLE_RATES={'request_otp': {'reg_no': '2/min'}})
+    def test_padded_election_ids_share_one_bucket(self):
+        codes = [
+            self.client.post(
+                reverse('voting-request-otp'), {'regNo': 'REG001', 'election': election}, format='json'
+            ).status_code
+            for election in (str(self.election.id), f'0{self.election.id}', f'00{self.election.id}')
+        ]
+        self.assertEqual(codes[2], status.HTTP_429_TOO_MANY_REQUESTS)
+        resp = self.client.post(reverse('voting-request-otp'), {'regNo': 'REG001', 'election': 'x'}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_shared_counter_applies_across_processes(self):
+        self.request_otp()
+        self.request_otp()
+        local_buckets.clear()  # as seen by another worker process
+        self.assertEqual(self.request_otp().status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+
+@override_settings(ROLL_IMPORT_CHUNK_SIZE=2)
+class RollImportTests(ElectionFixtureMixin, APITestCase):
+    def setUp(self):
+        self.create_election()
+        self.client.force_authenticate(self.officer)
+
+    def upload(self, name, content, **extra):
+        return self.client.post(
+            reverse('voter-import-roll'),
+            {'file': SimpleUploadedFile(name, content.encode()), 'election': self.election.id, **extra},
+            format='multipart',
+        )
+
+    def test_csv_import_reports_exact_counts(self):
+        resp = self.upload('roll.csv', (
+            'registration_number,email\n'
+            'REG001,voter@example.com\n'   # already on the roll
+            'REG100,a@example.com\n'
+            'REG101,\n'
+            'REG100,a@example.com\n'       # repeated in a later chunk
+            ',missing@example.com\n'
+            'REG102,not-an-email\n'
+        ))
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            {k: resp.data[k] for k in ('rows', 'inserted', 'duplicates', 'invalid', 'chunks')},
+            {'rows': 6, 'inserted': 2, 'duplicates': 2, 'invalid': 2, 'chunks': 3},
+        )
+        self.assertEqual([e['line'] for e in resp.data['errors']], [6, 7])
+        self.assertEqual(Voter.objects.get(registration_number='REG100').email, 'a@example.com')
+
+    def test_ndjson_import(self):
+        resp = self.upload('roll.ndjson', '{"regNo": "REG200", "email": "b@example.com"}\n"REG201"\n\n{broken\n')
+        self.assertEqual((resp.data['inserted'], resp.data['invalid']), (2, 1))
+        self.assertTrue(Voter.objects.filter(registration_number='REG201', email='').exists())
+
+    def test_bad_encoding_late_in_the_file_imports_nothing(self):
+        content = 'registration_number\n' + ''.join(f'REG5{n:02d}\n' for n in range(10))
+        resp = self.client.post(reverse('voter-import-roll'), {
+            'file': SimpleUploadedFile('roll.csv', content.encode() + b'REG\xff99\n'), 'election': self.election.id,
+        }, format='multipart')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('not valid UTF-8', resp.data['error'])
+        self.assertFalse(Voter.objects.filter(registration_number__startswith='REG5').exists())
+
+    @skipUnless(connection.vendor == 'postgresql', 'COPY engine needs PostgreSQL')
+    @override_settings(ROLL_IMPORT_ENGINE='copy')
+    def test_copy_engine_matches_orm_counts(self):
+        records = enumerate(['REG001', {'regNo': 'REG400', 'email': ''}, 'REG401', 'REG401'], start=1)
+        result = RollImportService.import_records(self.election.id, records, chunk_size=2)
+        self.assertEqual((result['inserted'], result['duplicates']), (2, 2))
+        self.assertEqual(Voter.objects.get(registration_number='REG400').email, '')
+
+    def test_bulk_create_counts_only_new_voters(self):
+        resp = self.client.post(reverse('voter-bulk-create'), {
+            'election': self.election.id,
+            'voters': ['REG001', 'REG300', {'registration_number': 'REG301', 'email': 'c@example.com'}],
+        }, format='json')
+        self.assertEqual(resp.data['message'], '2 voters added successfully')
+        self.assertEqual(resp.data['duplicates'], 1)
+
+
+class RollSyncTests(ElectionFixtureMixin, APITestCase):
+    def setUp(self):
+        self.create_election()
+        Voter.objects.create(election=self.election, registration_number='REG600', email='gone@example.com')
+        Voter.objects.create(election=self.election, registration_number='REG601', email='voted@example.com',
+                             has_voted=True)
+        self.client.force_authenticate(self.officer)
+
+    def sync(self, voters, **flags):
+        return self.client.post(reverse('voter-bulk-create'), {
+            'election': self.election.id, 'mode': 'sync', 'voters': voters, **flags,
+        }, format='json')
+
+    def test_sync_applies_inserts_updates_and_safe_deletes(self):
+        resp = self.sync([
+            {'registration_number': 'REG001', 'email': 'new@example.com'},
+            {'registration_number': 'REG500', 'email': 'added@example.com'},
+        ], delete_missing=True)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            {k: resp.data[k] for k in ('inserted', 'updated', 'unchanged', 'deleted', 'kept_voted')},
+            {'inserted': 1, 'updated': 1, 'unchanged': 0, 'deleted': 1, 'kept_voted': 1},
+        )
+        self.assertEqual(
+            set(Voter.objects.values_list('registration_number', 'email')),
+            {('REG001', 'new@example.com'), ('REG500', 'added@example.com'), ('REG601', 'voted@example.com')},
+        )
+
+    def test_unchanged_roll_writes_nothing(self):
+        roll = enumerate(
+            [{'regNo': v.registration_number, 'email': v.email} for v in Voter.objects.all()], start=1
+        )
+        with CaptureQueriesContext(connection) as ctx:
+            result = RollImportService.sync_records(self.election.id, roll, chunk_size=2)
+        writes = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))]
+        self.assertEqual(writes, [])
+        self.assertEqual((result['unchanged'], result['chunks']), (3, 2))
+
+    def test_dry_run_reports_without_writing(self):
+        resp = self.sync(['REG700'], delete_missing=True, dry_run=True)
+        self.assertEqual((resp.data['inserted'], resp.data['deleted']), (1, 2))
+        self.assertEqual(
+            [c['action'] for c in resp.data['changes']], ['insert', 'delete', 'delete']
+        )
+        self.assertEqual(Voter.objects.count(), 3)
+
+
+@override_settings(VOTER_INDEX_ENABLED=True)
+class MembershipIndexTests(ElectionFixtureMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.create_election()
+
+    def test_bloom_filter_never_misses_a_member(self):
+        bloom = BloomFilter.for_capacity(1000, 0.01)
+        for n in range(1000):
+            bloom.add(f'REG{n}')
+        self.assertTrue(all(f'REG{n}' in bloom for n in range(1000)))
+        false_positives = sum(f'OTHER{n}' in bloom for n in range(10000))
+        self.assertLess(false_positives, 300)
+
+    def test_unknown_registration_number_is_rejected_without_a_query(self):
+        VoterMembershipIndex.might_contain(self.election.id, 'REG001')
+        with self.assertNumQueries(0):
+            resp = self.client.post(
+                reverse('voting-request-otp'), {'regNo': 'NOPE', 'election': self.election.id}, format='json'
+            )
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_missed_invalidation_expires_with_the_version(self):
+        self.assertFalse(VoterMembershipIndex.might_contain(self.election.id, 'REG900'))
+        # Added by another process whose invalidation never reached this cache
+        Voter.objects.bulk_create([Voter(election=self.election, registration_number='REG900')])
+        self.assertFalse(VoterMembershipIndex.might_contain(self.election.id, 'REG900'))
+        cache.delete(f'voter-index:{self.election.id}:version')  # as when VOTER_INDEX_TTL runs out
+        self.assertTrue(VoterMembershipIndex.might_contain(self.election.id, 'REG900'))
+
+    def test_index_is_off_without_a_shared_cache(self):
+        with override_settings(VOTER_INDEX_ENABLED=False), self.assertNumQueries(0):
+            self.assertTrue(VoterMembershipIndex.might_contain(self.election.id, 'NOPE'))
+
+    def test_new_voters_are_visible_after_invalidation(self):
+        self.assertFalse(VoterMembershipIndex.might_contain(self.election.id, 'REG900'))
+        Voter.objects.create(election=self.election, registration_number='REG900', email='late@example.com')
+        self.assertTrue(VoterMembershipIndex.might_contain(self.election.id, 'REG900'))
+
+        RollImportService.import_records(self.election.id, enumerate([{'regNo': 'REG901'}], start=1))
+        self.assertTrue(VoterMembershipIndex.might_contain(self.election.id, 'REG901'))
+
+
+class RollExportTests(ElectionFixtureMixin, APITestCase):
+    def setUp(self):
+        self.create_election()
+        Voter.objects.create(election=self.election, registration_number='REG002', email='',
+                             has_voted=True, voted_at=timezone.now())
+        self.client.force_authenticate(self.officer)
+
+    def export(self, **params):
+        resp = self.client.get(reverse('voter-export'), {'election': self.election.id, **params})
+        return resp, b''.join(resp.streaming_content).decode() if resp.streaming else None
+
+    def test_csv_export_streams_roll_with_turnout(self):
+        resp, body = self.export()
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertIn('attachment;', resp['Content-Disposition'])
+        lines = body.splitlines()
+        self.assertEqual(lines[0], 'registration_number,email,has_voted,voted_at')
+        self.assertEqual(lines[1], 'REG001,voter@example.com,False,')
+        self.assertTrue(lines[2].startswith('REG002,,True,'))
+
+    def test_ndjson_export_filtered_by_turnout(self):
+        resp, body = self.export(output='ndjson', has_voted='false')
+        self.assertEqual(resp['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(
+            [json.loads(line) for line in body.splitlines()],
+            [{'registration_number': 'REG001', 'email': 'voter@example.com', 'has_voted': False, 'voted_at': None}],
+        )
+
+    def test_export_reads_in_chunks(self):
+        chunks = list(RollExportService.stream(self.election.id, 'ndjson', chunk_size=1))
+        self.assertEqual(len(chunks), 2)
+
+    def test_unknown_format_is_rejected(self):
+        resp, _ = self.export(output='xlsx')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TurnoutTests(ElectionFixtureMixin, APITestCase):
+    def setUp(self):
+        self.create_election()
+        self.voter2 = Voter.objects.create(election=self.election, registration_number='REG002', email='v2@example.com')
+        self.ballot = [(p.id, self.candidates[p.id][0].id) for p in self.positions]
+
+    def turnout(self, **params):
+        return self.client.get(reverse('election-turnout', args=[self.election.id]), params)
+
+    def test_casts_update_the_rollup(self):
+        BallotService.cast_ballot(self.voter.id, self.ballot, self.election.id)
+        BallotService.cast_batch([(self.voter2.id, self.ballot)])
+
+        resp = self.turnout(granularity='hour')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['total'], 2)
+        self.assertEqual(resp.data['series'][-1]['cumulative'], 2)
+
+    def test_series_is_bucketed_and_cumulative(self):
+        start = timezone.now().replace(minute=0, second=0, microsecond=0) - timedelta(days=1)
+        for minutes, n in ((0, 2), (1, 3), (90, 1)):
+            TurnoutService.provision(self.election.id, start + timedelta(minutes=minutes))
+            TurnoutService.record({self.election.id: n}, start + timedelta(minutes=minutes))
+
+        series = self.turnout().data['series']
+        self.assertEqual([(p['votes'], p['cumulative']) for p in series], [(2, 2), (3, 5), (1, 6)])
+        series = self.turnout(granularity='hour').data['series']
+        self.assertEqual([(p['votes'], p['cumulative']) for p in series], [(5, 5), (1, 6)])
+        since = (start + timedelta(minutes=1)).isoformat()
+        series = self.turnout(since=since).data['series']
+        self.assertEqual([p['cumulative'] for p in series], [5, 6])
+        self.assertEqual(self.turnout(granularity='week').status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rebuild_matches_voted_at(self):
+        voted_at = timezone.now() - timedelta(hours=2)
+        Voter.objects.update(has_voted=True, voted_at=voted_at)
+        TurnoutService.record({self.election.id: 5}, timezone.now())
+
+        self.assertEqual(TurnoutService.rebuild(self.election.id, chunk_size=1), 2)
+        self.assertEqual(
+            list(TurnoutBucket.objects.values_list('bucket', 'votes')),
+            [(TurnoutService.bucket_for(voted_at), 2)],
+        )
+
+
+class BallotPaperTests(ElectionFixtureMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.create_election()
+        self.pending = Candidate.objects.create(
+            position=self.positions[0], user=self.officer, name='Pending', email='p@example.com',
+            program='', message='', status='pending',
+        )
+        self.url = reverse('election-ballot', args=[self.election.id])
+
+    def test_ballot_lists_only_approved_candidates(self):
+        with self.assertNumQueries(3):
+            resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual([p['id'] for p in resp.data['positions']], [p.id for p in self.positions])
+        self.assertEqual(
+            [c['id'] for c in resp.data['positions'][0]['candidates']],
+            [c.id for c in self.candidates[self.positions[0].id]],
+        )
+
+    def test_cached_ballot_is_served_without_queries(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            resp = self.client.get(self.url)
+        self.assertEqual(len(resp.data['positions']), 2)
+
+    def test_candidate_and_position_changes_invalidate_the_ballot(self):
+        self.client.get(self.url)
+        self.pending.status = 'approved'
+        self.pending.save()
+        names = [c['name'] for c in self.client.get(self.url).data['positions'][0]['candidates']]
+        self.assertIn('Pending', names)
+
+        self.positions[1].delete()
+        self.assertEqual(len(self.client.get(self.url).data['positions']), 1)
+
+    @override_settings(BALLOT_CACHE_TTL=0)
+    def test_ballot_ttl_bounds_changes_the_signals_missed(self):
+        self.client.get(self.url)
+        # An edit made by another process, invisible to this cache's version
+        Candidate.objects.filter(id=self.pending.id).update(status='approved')
+        names = [c['name'] for c in self.client.get(self.url).data['positions'][0]['candidates']]
+        self.assertIn('Pending', names)
+
+    def test_unknown_election_is_404(self):
+        resp = self.client.get(reverse('election-ballot', args=[999]))
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ConditionalGetTests(ElectionFixtureMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.create_election()
+
+    def test_unchanged_list_is_not_modified_after_one_query(self):
+        url = reverse('candidate-list')
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        etag = resp['ETag']
+
+        with self.assertNumQueries(1):
+            resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(resp['ETag'], etag)
+
+        resp = self.client.get(url, {'status': 'approved'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+    def test_writes_change_the_validators(self):
+        url = reverse('election-detail', args=[self.election.id])
+        resp = self.client.get(url)
+        etag = resp['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.election.title = 'Renamed'
+        self.election.save()
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['title'], 'Renamed')
+
+    def test_writes_in_the_same_second_are_not_hidden_by_if_modified_since(self):
+        url = reverse('election-detail', args=[self.election.id])
+        last_modified = self.client.get(url)['Last-Modified']
+        self.election.title = 'Renamed'
+        self.election.save()
+        resp = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['title'], 'Renamed')
+
+    def test_writes_from_another_process_change_the_etag(self):
+        # Validators come from the database, not from a per-process cache
+        url = reverse('candidate-list')
+        etag = self.client.get(url)['ETag']
+        cache.clear()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Candidate.objects.filter(id=self.candidates[self.positions[0].id][0].id).delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_malformed_pk_is_not_found(self):
+        for name in ('election-detail', 'candidate-detail'):
+            self.assertEqual(self.client.get(reverse(name, args=['abc'])).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_position_change_refreshes_candidate_list(self):
+        url = reverse('candidate-list')
+        etag = self.client.get(url)['ETag']
+        self.positions[0].title = 'Renamed'
+        self.positions[0].save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+
+class CursorPaginationTests(QueryBudgetMixin, ElectionFixtureMixin, APITestCase):
+    def setUp(self):
+        self.create_election()
+        Voter.objects.bulk_create([
+            Voter(election=self.election, registration_number=f'PAGE{n:03d}', email='') for n in range(24)
+        ])
+        self.client.force_authenticate(self.officer)
+
+    def walk(self, url):
+        seen, pages = [], 0
+        while url:
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            seen += resp.data['results']
+            url, pages = resp.data['next'], pages + 1
+        return seen, pages
+
+    def test_voter_pages_cover_the_roll_once_in_id_order(self):
+        voters, pages = self.walk(f"{reverse('voter-list')}?election={self.election.id}&page_size=10")
+        ids = [v['id'] for v in voters]
+        self.assertEqual(pages, 3)
+        self.assertEqual(ids, sorted(Voter.objects.values_list('id', flat=True)))
+
+    def test_deep_pages_run_the_same_single_query(self):
+        first = self.client.get(reverse('voter-list'), {'page_size': 5})
+        last = self.client.get(first.data['next'])
+        while last.data['next']:
+            last = self.client.get(last.data['next'])
+        _, first_queries = self.count_queries(f"{reverse('voter-list')}?page_size=5")
+        _, last_queries = self.count_queries(last.wsgi_request.get_full_path())
+        self.assertEqual((len(first_queries), len(last_queries)), (1, 1))
+        self.assertNotIn('OFFSET', last_queries[0])
+
+    def staff_client(self):
+        self.officer.is_staff = True
+        self.officer.save()
+
+    def test_audit_log_is_paged_newest_first(self):
+        self.staff_client()
+        now = timezone.now()
+        AuditLog.objects.bulk_create([
+            AuditLog(election=self.election, action='VOTE_CAST', timestamp=now - timedelta(minutes=n % 3))
+            for n in range(7)
+        ])
+        entries, pages = self.walk(f"{reverse('auditlog-list')}?election={self.election.id}&page_size=3")
+        self.assertEqual(pages, 3)
+        self.assertEqual(
+            [e['id'] for e in entries],
+            list(AuditLog.objects.order_by('-timestamp', '-id').values_list('id', flat=True)),
+        )
+
+    def test_audit_entries_sharing_a_timestamp_page_without_offset(self):
+        self.staff_client()
+        now = timezone.now()
+        AuditLog.objects.bulk_create([
+            AuditLog(election=self.election, action='VOTE_CAST', timestamp=now) for _ in range(7)
+        ])
+        url = f"{reverse('auditlog-list')}?page_size=3"
+        entries, pages = self.walk(url)
+        self.assertEqual((len({e['id'] for e in entries}), pages), (7, 3))
+
+        second = self.client.get(self.client.get(url).data['next'])
+        _, queries = self.count_queries(second.wsgi_request.get_full_path())
+        self.assertNotIn('OFFSET', queries[-1])
+        back = self.client.get(second.data['previous'])
+        self.assertEqual([e['id'] for e in back.data['results']], [e['id'] for e in entries[:3]])
+
+    def test_audit_log_is_staff_only(self):
+        self.assertEqual(self.client.get(reverse('auditlog-list')).status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,169 @@
+"""
+Abuse throttling for the voting endpoints
+Limits request_otp, verify_otp and cast per client IP, per registration
+number and per election, with rates configured per action in
+VOTING_THROTTLE_RATES, e.g.
+
+    'request_otp': {'ip': '300/min', 'reg_no': '5/min', 'election': '6000/min'}
+
+The reg_no scope identifies the voter: by registration number, or for cast
+by the voter in its ballot token.
+
+Every limit is checked twice: first against an in-process token bucket,
+which turns away floods without leaving the process, then against a
+fixed-window counter in the shared cache, which enforces the limit across
+all workers. DRF runs throttles before the view, and the voting viewset
+does no authentication, so a rejected request never reaches the ORM.
+
+Client IPs are REMOTE_ADDR unless REST_FRAMEWORK['NUM_PROXIES'] says how many
+X-Forwarded-For hops to trust; otherwise a client could choose its own IP.
+"""
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from rest_framework.exceptions import ValidationError
+from rest_framework.throttling import BaseThrottle
+from .ballot_token import BallotTokenService
+import hashlib
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'s': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600, 'hour': 3600, 'd': 86400, 'day': 86400}
+
+
+def parse_rate(rate: str) -> tuple:
+    """
+    Returns:
+        tuple: (number of requests, period in seconds) for a rate like '5/min'
+    """
+    num, period = rate.split('/')
+    return int(num), PERIODS[period.strip().lower()]
+
+
+class LocalBuckets:
+    """Bounded set of in-process token buckets, least recently used evicted first"""
+
+    MAX_KEYS = 10000
+
+    def __init__(self):
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, capacity: int, period: int) -> float:
+        """
+        Take one token from the bucket for key.
+
+        Returns:
+            float: 0 if a token was taken, otherwise seconds until one is available
+        """
+        refill = capacity / period
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                wait = 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                wait = (1 - tokens) / refill
+            if len(self._buckets) > self.MAX_KEYS:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+local_buckets = LocalBuckets()
+
+
+def shared_hit(key: str, limit: int, period: int) -> float:
+    """
+    Count a request in the shared cache's current window.
+
+    Returns:
+        float: 0 if within limit, otherwise seconds until the window resets
+    """
+    now = time.time()
+    window = int(now // period)
+    cache_key = f'throttle:{key}:{window}'
+    try:
+        count = cache.incr(cache_key)
+    except ValueError:
+        # First hit of the window (or the key just expired)
+        count = 1 if cache.add(cache_key, 1, timeout=period + 1) else cache.incr(cache_key)
+    if count > limit:
+        return (window + 1) * period - now
+    return 0.0
+
+
+class VotingThrottle(BaseThrottle):
+    """DRF throttle applying VOTING_THROTTLE_RATES to the voting actions"""
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        if not getattr(settings, 'VOTING_THROTTLE_ENABLED', True):
+            return True
+
+        rates = getattr(settings, 'VOTING_THROTTLE_RATES', {}).get(view.action)
+        if not rates:
+            return True
+
+        for scope, rate in rates.items():
+            ident = self.get_scope_ident(scope, request)
+            if ident is None:
+                continue
+            limit, period = parse_rate(rate)
+            key = f'{view.action}:{scope}:{hashlib.sha256(ident.encode()).hexdigest()[:32]}'
+
+            wait = local_buckets.take(key, limit, period) or shared_hit(key, limit, period)
+            if wait:
+                logger.warning(f"Throttled {view.action} by {scope} ({rate}), retry in {wait:.0f}s")
+                self.wait_seconds = wait
+                return False
+        return True
+
+    def get_scope_ident(self, scope: str, request):
+        if scope == 'ip':
+            return self.get_ident(request)
+
+        data = request.data if hasattr(request.data, 'get') else {}
+        election = data.get('election')
+        reg_no = data.get('regNo')
+
+        if not reg_no and data.get('ballotToken'):
+            # cast names the voter only through its ballot token; checking the
+            # signature is a local HMAC, no query
+            session = BallotTokenService.validate(str(data['ballotToken']))
+            if session['valid']:
+                election = session['election_id']
+                reg_no = f"voter:{session['voter_id']}"
+
+        if election:
+            # "1", "01" and 1 are the same election to the ORM, so one bucket
+            try:
+                election = int(election)
+            except (TypeError, ValueError):
+                raise ValidationError({'error': 'Election ID must be an integer'})
+
+        if scope == 'election':
+            return str(election) if election else None
+        if scope == 'reg_no':
+            return f'{election}:{reg_no}' if reg_no else None
+        return None
+
+    def wait(self):
+        return self.wait_seconds
+
+
+@receiver(setting_changed)
+def reset_on_throttle_settings_change(setting, **kwargs):
+    if setting.startswith('VOTING_THROTTLE'):
+        local_buckets.clear()
@@ -0,0 +1,147 @@
+"""
+Turnout Service for E-Voting System
+Maintains a per-minute turnout rollup alongside every cast ballot, so
+turnout charts never scan the Voter table
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum
+from django.db.models.functions import TruncDay, TruncHour
+from collections import Counter
+from .models import TurnoutBucket, Voter
+import random
+import logging
+
+logger = logging.getLogger(__name__)
+
+GRANULARITIES = {
+    'minute': None,
+    'hour': TruncHour,
+    'day': TruncDay,
+}
+
+
+class TurnoutService:
+    """Service class to maintain and read the turnout time series"""
+
+    DEFAULT_SHARDS = 8
+    REBUILD_CHUNK_SIZE = 5000
+
+    @classmethod
+    def shard_count(cls) -> int:
+        return max(1, getattr(settings, 'TURNOUT_SHARDS', cls.DEFAULT_SHARDS))
+
+    @staticmethod
+    def bucket_for(moment):
+        return moment.replace(second=0, microsecond=0)
+
+    @classmethod
+    def record(cls, counts: dict, at):
+        """
+        Add voters to the turnout of the minute containing `at`.
+
+        One UPDATE per election on a random shard; the first ballot of a
+        minute creates that minute's shard rows and updates again. Must be
+        called inside the transaction that records the votes.
+
+        Args:
+            counts: {election_id: number of voters}
+            at: Time the ballots were cast
+        """
+        bucket = cls.bucket_for(at)
+        shard = random.randrange(cls.shard_count())
+        for election_id, n in counts.items():
+            rows = TurnoutBucket.objects.filter(election_id=election_id, bucket=bucket, shard=shard)
+            if not rows.update(votes=F('votes') + n):
+                cls.provision(election_id, bucket)
+                rows.update(votes=F('votes') + n)
+
+    @classmethod
+    def provision(cls, election_id, bucket):
+        """
+        Create zeroed rows for every shard of one minute. Existing rows are left untouched.
+
+        Args:
+            election_id: Election primary key
+            bucket: Any time within the minute
+        """
+        bucket = cls.bucket_for(bucket)
+        TurnoutBucket.objects.bulk_create(
+            [
+                TurnoutBucket(election_id=election_id, bucket=bucket, shard=shard)
+                for shard in range(cls.shard_count())
+            ],
+            ignore_conflicts=True
+        )
+
+    @classmethod
+    def get_series(cls, election_id, granularity: str = 'minute', since=None, until=None) -> dict:
+        """
+        Read bucketed and cumulative turnout from the rollup.
+
+        Args:
+            election_id: The election to read
+            granularity: 'minute', 'hour' or 'day'
+            since, until: Optional time bounds (inclusive, exclusive)
+
+        Returns:
+            dict: {'granularity', 'total', 'series': [{'time', 'votes', 'cumulative'}]}
+        """
+        trunc = GRANULARITIES[granularity]
+        rows = TurnoutBucket.objects.filter(election_id=election_id, votes__gt=0)
+
+        cumulative = 0
+        if since is not None:
+            cumulative = rows.filter(bucket__lt=since).aggregate(total=Sum('votes'))['total'] or 0
+            rows = rows.filter(bucket__gte=since)
+        if until is not None:
+            rows = rows.filter(bucket__lt=until)
+
+        if trunc is not None:
+            rows = rows.annotate(time=trunc('bucket'))
+        else:
+            rows = rows.annotate(time=F('bucket'))
+        rows = rows.values('time').annotate(total=Sum('votes')).order_by('time')
+
+        series = []
+        for row in rows:
+            cumulative += row['total']
+            series.append({'time': row['time'], 'votes': row['total'], 'cumulative': cumulative})
+
+        return {'granularity': granularity, 'total': cumulative, 'series': series}
+
+    @classmethod
+    def rebuild(cls, election_id, chunk_size: int = None) -> int:
+        """
+        Recompute an election's turnout rollup from Voter.voted_at.
+        The roll is read in chunks; only the per-minute counts are held in
+        memory. Only safe while no ballots are being cast for the election.
+
+        Args:
+            election_id: The election to rebuild
+            chunk_size: Voters read per round trip
+
+        Returns:
+            int: Number of voters counted
+        """
+        voted_at = Voter.objects.filter(
+            election_id=election_id, has_voted=True, voted_at__isnull=False
+        ).values_list('voted_at', flat=True)
+
+        counts = Counter()
+        for moment in voted_at.iterator(chunk_size=chunk_size or cls.REBUILD_CHUNK_SIZE):
+            counts[cls.bucket_for(moment)] += 1
+
+        with transaction.atomic():
+            TurnoutBucket.objects.filter(election_id=election_id).delete()
+            TurnoutBucket.objects.bulk_create(
+                [
+                    TurnoutBucket(election_id=election_id, bucket=bucket, shard=0, votes=n)
+                    for bucket, n in counts.items()
+                ],
+                batch_size=1000
+            )
+
+        total = sum(counts.values())
+        logger.info(f"Rebuilt turnout for election {election_id}: {total} voters in {len(counts)} minutes")
+        return total
@@ -1,7 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ElectionViewSet, PositionViewSet, VoterViewSet, CandidateViewSet, VotingViewSet, ElectionList, ElectionDetail
-from .views import *
+from .views import ElectionViewSet, PositionViewSet, VoterViewSet, CandidateViewSet, VotingViewSet, AuditLogViewSet
+from .live_stream import election_stream
 
 router = DefaultRouter()
 router.register(r'elections', ElectionViewSet, basename='election')
@@ -9,10 +9,9 @@ router.register(r'positions', PositionViewSet, basename='position')
 router.register(r'voters', VoterViewSet, basename='voter')
 router.register(r'candidates', CandidateViewSet, basename='candidate')
 router.register(r'voting', VotingViewSet, basename='voting')
+router.register(r'audit-logs', AuditLogViewSet, basename='auditlog')
 
 urlpatterns = [
     path('', include(router.urls)),
-     path('', ElectionList.as_view()),
-    path('<int:id>/', ElectionDetail.as_view()),
+    path('elections/<int:pk>/stream/', election_stream, name='election-stream'),
 ]
-
@@ -1,21 +1,43 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
+from django.http import StreamingHttpResponse
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.db.models import Count
-from .models import Election, Position, Voter, Candidate, Vote
-from .serializers import ElectionSerializer, PositionSerializer, VoterSerializer, CandidateSerializer, VoteSerializer
+from .models import Election, Position, Voter, Candidate, Vote, AuditLog
+from .serializers import (
+    ElectionSerializer, PositionSerializer, VoterSerializer, CandidateSerializer, VoteSerializer, AuditLogSerializer,
+)
+from .pagination import AuditLogCursorPagination
+from .tally_service import TallyService
+from .results_service import ResultsService
+from .ballot_paper import BallotPaperService
+from .conditional import ConditionalGetMixin
+from .turnout_service import TurnoutService, GRANULARITIES
+from .roll_import import RollImportService
+from .roll_export import RollExportService, FORMATS as EXPORT_FORMATS
+from .membership import VoterMembershipIndex
 from accounts.models import EmailOTP
 import random
+import csv
 
 
-class ElectionViewSet(viewsets.ModelViewSet):
+def sync_options(request) -> dict:
+    """delete_missing / dry_run flags of a roll sync request (JSON booleans or form strings)."""
+    return {
+        name: str(request.data.get(name, '')).lower() in ('1', 'true', 'yes')
+        for name in ('delete_missing', 'dry_run')
+    }
+
+
+class ElectionViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Election.objects.all()
     serializer_class = ElectionSerializer
 
     def get_permissions(self):
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'results', 'turnout', 'ballot']:
             return [AllowAny()]
         return [IsAuthenticated()]
 
@@ -23,6 +45,54 @@ class ElectionViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
+    @action(detail=True, methods=['get'])
+    def results(self, request, pk=None):
+        election = self.get_object()
+        return Response(ResultsService.get_results(election))
+
+    @action(detail=True, methods=['get'])
+    def ballot(self, request, pk=None):
+        """
+        The whole ballot in one response: the election, its positions and
+        their approved candidates. Served from the cache; no query while the
+        cached copy is current.
+        """
+        payload = BallotPaperService.get_ballot(int(pk)) if pk.isdigit() else None
+        if payload is None:
+            return Response({'error': 'Election not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(payload)
+
+    @action(detail=True, methods=['get'])
+    def turnout(self, request, pk=None):
+        """
+        Turnout time series from the per-minute rollup.
+
+        Query params:
+            granularity: 'minute' (default), 'hour' or 'day'
+            since, until: Optional ISO 8601 bounds; cumulative counts include votes before since
+
+        Response:
+            {"election", "granularity", "total", "series": [{"time", "votes", "cumulative"}]}
+        """
+        election = self.get_object()
+        granularity = request.query_params.get('granularity', 'minute')
+        if granularity not in GRANULARITIES:
+            return Response(
+                {'error': f"granularity must be one of: {', '.join(GRANULARITIES)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        bounds = {}
+        for name in ('since', 'until'):
+            value = request.query_params.get(name)
+            if value:
+                bounds[name] = parse_datetime(value)
+                if bounds[name] is None:
+                    return Response({'error': f'{name} must be an ISO 8601 datetime'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        series = TurnoutService.get_series(election.id, granularity, **bounds)
+        return Response({'election': election.id, **series})
+
 
 class PositionViewSet(viewsets.ModelViewSet):
     queryset = Position.objects.all()
@@ -42,6 +112,13 @@ class VoterViewSet(viewsets.ModelViewSet):
     serializer_class = VoterSerializer
     permission_classes = [IsAuthenticated]
 
+    def get_queryset(self):
+        queryset = Voter.objects.all()
+        election_id = self.request.query_params.get('election', None)
+        if election_id:
+            queryset = queryset.filter(election_id=election_id)
+        return queryset
+
     @action(detail=False, methods=['post'])
     def bulk_create(self, request):
         voters_data = request.data.get('voters', [])
@@ -50,30 +127,108 @@ class VoterViewSet(viewsets.ModelViewSet):
         if not election_id:
             return Response({'error': 'Election ID is required'}, status=status.HTTP_400_BAD_REQUEST)
         
-        voters = []
-        for voter_data in voters_data:
-            # Handle both old format (string) and new format (dict with email)
-            if isinstance(voter_data, dict):
-                reg_no = voter_data.get('registration_number')
-                email = voter_data.get('email', '')
+        # Accepts both the old format (string) and the new format (dict with email)
+        records = enumerate(voters_data, start=1)
+        if request.data.get('mode') == 'sync':
+            result = RollImportService.sync_records(election_id, records, **sync_options(request))
+            return Response(result, status=status.HTTP_200_OK)
+        
+        result = RollImportService.import_records(election_id, records)
+        return Response({
+            'message': f"{result['inserted']} voters added successfully",
+            'inserted': result['inserted'],
+            'duplicates': result['duplicates'],
+            'invalid': result['invalid'],
+            'errors': result['errors']
+        }, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'])
+    def import_roll(self, request):
+        """
+        Import a voter roll file (multipart upload) in chunks.
+
+        Form fields:
+            file: CSV with a registration_number (or regNo) and optional email column,
+                  or NDJSON with one {"registration_number", "email"} object per line
+            election: Election ID
+            format: Optional 'csv' or 'ndjson' (default: from the file extension)
+            mode: 'append' (default) adds new voters; 'sync' makes the roll match the file,
+                  applying only inserts, email updates and, with delete_missing, deletes
+            delete_missing, dry_run: Optional 'true' flags for sync mode
+
+        Response (append):
+            {"rows", "inserted", "duplicates", "invalid", "chunks", "errors": [{"line", "error"}]}
+        Response (sync):
+            {"rows", "inserted", "updated", "unchanged", "deleted", "kept_voted", ..., "changes": [...]}
+        """
+        upload = request.FILES.get('file')
+        election_id = request.data.get('election')
+        
+        if not upload or not election_id:
+            return Response({'error': 'A roll file and election ID are required'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if not Election.objects.filter(id=election_id).exists():
+            return Response({'error': 'Election not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        fmt = RollImportService.detect_format(upload.name, request.data.get('format'))
+        sync = request.data.get('mode') == 'sync'
+        try:
+            if sync:
+                result = RollImportService.sync_file(election_id, upload, fmt, **sync_options(request))
             else:
-                reg_no = voter_data
-                email = ''
-            
-            voters.append(Voter(
-                election_id=election_id,
-                registration_number=reg_no,
-                email=email
-            ))
-        
-        Voter.objects.bulk_create(voters, ignore_conflicts=True)
-        return Response({'message': f'{len(voters)} voters added successfully'}, status=status.HTTP_201_CREATED)
+                result = RollImportService.import_file(election_id, upload, fmt)
+        except (ValueError, csv.Error) as e:
+            return Response({'error': f'Could not read roll file: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(result, status=status.HTTP_200_OK if sync else status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Stream an election's roll with turnout status.
+
+        Query params:
+            election: Election ID
+            has_voted: Optional 'true' / 'false' turnout filter
+            output: 'csv' (default) or 'ndjson'
+
+        Columns: registration_number, email, has_voted, voted_at
+        """
+        election_id = request.query_params.get('election')
+        fmt = request.query_params.get('output', 'csv').lower()
+        
+        if not election_id:
+            return Response({'error': 'Election ID is required'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if fmt not in EXPORT_FORMATS:
+            return Response(
+                {'error': f"output must be one of: {', '.join(EXPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if not Election.objects.filter(id=election_id).exists():
+            return Response({'error': 'Election not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        has_voted = request.query_params.get('has_voted')
+        if has_voted is not None:
+            has_voted = has_voted.lower() in ('1', 'true', 'yes')
+        
+        content_type, extension = EXPORT_FORMATS[fmt]
+        response = StreamingHttpResponse(
+            RollExportService.stream(election_id, fmt, has_voted), content_type=content_type
+        )
+        response['Content-Disposition'] = f'attachment; filename="election-{election_id}-voters.{extension}"'
+        response['X-Accel-Buffering'] = 'no'
+        return response
 
     @action(detail=False, methods=['post'])
     def verify(self, request):
         reg_no = request.data.get('regNo')
         election_id = request.data.get('election')
         
+        if not VoterMembershipIndex.might_contain(election_id, reg_no):
+            return Response({'valid': False}, status=status.HTTP_404_NOT_FOUND)
+        
         try:
             voter = Voter.objects.get(registration_number=reg_no, election_id=election_id)
             return Response({'valid': True, 'has_voted': voter.has_voted})
@@ -81,9 +236,10 @@ class VoterViewSet(viewsets.ModelViewSet):
             return Response({'valid': False}, status=status.HTTP_404_NOT_FOUND)
 
 
-class CandidateViewSet(viewsets.ModelViewSet):
+class CandidateViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Candidate.objects.all()
     serializer_class = CandidateSerializer
+    conditional_fields = ('updated_at', 'position__updated_at')  # position_title comes from Position
     
     def get_permissions(self):
         if self.action in ['list', 'retrieve']:
@@ -91,7 +247,7 @@ class CandidateViewSet(viewsets.ModelViewSet):
         return [IsAuthenticated()]
 
     def get_queryset(self):
-        queryset = Candidate.objects.all()
+        queryset = Candidate.objects.select_related('position')
         position_id = self.request.query_params.get('position', None)
         status_filter = self.request.query_params.get('status', None)
         
@@ -124,6 +280,7 @@ class CandidateViewSet(viewsets.ModelViewSet):
         candidate.reviewed_by = request.user
         candidate.reviewed_at = timezone.now()
         candidate.save()
+        TallyService.provision([candidate.id])
         return Response({'message': 'Candidate approved successfully'})
 
     @action(detail=True, methods=['put'])
@@ -137,6 +294,23 @@ class CandidateViewSet(viewsets.ModelViewSet):
         return Response({'message': 'Candidate rejected'})
 
 
+class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = AuditLog.objects.all()
+    serializer_class = AuditLogSerializer
+    permission_classes = [IsAdminUser]  # entries carry voter numbers and IP addresses
+    pagination_class = AuditLogCursorPagination
+
+    def get_queryset(self):
+        queryset = AuditLog.objects.all()
+        election_id = self.request.query_params.get('election', None)
+        action_filter = self.request.query_params.get('action', None)
+        
+        if election_id:
+            queryset = queryset.filter(election_id=election_id)
+        if action_filter:
+            queryset = queryset.filter(action=action_filter)
+        
+        return queryset
 
 
 # Import clean VotingViewSet from separate file
@@ -0,0 +1,148 @@
+"""
+Vote ingestion for E-Voting System
+Routes validated ballots either straight to the database or through a
+group-commit buffer, depending on VOTE_INGESTION_MODE.
+
+In 'group' mode each request thread hands its ballot to a per-process
+flusher thread and blocks until the batch containing it has committed, so
+acknowledgements stay durable while many ballots share one transaction.
+"""
+from django.conf import settings
+from django.db import close_old_connections
+from .ballot_service import BallotService
+import queue
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PendingBallot:
+    """A ballot waiting in the buffer, and the slot its result is returned in."""
+
+    def __init__(self, voter_id: int, ballot: list):
+        self.voter_id = voter_id
+        self.ballot = ballot
+        self.result = None
+        self.done = threading.Event()
+
+
+class GroupCommitBuffer:
+    """
+    Collects ballots and commits them in groups of up to max_batch, or
+    every interval_ms milliseconds, whichever comes first.
+    """
+
+    def __init__(self, max_batch: int = 200, interval_ms: int = 20, flush=None):
+        self.max_batch = max_batch
+        self.interval = interval_ms / 1000
+        self.flush = flush or BallotService.cast_batch
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, voter_id: int, ballot: list, timeout: float = None) -> dict:
+        """
+        Queue a ballot and wait for the group commit that records it.
+
+        Returns:
+            dict: The cast_ballot()-style result for this ballot
+
+        Raises:
+            TimeoutError: if no commit finished within timeout seconds
+        """
+        self._ensure_started()
+        pending = PendingBallot(voter_id, ballot)
+        self._queue.put(pending)
+        if not pending.done.wait(timeout):
+            raise TimeoutError(f'Group commit did not acknowledge voter {voter_id} in time')
+        return pending.result
+
+    def _ensure_started(self):
+        # Started lazily so each forked worker process gets its own flusher
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='vote-group-commit', daemon=True)
+                self._thread.start()
+
+    def _collect(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.interval
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            self.commit(batch)
+
+    def commit(self, batch: list):
+        """Commit one batch and release every request waiting on it."""
+        try:
+            results = self.flush([(p.voter_id, p.ballot) for p in batch])
+        except Exception as e:
+            # One bad ballot must not fail the group: fall back to one transaction each
+            logger.error(f"Group commit of {len(batch)} ballots failed, retrying individually: {str(e)}")
+            results = []
+            for p in batch:
+                try:
+                    results.append(BallotService.cast_ballot(p.voter_id, p.ballot))
+                except Exception as inner:
+                    logger.error(f"Error casting ballot for voter {p.voter_id}: {str(inner)}")
+                    results.append({'success': False, 'error': 'An error occurred while casting your vote', 'votes_count': 0})
+        finally:
+            close_old_connections()
+
+        for pending, result in zip(batch, results):
+            pending.result = result
+            pending.done.set()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer() -> GroupCommitBuffer:
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = GroupCommitBuffer(
+                    max_batch=getattr(settings, 'GROUP_COMMIT_MAX_BATCH', 200),
+                    interval_ms=getattr(settings, 'GROUP_COMMIT_INTERVAL_MS', 20)
+                )
+    return _buffer
+
+
+def submit_ballot(voter_id: int, ballot: list, election_id: int = None) -> dict:
+    """
+    Record a validated ballot using the configured ingestion mode.
+
+    Returns:
+        dict: {'success': bool, 'error': str or None, 'votes_count': int, 'pending': bool}
+              pending is True when the group commit did not acknowledge in time: the
+              ballot is still queued and may yet be recorded, so it is neither a
+              success nor a failure until the voter's status says so
+    """
+    if getattr(settings, 'VOTE_INGESTION_MODE', 'direct') == 'group':
+        # The flusher reads each voter's election along with its row lock
+        try:
+            return get_buffer().submit(
+                voter_id,
+                ballot,
+                timeout=getattr(settings, 'GROUP_COMMIT_ACK_TIMEOUT', 10)
+            )
+        except TimeoutError as e:
+            logger.warning(str(e))
+            return {'success': False, 'error': None, 'votes_count': 0, 'pending': True}
+    return BallotService.cast_ballot(voter_id, ballot, election_id)
@@ -6,10 +6,17 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
-from django.utils import timezone
-from .models import Voter, Vote, Candidate
+from .models import Voter
 from .otp_service import OTPService
+from .ballot_service import BallotService
+from .vote_ingest import submit_ballot
+from .idempotency import idempotent
+from .ballot_token import BallotTokenService
+from .membership import VoterMembershipIndex
+from .throttling import VotingThrottle
+from accounts.outbox import MailOutbox
 import logging
+import uuid
 
 logger = logging.getLogger(__name__)
 
@@ -19,8 +26,13 @@ class VotingViewSet(viewsets.ViewSet):
     ViewSet for voter authentication and voting via OTP
     """
     permission_classes = [AllowAny]
+    # Voters prove who they are with an OTP, not a session or token, so no
+    # authentication runs and throttling happens before any database access
+    authentication_classes = []
+    throttle_classes = [VotingThrottle]
     
     @action(detail=False, methods=['post'])
+    @idempotent
     def request_otp(self, request):
         """
         Request an OTP for voter authentication.
@@ -34,16 +46,13 @@ class VotingViewSet(viewsets.ViewSet):
         Response (success):
             {
                 "message": "OTP sent successfully...",
-                "email_hint": "abc***@example.com"
+                "email_hint": "abc***@example.com",
+                "delivery_id": "uuid of the queued email, see delivery_status"
             }
         
-        Response (email failed - fallback):
-            {
-                "message": "OTP generated successfully",
-                "otp": "123456",
-                "note": "Email service unavailable...",
-                "email_failed": true
-            }
+        Response (503): the email could not be queued (outbox unavailable). The
+        code is never returned in the response; delivery failures after queueing
+        show up in delivery_status.
         """
         reg_no = request.data.get('regNo')
         election_id = request.data.get('election')
@@ -55,9 +64,17 @@ class VotingViewSet(viewsets.ViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        # Unknown registration numbers are turned away without a query
+        if not VoterMembershipIndex.might_contain(election_id, reg_no):
+            logger.warning(f"Voter not found: {reg_no} for election {election_id}")
+            return Response(
+                {'error': 'Voter registration not found. Please contact the election administrator.'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
         try:
-            # Find voter
-            voter = Voter.objects.get(
+            # Find voter (with election, whose title goes into the email)
+            voter = Voter.objects.select_related('election').get(
                 registration_number=reg_no,
                 election_id=election_id
             )
@@ -78,31 +95,27 @@ class VotingViewSet(viewsets.ViewSet):
                 )
             
             # Generate OTP
-            otp_obj = OTPService.generate_otp(voter.email)
+            otp_code = OTPService.generate_otp(voter.email)
             
-            # Try to send email
+            # Queue the email; the outbox workers deliver it
             email_result = OTPService.send_otp_email(
                 email=voter.email,
-                otp_code=otp_obj.code,
+                otp_code=otp_code,
                 election_title=voter.election.title,
                 reg_no=reg_no
             )
             
-            # Return appropriate response
-            if email_result['success']:
-                return Response({
-                    'message': 'OTP sent successfully to your registered email',
-                    'email_hint': OTPService.get_masked_email(voter.email)
-                }, status=status.HTTP_200_OK)
-            else:
-                # Email failed - return OTP in response for fallback display
-                logger.info(f"Email failed for {voter.email}, returning OTP in response")
-                return Response({
-                    'message': 'OTP generated successfully',
-                    'otp': otp_obj.code,
-                    'note': 'Email service is temporarily unavailable. Please use the OTP code displayed on your screen.',
-                    'email_failed': True
-                }, status=status.HTTP_200_OK)
+            if not email_result['success']:
+                return Response(
+                    {'error': 'Could not send your OTP right now. Please try again shortly.'},
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE
+                )
+            
+            return Response({
+                'message': 'OTP sent successfully to your registered email',
+                'email_hint': OTPService.get_masked_email(voter.email),
+                'delivery_id': email_result['delivery_id']
+            }, status=status.HTTP_200_OK)
         
         except Voter.DoesNotExist:
             logger.warning(f"Voter not found: {reg_no} for election {election_id}")
@@ -117,6 +130,35 @@ class VotingViewSet(viewsets.ViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    @action(detail=False, methods=['get'])
+    def delivery_status(self, request):
+        """
+        Report the delivery state of a queued OTP email.
+        
+        Query params:
+            id: delivery_id returned by request_otp
+        
+        Response:
+            {
+                "status": "pending" | "sending" | "sent" | "failed",
+                "attempts": 1,
+                "sent_at": "2025-12-08T10:00:00Z" or null
+            }
+        """
+        delivery_id = request.query_params.get('id')
+        
+        try:
+            delivery = MailOutbox.get_status(uuid.UUID(str(delivery_id)))
+        except ValueError:
+            delivery = None
+        
+        if delivery is None:
+            return Response(
+                {'error': 'Delivery not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(delivery, status=status.HTTP_200_OK)
+    
     @action(detail=False, methods=['post'])
     def verify_otp(self, request):
         """
@@ -131,7 +173,9 @@ class VotingViewSet(viewsets.ViewSet):
         
         Response:
             {
-                "message": "OTP verified successfully"
+                "message": "OTP verified successfully",
+                "ballot_token": "<signed token to send with cast>",
+                "expires_in": 900
             }
         """
         reg_no = request.data.get('regNo')
@@ -145,6 +189,13 @@ class VotingViewSet(viewsets.ViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        if not VoterMembershipIndex.might_contain(election_id, reg_no):
+            logger.warning(f"Voter not found during OTP verification: {reg_no}")
+            return Response(
+                {'error': 'Voter registration not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
         try:
             # Find voter
             voter = Voter.objects.get(
@@ -164,10 +215,11 @@ class VotingViewSet(viewsets.ViewSet):
             
             if verification_result['valid']:
                 logger.info(f"OTP verified for voter {reg_no}")
-                return Response(
-                    {'message': verification_result['message']},
-                    status=status.HTTP_200_OK
-                )
+                return Response({
+                    'message': verification_result['message'],
+                    'ballot_token': BallotTokenService.issue(voter.id, voter.election_id),
+                    'expires_in': BallotTokenService.get_ttl()
+                }, status=status.HTTP_200_OK)
             else:
                 return Response(
                     {'error': verification_result['message']},
@@ -188,13 +240,16 @@ class VotingViewSet(viewsets.ViewSet):
             )
     
     @action(detail=False, methods=['post'])
+    @idempotent
     def cast(self, request):
         """
         Cast votes for a voter after OTP verification.
+        The ballot token from verify_otp identifies the voter, so no voter
+        lookup is needed.
         
         Request body:
             {
-                "regNo": "voter_registration_number",
+                "ballotToken": "<token from verify_otp>",
                 "votes": {
                     "position_id": "candidate_id",
                     ...
@@ -202,21 +257,28 @@ class VotingViewSet(viewsets.ViewSet):
                 "election": election_id
             }
         
-        Response:
+        Response (201):
             {
                 "message": "Vote cast successfully",
                 "votes_count": 3
             }
+        Response (202, group-commit mode only): the ballot is queued but its commit
+        was not acknowledged in time; it may still be recorded. Poll cast_status
+        with the same ballot token instead of casting again.
+            {
+                "message": "Your vote is being recorded. ...",
+                "status": "pending"
+            }
         """
-        reg_no = request.data.get('regNo')
+        token = request.data.get('ballotToken')
         votes_data = request.data.get('votes', {})
         election_id = request.data.get('election')
         
         # Validate input
-        if not reg_no or not election_id:
+        if not token:
             return Response(
-                {'error': 'Registration number and election ID are required'},
-                status=status.HTTP_400_BAD_REQUEST
+                {'error': 'Please verify your OTP before casting your vote'},
+                status=status.HTTP_401_UNAUTHORIZED
             )
         
         if not votes_data:
@@ -226,66 +288,74 @@ class VotingViewSet(viewsets.ViewSet):
             )
         
         try:
-            # Find voter
-            voter = Voter.objects.get(
-                registration_number=reg_no,
-                election_id=election_id
-            )
+            # Identify the voter from the signed token, without a query
+            session = BallotTokenService.validate(token)
+            if not session['valid']:
+                return Response(
+                    {'error': session['error']},
+                    status=status.HTTP_401_UNAUTHORIZED
+                )
             
-            # Check if already voted
-            if voter.has_voted:
-                logger.warning(f"Voter {reg_no} attempted to vote multiple times")
+            voter_id = session['voter_id']
+            if election_id and str(election_id) != str(session['election_id']):
                 return Response(
-                    {'error': 'You have already voted in this election'},
+                    {'error': 'Your voting session is for a different election'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # Validate all candidates exist
-            for position_id, candidate_id in votes_data.items():
-                try:
-                    Candidate.objects.get(
-                        id=candidate_id,
-                        position_id=position_id,
-                        position__election_id=election_id,
-                        status='approved'
-                    )
-                except Candidate.DoesNotExist:
-                    return Response(
-                        {'error': f'Invalid candidate selection for position {position_id}'},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-            
-            # Cast all votes
-            votes_cast = []
-            for position_id, candidate_id in votes_data.items():
-                vote = Vote.objects.create(
-                    voter=voter,
-                    candidate_id=candidate_id,
-                    position_id=position_id
+            # Validate the whole ballot in one query
+            validation = BallotService.validate_ballot(session['election_id'], votes_data)
+            if not validation['valid']:
+                return Response(
+                    {'error': validation['error']},
+                    status=status.HTTP_400_BAD_REQUEST
                 )
-                votes_cast.append(vote)
             
-            # Mark voter as voted
-            voter.has_voted = True
-            voter.voted_at = timezone.now()
-            voter.save()
+            # Record all votes and mark voter as voted atomically
+            result = submit_ballot(voter_id, validation['ballot'], session['election_id'])
+            if result.get('pending'):
+                # Still queued for the group commit: the outcome is not known yet
+                return Response({
+                    'message': 'Your vote is being recorded. Check cast_status with your ballot token.',
+                    'status': 'pending'
+                }, status=status.HTTP_202_ACCEPTED)
             
-            logger.info(f"Voter {reg_no} successfully cast {len(votes_cast)} votes")
+            if not result['success']:
+                logger.warning(f"Voter {voter_id} attempted to vote multiple times")
+                return Response(
+                    {'error': result['error']},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            logger.info(f"Voter {voter_id} successfully cast {result['votes_count']} votes")
             
             return Response({
                 'message': 'Vote cast successfully',
-                'votes_count': len(votes_cast)
+                'votes_count': result['votes_count']
             }, status=status.HTTP_201_CREATED)
         
-        except Voter.DoesNotExist:
-            logger.warning(f"Voter not found during vote casting: {reg_no}")
-            return Response(
-                {'error': 'Voter registration not found'},
-                status=status.HTTP_404_NOT_FOUND
-            )
         except Exception as e:
             logger.error(f"Error in cast: {str(e)}")
             return Response(
                 {'error': 'An error occurred while casting your vote'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+    
+    @action(detail=False, methods=['post'])
+    def cast_status(self, request):
+        """
+        Report whether the ballot of a voting session has been recorded,
+        e.g. after cast answered 202.
+        
+        Request body:
+            {"ballotToken": "<token from verify_otp>"}
+        
+        Response:
+            {"status": "recorded" | "not_recorded"}
+        """
+        session = BallotTokenService.validate(request.data.get('ballotToken') or '')
+        if not session['valid']:
+            return Response({'error': session['error']}, status=status.HTTP_401_UNAUTHORIZED)
+        
+        recorded = Voter.objects.filter(id=session['voter_id'], has_voted=True).exists()
+        return Response({'status': 'recorded' if recorded else 'not_recorded'})